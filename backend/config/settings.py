@@ -25,6 +25,106 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-issrzw&^$!jj5uldn%gdxf6n@4edz4^=251l1k69*8ekdhm!=v')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+# Base URL of the chat completions API (point it at `manage.py fake_completions` locally).
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+# Shared LLM client (python_edi/llm_client.py): seconds to connect and to wait
+# between bytes of a response, pooled keep-alive connections, calls in flight
+# at once, and retries of 429/5xx responses with jittered backoff (base and
+# cap in seconds; a Retry-After header from the API wins, up to the cap).
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '60'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+# Identical AI assistance requests in flight share one API call; other
+# processes wait at most this many seconds for it (needs a shared cache
+# backend, such as Redis or memcached, to span processes).
+AI_SINGLE_FLIGHT_LEASE = int(os.getenv('AI_SINGLE_FLIGHT_LEASE', '120'))
+# AI assistance answers are cached in the database for AI_CACHE_TTL seconds
+# (0 disables the cache), keeping at most AI_CACHE_MAX_ENTRIES, least
+# recently used evicted first (checked every assistance_cache.EVICT_EVERY
+# stores, so the table can briefly run over). With AI_CACHE_NEAR_DUPLICATES,
+# a request whose error and code shape are at least AI_CACHE_SIMILARITY
+# similar (estimated Jaccard) to a cached one on the same task, with the
+# same numbers in the code, gets that answer.
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', str(7 * 24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', '10000'))
+AI_CACHE_NEAR_DUPLICATES = os.getenv('AI_CACHE_NEAR_DUPLICATES', 'True') == 'True'
+AI_CACHE_SIMILARITY = float(os.getenv('AI_CACHE_SIMILARITY', '0.85'))
+# generate-task/ hands out pre-generated tasks: TASK_POOL_SIZE per difficulty
+# are kept ready (0 disables the pool), refilled in the background once fewer
+# than TASK_POOL_LOW_WATER are left (or by `manage.py refill_task_pool`).
+TASK_POOL_SIZE = int(os.getenv('TASK_POOL_SIZE', '5'))
+TASK_POOL_LOW_WATER = int(os.getenv('TASK_POOL_LOW_WATER', '2'))
+# Generated tasks whose title, description and test cases are at least
+# TASK_DUPLICATE_SIMILARITY similar (estimated Jaccard) to an existing task are
+# rejected, or with TASK_DUPLICATES = 'link' saved linked to it. Each process
+# rebuilds its in-memory task indexes (near-duplicate and random-task) every
+# TASK_INDEX_MAX_AGE seconds. Between rebuilds the near-duplicate index reads
+# new tasks from the database, and the random-task index replays per-task
+# changes made by other processes from the default cache; without a shared
+# cache (CACHE_REDIS_URL) it only sees them at the next rebuild.
+TASK_DUPLICATE_SIMILARITY = float(os.getenv('TASK_DUPLICATE_SIMILARITY', '0.7'))
+TASK_DUPLICATES = os.getenv('TASK_DUPLICATES', 'reject')
+TASK_INDEX_MAX_AGE = int(os.getenv('TASK_INDEX_MAX_AGE', '600'))
+# Task detail and hints responses carry an ETag of the task's revision and
+# may be reused by browsers for TASK_HTTP_MAX_AGE seconds before they
+# revalidate (getting a 304 if the task is unchanged). Rendered payloads are
+# kept in the default cache for TASK_PAYLOAD_CACHE_TTL seconds per revision.
+TASK_HTTP_MAX_AGE = int(os.getenv('TASK_HTTP_MAX_AGE', '60'))
+TASK_PAYLOAD_CACHE_TTL = int(os.getenv('TASK_PAYLOAD_CACHE_TTL', '3600'))
+
+# Warm sandbox workers per web process for run_code and grading (0 disables
+# the pool), and how many jobs a worker serves before it is recycled.
+SANDBOX_POOL_SIZE = int(os.getenv('SANDBOX_POOL_SIZE', '4'))
+SANDBOX_POOL_MAX_JOBS = int(os.getenv('SANDBOX_POOL_MAX_JOBS', '100'))
+
+# Resource limits for each sandboxed job: CPU seconds per test case, address
+# space, size of any file it writes, processes it may fork (0 = none), and
+# the stdout kept per case before it is truncated.
+SANDBOX_CPU_SECONDS = int(os.getenv('SANDBOX_CPU_SECONDS', '2'))
+SANDBOX_MEMORY_MB = int(os.getenv('SANDBOX_MEMORY_MB', '256'))
+SANDBOX_FILE_SIZE_MB = float(os.getenv('SANDBOX_FILE_SIZE_MB', '1'))
+SANDBOX_MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', '0'))
+SANDBOX_MAX_OUTPUT_BYTES = int(os.getenv('SANDBOX_MAX_OUTPUT_BYTES', '65536'))
+
+# How student code reaches the sandbox: "stdin" sends it inside the job, so
+# nothing touches the disk; "tempfile" is the fallback that writes it to a
+# temporary file for the harness to read.
+SANDBOX_CODE_DELIVERY = os.getenv('SANDBOX_CODE_DELIVERY', 'stdin')
+
+# Interactive kernels: at most SANDBOX_MAX_KERNELS persistent sessions per web
+# process (0 disables them), each killed after SANDBOX_KERNEL_IDLE_TIMEOUT
+# idle seconds and capped at SANDBOX_KERNEL_MEMORY_MB of address space.
+# Kernels live in the process that started them: with more than one web
+# process, route requests on the session cookie or sessions keep restarting.
+# Requests for a snippet's result wait up to SANDBOX_KERNEL_POLL_TIMEOUT
+# seconds before answering 202 and asking the client to poll again.
+SANDBOX_MAX_KERNELS = int(os.getenv('SANDBOX_MAX_KERNELS', '8'))
+SANDBOX_KERNEL_IDLE_TIMEOUT = int(os.getenv('SANDBOX_KERNEL_IDLE_TIMEOUT', '300'))
+SANDBOX_KERNEL_MEMORY_MB = int(os.getenv('SANDBOX_KERNEL_MEMORY_MB', '256'))
+SANDBOX_KERNEL_POLL_TIMEOUT = int(os.getenv('SANDBOX_KERNEL_POLL_TIMEOUT', '20'))
+
+# Admission control: at most SANDBOX_MAX_CONCURRENT executions per web
+# process, with up to SANDBOX_MAX_QUEUE requests waiting SANDBOX_QUEUE_TIMEOUT
+# seconds for a slot (503 beyond that). Each user/IP gets a token bucket of
+# SANDBOX_RATE_BURST runs refilled at SANDBOX_RATE_PER_MINUTE (429 when empty);
+# buckets live in the default cache, so they are only global across web
+# processes with a shared cache (CACHE_REDIS_URL below).
+SANDBOX_MAX_CONCURRENT = int(os.getenv('SANDBOX_MAX_CONCURRENT', '8'))
+SANDBOX_MAX_QUEUE = int(os.getenv('SANDBOX_MAX_QUEUE', '16'))
+SANDBOX_QUEUE_TIMEOUT = float(os.getenv('SANDBOX_QUEUE_TIMEOUT', '5'))
+SANDBOX_RATE_BURST = int(os.getenv('SANDBOX_RATE_BURST', '10'))
+SANDBOX_RATE_PER_MINUTE = int(os.getenv('SANDBOX_RATE_PER_MINUTE', '30'))
+
+# Graded submissions are written in batches of up to this many rows, or
+# after this many milliseconds, whichever comes first. Rows still buffered
+# when a process is killed outright are lost (see submission_buffer.py);
+# set SUBMISSION_BUFFER_SIZE to 1 to write every submission immediately.
+SUBMISSION_BUFFER_SIZE = int(os.getenv('SUBMISSION_BUFFER_SIZE', '50'))
+SUBMISSION_BUFFER_FLUSH_MS = int(os.getenv('SUBMISSION_BUFFER_FLUSH_MS', '500'))
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
@@ -130,6 +230,62 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# 'verdicts' holds content-addressed grading results for identical
+# resubmissions; it is bounded by size and age. Its keys cover the test
+# cases, so it never needs invalidating and a per-process cache is enough.
+#
+# The default cache holds state every web process must share: sandbox rate
+# limit buckets, AI assistance single-flight leases, task pool refill leases
+# and the versions that tell each process its task indexes are stale. The
+# local-memory fallback is per process, so with several workers set
+# CACHE_REDIS_URL (e.g. redis://localhost:6379/0) for a shared Redis cache.
+
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'verdicts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'verdicts',
+        'TIMEOUT': int(os.getenv('VERDICT_CACHE_TTL', '600')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('VERDICT_CACHE_MAX_ENTRIES', '5000')),
+        },
+    },
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+#
+# python_edi modules that log (e.g. the LLM client) write to the console at
+# LOG_LEVEL; set it to DEBUG to see every LLM call with its latency.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'python_edi': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
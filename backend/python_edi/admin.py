@@ -1,13 +1,17 @@
 from django.contrib import admin
-from .models import PythonTask, Submission, ChatMessage
+from .models import PythonTask, Submission, ChatMessage, GradingJob, AssistanceAnswer
+from .grading import requeue_jobs
+from .regrade import regrade_in_background
 
 class PythonTaskAdmin(admin.ModelAdmin):
-    list_display = ('title', 'difficulty', 'created_at')
-    list_filter = ('difficulty', 'created_at')
+    list_display = ('title', 'difficulty', 'pooled', 'duplicate_of', 'created_at')
+    list_filter = ('difficulty', 'pooled', 'created_at')
     search_fields = ('title', 'description')
+    actions = ['regrade_submissions']
+    raw_id_fields = ('duplicate_of',)
     fieldsets = (
         (None, {
-            'fields': ('title', 'description', 'difficulty')
+            'fields': ('title', 'description', 'difficulty', 'pooled', 'duplicate_of')
         }),
         ('Test Cases', {
             'fields': ('test_cases',),
@@ -15,8 +19,37 @@ class PythonTaskAdmin(admin.ModelAdmin):
                            'Example: [{"input": "85,90,95,88,92", "expected_output": "90"}, '
                            '{"input": "75,80,85,90,95", "expected_output": "85"}]')
         }),
+        ('Reference solution', {
+            'fields': ('reference_solution',),
+            'classes': ('collapse',),
+            'description': 'Solution that passes every test case; generated tasks are checked against it.'
+        }),
+        ('Pre-flight checks', {
+            'fields': ('preflight_rules',),
+            'classes': ('collapse',),
+            'description': ('Optional overrides for the static checks run before any code is executed. '
+                           'Defaults: {"forbidden_imports": ["os", "subprocess", "socket"], '
+                           '"require_entry": false, "infinite_loops": true}')
+        }),
+        ('Performance', {
+            'fields': ('stress_inputs',),
+            'classes': ('collapse',),
+            'description': ('Optional generator for performance mode. Example: '
+                           '{"generator": "def generate(n):\\n    return list(range(n))", '
+                           '"sizes": [1000, 4000, 16000, 64000, 256000]}')
+        }),
     )
 
+    @admin.action(description="Regrade stale submissions of selected tasks")
+    def regrade_submissions(self, request, queryset):
+        task_ids = list(queryset.values_list('pk', flat=True))
+        regrade_in_background(task_ids)
+        self.message_user(
+            request,
+            f"Regrading submissions of {len(task_ids)} task(s) in the background. "
+            f"For large backlogs run `manage.py regrade` instead, which reports progress."
+        )
+
 class SubmissionAdmin(admin.ModelAdmin):
     list_display = ('user', 'task', 'is_successful', 'submitted_at')
     list_filter = ('is_successful', 'submitted_at')
@@ -29,6 +62,29 @@ class ChatMessageAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'task__title', 'message')
     readonly_fields = ('user', 'task', 'message', 'is_from_user', 'created_at')
 
+class GradingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'task', 'status', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__email', 'task__title', 'worker')
+    readonly_fields = ('user', 'task', 'code', 'test_cases', 'result', 'error_message', 'attempts',
+                       'worker', 'created_at', 'started_at', 'finished_at')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected grading jobs")
+    def requeue(self, request, queryset):
+        count = requeue_jobs(queryset)
+        self.message_user(request, f"Requeued {count} grading job(s).")
+
+class AssistanceAnswerAdmin(admin.ModelAdmin):
+    # Deleting a wrong answer here stops it from being served again.
+    list_display = ('fingerprint', 'error_type', 'question', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('error_type', 'created_at')
+    search_fields = ('question', 'response')
+    readonly_fields = ('fingerprint', 'task_key', 'error_type', 'question', 'signature', 'response',
+                       'hits', 'created_at', 'last_used_at')
+
 admin.site.register(PythonTask, PythonTaskAdmin)
 admin.site.register(Submission, SubmissionAdmin)
 admin.site.register(ChatMessage, ChatMessageAdmin)
+admin.site.register(GradingJob, GradingJobAdmin)
+admin.site.register(AssistanceAnswer, AssistanceAnswerAdmin)
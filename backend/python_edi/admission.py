@@ -0,0 +1,213 @@
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+class SandboxBusy(APIException):
+    """Every sandbox slot is taken and the wait queue is full or timed out."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The code runner is busy. Please try again shortly."
+    default_code = 'sandbox_busy'
+
+    def __init__(self, wait=1):
+        super().__init__()
+        # DRF's exception handler turns this into a Retry-After header.
+        self.wait = wait
+
+
+class AdmissionController:
+    """
+    Caps how many sandbox executions this process runs at once.
+
+    Requests beyond max_concurrent wait in a queue of at most max_queue for
+    up to queue_timeout seconds; anything beyond that is turned away with
+    SandboxBusy instead of piling more processes onto the host.
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._counters = {
+            'admitted': 0, 'queued': 0, 'rejected_queue_full': 0, 'rejected_timeout': 0,
+            'queued_ms_total': 0.0, 'queued_ms_max': 0.0,
+        }
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed. Returns ms spent queued."""
+        started = time.monotonic()
+        with self._condition:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+                self._counters['admitted'] += 1
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self._counters['rejected_queue_full'] += 1
+                raise SandboxBusy(wait=max(1, math.ceil(self.queue_timeout)))
+
+            self._waiting += 1
+            self._counters['queued'] += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self._active < self.max_concurrent, timeout=self.queue_timeout
+                )
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                self._counters['rejected_timeout'] += 1
+                raise SandboxBusy(wait=max(1, math.ceil(self.queue_timeout)))
+
+            self._active += 1
+            self._counters['admitted'] += 1
+            queued_ms = (time.monotonic() - started) * 1000
+            self._counters['queued_ms_total'] += queued_ms
+            self._counters['queued_ms_max'] = max(self._counters['queued_ms_max'], queued_ms)
+            return queued_ms
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            queued = self._counters['queued']
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'waiting': self._waiting,
+                **self._counters,
+                'queued_ms_avg': round(self._counters['queued_ms_total'] / queued, 3) if queued else None,
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                getattr(settings, 'SANDBOX_MAX_CONCURRENT', 8),
+                getattr(settings, 'SANDBOX_MAX_QUEUE', 16),
+                getattr(settings, 'SANDBOX_QUEUE_TIMEOUT', 5)
+            )
+        return _controller
+
+
+@contextmanager
+def sandbox_admission():
+    """Hold one sandbox execution slot for the duration of the block."""
+    controller = get_admission_controller()
+    controller.acquire()
+    try:
+        yield
+    finally:
+        controller.release()
+
+
+def hold_admission_slot(owner):
+    """
+    Take a sandbox slot for as long as owner (a streaming response, say)
+    needs it. Returns release(), which is safe to call more than once. The
+    slot is also released when owner is garbage collected, so it can't
+    leak if owner is never iterated or closed.
+    """
+    controller = get_admission_controller()
+    controller.acquire()
+    return weakref.finalize(owner, controller.release)
+
+
+_rate_limited = 0
+_rate_limited_lock = threading.Lock()
+
+
+class SandboxRateThrottle(BaseThrottle):
+    """
+    Token bucket per user (or per client IP for anonymous requests), kept in
+    the default cache. It is shared by every web process only if that cache
+    is (Redis, memcached); the local-memory cache gives each process its own.
+
+    Each request spends one token; the bucket holds SANDBOX_RATE_BURST
+    tokens and refills at SANDBOX_RATE_PER_MINUTE. A bucket is read and
+    written under a lock taken with cache.add, which is atomic, so
+    concurrent requests can't both spend the same token.
+    """
+    cache_format = 'sandbox-rate:%s'
+    # How long a request waits for its bucket's lock before it is turned
+    # away, and how long a lock outlives a process that died holding it.
+    lock_wait = 0.5
+    lock_timeout = 2
+
+    def __init__(self):
+        self.capacity = getattr(settings, 'SANDBOX_RATE_BURST', 10)
+        self.refill_per_second = getattr(settings, 'SANDBOX_RATE_PER_MINUTE', 30) / 60
+        self._wait = None
+
+    def get_cache_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return self.cache_format % f"user:{request.user.pk}"
+        return self.cache_format % f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        global _rate_limited
+        if self.capacity <= 0 or self.refill_per_second <= 0:
+            return True
+
+        key = self.get_cache_key(request)
+        if not self._lock(key):
+            # Many requests from one client at once: that is a burst too.
+            self._wait = 1 / self.refill_per_second
+            with _rate_limited_lock:
+                _rate_limited += 1
+            return False
+        try:
+            now = time.time()
+            tokens, updated = cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            # Keep the bucket around until it would have refilled completely.
+            timeout = math.ceil(self.capacity / self.refill_per_second) + 1
+
+            if tokens < 1:
+                self._wait = (1 - tokens) / self.refill_per_second
+                cache.set(key, (tokens, now), timeout)
+                with _rate_limited_lock:
+                    _rate_limited += 1
+                return False
+
+            cache.set(key, (tokens - 1, now), timeout)
+            return True
+        finally:
+            cache.delete(f"{key}:lock")
+
+    def _lock(self, key):
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(f"{key}:lock", True, timeout=self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+def admission_stats():
+    return {
+        **get_admission_controller().stats(),
+        'rate_limited': _rate_limited,
+    }
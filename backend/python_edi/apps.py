@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PythonEdiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'python_edi'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,256 @@
+import builtins
+import hashlib
+import io
+import json
+import keyword
+import re
+import tokenize
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import minhash
+from .models import AssistanceAnswer, AssistanceAnswerBand
+from .verdict_cache import normalize_code
+
+EXACT_HITS_KEY = 'assistance-cache-stats:exact-hits'
+NEAR_HITS_KEY = 'assistance-cache-stats:near-hits'
+MISSES_KEY = 'assistance-cache-stats:misses'
+STORES_KEY = 'assistance-cache:stores'
+
+# Near-duplicate candidates checked per lookup.
+MAX_CANDIDATES = 50
+
+# Expired and least recently used answers are evicted once every this many
+# stores, not on each one, so the table can run up to this many answers over
+# AI_CACHE_MAX_ENTRIES in between.
+EVICT_EVERY = 100
+
+# Part of every band namespace. Bump it whenever code_shape(), _features() or
+# the namespace itself changes, so answers stored the old way are no longer
+# candidates (they age out after AI_CACHE_TTL).
+FEATURES_VERSION = 2
+
+# Minimum word overlap between two questions for an answer to one to be
+# reused for the other (on top of the error and code similarity).
+QUESTION_SIMILARITY = 0.5
+
+_BUILTIN_NAMES = set(dir(builtins))
+_EXCEPTION_RE = re.compile(r'\b([A-Z]\w*(?:Error|Exception|Exit|Interrupt))\b')
+_QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+_NUMBER_RE = re.compile(r'\d+')
+
+
+def _fold(text):
+    return ' '.join((text or '').split())
+
+
+def assistance_fingerprint(code, error_message, task_description, user_message):
+    """
+    Key for an assistance request: the task, the code (normalized like
+    verdicts), and the error and question with whitespace and case folded.
+    """
+    payload = json.dumps([
+        _fold(task_description),
+        normalize_code(code or ''),
+        _fold(error_message),
+        _fold(user_message).lower(),
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def code_shape(code):
+    """
+    Tokens of code with the student's own names and strings abstracted
+    away, so the same approach written with other variable names has the
+    same shape. Keywords, builtins, attribute names and numbers stay.
+    """
+    tokens = []
+    previous = None
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code or '').readline):
+            if token.type == tokenize.NAME:
+                keep = keyword.iskeyword(token.string) or token.string in _BUILTIN_NAMES or previous == '.'
+                tokens.append(token.string if keep else 'ID')
+            elif token.type == tokenize.STRING:
+                tokens.append('STR')
+            elif token.type in (tokenize.OP, tokenize.NUMBER):
+                tokens.append(token.string)
+            elif token.type in (tokenize.INDENT, tokenize.DEDENT):
+                tokens.append(tokenize.tok_name[token.type])
+            previous = token.string
+    except (tokenize.TokenError, SyntaxError):
+        return minhash.words(code)
+    return tokens
+
+
+def numeric_literals(code):
+    """
+    The numbers written in code, in order. Near-duplicates must match them
+    exactly: an off-by-one in range(len(items) - 1) needs different help
+    than one in range(len(items) - 2), though the shapes barely differ.
+    """
+    try:
+        return [
+            token.string for token in tokenize.generate_tokens(io.StringIO(code or '').readline)
+            if token.type == tokenize.NUMBER
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return _NUMBER_RE.findall(code or '')
+
+
+def error_signature(error_message):
+    """(exception type, words of the error's last line with names and numbers abstracted)."""
+    lines = [line for line in (error_message or '').splitlines() if line.strip()]
+    last = lines[-1] if lines else ''
+    types = _EXCEPTION_RE.findall(error_message or '')
+    last = _NUMBER_RE.sub('NUM', _QUOTED_RE.sub('STR', last))
+    return (types[-1] if types else ''), minhash.words(last)
+
+
+def _features(code, error_words):
+    return (
+        minhash.shingles(code_shape(code), size=4, prefix='c:')
+        | minhash.shingles(error_words, size=2, prefix='e:')
+    )
+
+
+def _band_namespace(task_key, error_type, code):
+    numbers = ','.join(numeric_literals(code))
+    return f"{task_key}|{error_type}|{numbers}|{FEATURES_VERSION}"
+
+
+def _question_overlap(first, second):
+    first, second = set(first.split()), set(second.split())
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _ttl():
+    return getattr(settings, 'AI_CACHE_TTL', 7 * 24 * 3600)
+
+
+def _count(key):
+    """Increment a cache counter; returns its new value, or None if it was lost."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return None
+
+
+def lookup_answer(code, error_message, task_description, user_message):
+    """
+    A cached answer for this request, or None. Tries the exact fingerprint
+    first and then, if AI_CACHE_NEAR_DUPLICATES is on, the most similar
+    earlier request on the same task with the same exception type.
+    """
+    if _ttl() <= 0:
+        return None
+    cutoff = timezone.now() - timedelta(seconds=_ttl())
+    fingerprint = assistance_fingerprint(code, error_message, task_description, user_message)
+    try:
+        answer = AssistanceAnswer.objects.filter(fingerprint=fingerprint, created_at__gte=cutoff).first()
+        counter = EXACT_HITS_KEY
+        if answer is None and getattr(settings, 'AI_CACHE_NEAR_DUPLICATES', True):
+            answer = _nearest(code, error_message, task_description, user_message, cutoff)
+            counter = NEAR_HITS_KEY
+        if answer is None:
+            _count(MISSES_KEY)
+            return None
+        AssistanceAnswer.objects.filter(pk=answer.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    except DatabaseError as e:
+        print(f"Error reading the assistance cache: {e}")
+        return None
+    _count(counter)
+    return answer.response
+
+
+def _nearest(code, error_message, task_description, user_message, cutoff):
+    task_key = hashlib.sha256(_fold(task_description).encode('utf-8')).hexdigest()
+    error_type, error_words = error_signature(error_message)
+    sig = minhash.signature(_features(code, error_words))
+    question = ' '.join(minhash.words(user_message))
+    threshold = getattr(settings, 'AI_CACHE_SIMILARITY', 0.85)
+
+    candidates = AssistanceAnswer.objects.filter(
+        id__in=AssistanceAnswerBand.objects.filter(
+            key__in=minhash.band_keys(sig, namespace=_band_namespace(task_key, error_type, code))
+        ).values('answer_id'),
+        task_key=task_key,
+        error_type=error_type,
+        created_at__gte=cutoff,
+    ).only('id', 'signature', 'question', 'response')[:MAX_CANDIDATES]
+
+    best, best_score = None, threshold
+    for candidate in candidates:
+        if len(candidate.signature) != minhash.NUM_PERM:
+            continue  # Signature dropped when the MinHash scheme changed.
+        if _question_overlap(question, candidate.question) < QUESTION_SIMILARITY:
+            continue
+        score = minhash.similarity(sig, candidate.signature)
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def store_answer(code, error_message, task_description, user_message, response):
+    """
+    Cache an API answer. Every EVICT_EVERY stores, expired entries are
+    dropped and the least recently used ones over the cap evicted.
+    """
+    if _ttl() <= 0:
+        return
+    fingerprint = assistance_fingerprint(code, error_message, task_description, user_message)
+    task_key = hashlib.sha256(_fold(task_description).encode('utf-8')).hexdigest()
+    error_type, error_words = error_signature(error_message)
+    sig = minhash.signature(_features(code, error_words))
+    try:
+        with transaction.atomic():
+            # An expired entry with the same fingerprint is replaced.
+            AssistanceAnswer.objects.filter(fingerprint=fingerprint).delete()
+            answer = AssistanceAnswer.objects.create(
+                fingerprint=fingerprint,
+                task_key=task_key,
+                error_type=error_type[:100],
+                question=' '.join(minhash.words(user_message)),
+                signature=sig,
+                response=response,
+            )
+            AssistanceAnswerBand.objects.bulk_create([
+                AssistanceAnswerBand(answer=answer, key=key)
+                for key in minhash.band_keys(sig, namespace=_band_namespace(task_key, error_type, code))
+            ])
+        if (_count(STORES_KEY) or 0) % EVICT_EVERY == 0:
+            _evict()
+    except IntegrityError:
+        pass  # Another process stored the same answer first.
+    except DatabaseError as e:
+        print(f"Error writing the assistance cache: {e}")
+
+
+def _evict():
+    AssistanceAnswer.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=_ttl())).delete()
+    excess = AssistanceAnswer.objects.count() - getattr(settings, 'AI_CACHE_MAX_ENTRIES', 10000)
+    if excess > 0:
+        stale = list(AssistanceAnswer.objects.order_by('last_used_at').values_list('id', flat=True)[:excess])
+        AssistanceAnswer.objects.filter(id__in=stale).delete()
+
+
+def assistance_cache_stats():
+    exact = cache.get(EXACT_HITS_KEY, 0)
+    near = cache.get(NEAR_HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = exact + near + misses
+    return {
+        'exact_hits': exact,
+        'near_hits': near,
+        'misses': misses,
+        'hit_rate': round((exact + near) / total, 4) if total else None,
+        'entries': AssistanceAnswer.objects.count(),
+    }
@@ -0,0 +1,98 @@
+import ast
+import traceback
+from collections import namedtuple
+from functools import lru_cache
+
+# Must match harness.STUDENT_FILENAME so errors read the same either way.
+STUDENT_FILENAME = '<student>'
+
+# Functions the driver will call for the student, in order of preference.
+ENTRY_POINTS = ('main', 'solution')
+
+PreparedCode = namedtuple('PreparedCode', ['error', 'entry', 'entry_arity'])
+PreparedCode.__doc__ = """
+Result of preparing student code for the sandbox.
+
+error        formatted SyntaxError, or None if the code compiles
+entry        name of the function the driver calls per input, or None to run
+             the whole module as a script per input
+entry_arity  0 if the entry takes no arguments (it reads stdin itself),
+             otherwise 1: it is called with the input string
+"""
+
+
+def _is_main_guard(node):
+    """True for `if __name__ == '__main__':` blocks."""
+    test = node.test if isinstance(node, ast.If) else None
+    return (
+        isinstance(test, ast.Compare)
+        and isinstance(test.left, ast.Name) and test.left.id == '__name__'
+        and len(test.comparators) == 1
+        and isinstance(test.comparators[0], ast.Constant)
+        and test.comparators[0].value == '__main__'
+    )
+
+
+def _calls_at_top_level(tree, name):
+    """True if module-level code (outside defs and the __main__ guard) calls name()."""
+    for statement in tree.body:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if _is_main_guard(statement):
+            continue
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == name:
+                return True
+    return False
+
+
+def _find_entry(tree):
+    functions = {
+        node.name: node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    for name in ENTRY_POINTS:
+        node = functions.get(name)
+        if node is None or isinstance(node, ast.AsyncFunctionDef):
+            continue
+        # Code that already calls its own entry point is run as written.
+        if _calls_at_top_level(tree, name):
+            return None, 0
+        args = node.args
+        takes_input = bool(args.posonlyargs or args.args or args.vararg)
+        return name, 1 if takes_input else 0
+    return None, 0
+
+
+@lru_cache(maxsize=1024)
+def parse_code(code):
+    """
+    Parse and compile student code. Returns (tree, None), or (None, exc)
+    for code that doesn't compile. Memoized, so the preparation and the
+    pre-flight checks share one parse; callers must not modify the tree.
+    """
+    try:
+        tree = ast.parse(code, filename=STUDENT_FILENAME)
+        compile(tree, STUDENT_FILENAME, 'exec')
+    except (SyntaxError, ValueError) as exc:
+        return None, exc
+    return tree, None
+
+
+def format_compile_error(exc):
+    return ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+
+
+@lru_cache(maxsize=1024)
+def prepare_code(code):
+    """
+    Decide how the harness drives the student code.
+
+    Memoized on the code itself, so resubmissions skip the work. Syntax
+    errors are reported here, before any process is spawned.
+    """
+    tree, exc = parse_code(code)
+    if exc is not None:
+        return PreparedCode(format_compile_error(exc), None, 0)
+    entry, entry_arity = _find_entry(tree)
+    return PreparedCode(None, entry, entry_arity)
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import GradingJob, Submission
+from .performance import performance_report, stress_plan
+from .preflight import format_diagnostics, preflight, task_rules
+from .sandbox import run_test_cases, run_test_cases_parallel
+from .submission_buffer import get_submission_buffer
+from .verdict_cache import cache_verdict, get_cached_verdict, verdict_key
+
+# How many times a job is handed to a worker before it is marked failed.
+MAX_ATTEMPTS = 3
+
+
+def grade_submission(code, test_cases, task_id=None, parallel=False, fail_fast=False,
+                     stress_inputs=None, preflight_rules=None):
+    """
+    Grade code against test cases given as {'input', 'expectedOutput'} dicts.
+    Returns the response body used by submit_solution.
+
+    parallel spreads the cases over several sandboxed interpreters; fail_fast
+    stops at the first failing case and reports the rest as skipped.
+    Byte-identical resubmissions (after normalizing whitespace) against the
+    same test cases are answered from the verdict cache.
+
+    With a task's stress_inputs, a solution that passes also gets a
+    'performance' report (timings are never cached).
+
+    Code that fails the static pre-flight checks (with the task's
+    preflight_rules) is rejected with its 'diagnostics' and never run.
+    """
+    diagnostics = preflight(code, preflight_rules)
+    if diagnostics:
+        return _rejected(test_cases, diagnostics)
+    result = _grade(code, test_cases, task_id, parallel, fail_fast)
+    if result['success'] and stress_plan(stress_inputs) is not None:
+        result = {**result, 'performance': performance_report(code, stress_inputs)}
+    return result
+
+
+def _grade(code, test_cases, task_id, parallel, fail_fast):
+    kind = 'grade-fail-fast' if fail_fast else 'grade'
+    key = verdict_key(kind, code, test_cases=test_cases, task_id=task_id)
+    cached = get_cached_verdict(key)
+    if cached is not None:
+        return {**cached, 'cached': True}
+
+    for test_case in test_cases:
+        if test_case.get('input', None) is None:
+            print("Test input is None")
+
+        if test_case.get('expectedOutput', None) is None:
+            print("Expected output is None")
+
+    inputs = [test_case.get('input') or '' for test_case in test_cases]
+    expected = [test_case.get('expectedOutput') for test_case in test_cases]
+    if parallel:
+        cases = run_test_cases_parallel(code, inputs, expected=expected, fail_fast=fail_fast)
+    else:
+        # Load the student's module once in a single sandboxed interpreter and
+        # call main() for every test input, instead of one process per case.
+        cases = run_test_cases(code, inputs, expected=expected, fail_fast=fail_fast)
+
+    all_passed = True
+    test_results = []
+
+    for i, (test_case, case) in enumerate(zip(test_cases, cases)):
+        test_input = test_case.get('input', None)
+        expected_output = test_case.get('expectedOutput', None)
+        actual_output = case['output']
+        is_correct = actual_output == expected_output
+
+        if not is_correct:
+            all_passed = False
+
+        test_results.append({
+            "test_case_index": i,
+            "input": test_input,
+            "expected_output": expected_output,
+            "actual_output": actual_output,
+            "passed": is_correct,
+            "skipped": case['skipped'],
+            "error": case['error'],
+            "time_ms": case['time_ms'],
+            "cpu_ms": case['cpu_ms'],
+            "peak_rss_kb": case['peak_rss_kb']
+        })
+
+    result = {
+        'success': all_passed,
+        'results': test_results,
+        'skipped': [case['index'] for case in cases if case['skipped']],
+        'message': 'All test cases passed!' if all_passed else 'One or more test cases failed'
+    }
+    # A timeout may just mean the host was busy; don't pin it in the cache.
+    if not any(case['timed_out'] for case in cases):
+        cache_verdict(key, result)
+    return result
+
+
+def _rejected(test_cases, diagnostics):
+    error = format_diagnostics(diagnostics)
+    return {
+        'success': False,
+        'results': [
+            {
+                "test_case_index": i,
+                "input": test_case.get('input', None),
+                "expected_output": test_case.get('expectedOutput', None),
+                "actual_output": '',
+                "passed": False,
+                "skipped": False,
+                "error": error,
+                "time_ms": 0.0,
+                "cpu_ms": 0.0,
+                "peak_rss_kb": None
+            }
+            for i, test_case in enumerate(test_cases)
+        ],
+        'skipped': [],
+        'diagnostics': diagnostics,
+        'message': 'Your code was rejected before running it'
+    }
+
+
+def grading_cases(test_cases):
+    """
+    Stored PythonTask.test_cases ({'input', 'expected_output'}) in the
+    {'input', 'expectedOutput'} form grade_submission takes.
+    """
+    return [
+        {
+            'input': test_case.get('input'),
+            'expectedOutput': test_case.get('expectedOutput', test_case.get('expected_output'))
+        }
+        for test_case in test_cases
+    ]
+
+
+def test_cases_fingerprint(test_cases):
+    """Order-sensitive hash of test cases, in either key style."""
+    pairs = [[test_case['input'], test_case['expectedOutput']] for test_case in grading_cases(test_cases)]
+    return hashlib.sha256(json.dumps(pairs).encode('utf-8')).hexdigest()
+
+
+def record_submission(user, task, code, result, test_cases):
+    """
+    Queue a graded submission for the user's history. Anonymous users and
+    ad-hoc tasks that aren't in the database are not recorded. The stored
+    hash is of test_cases, the cases the code was actually graded against,
+    so regrade treats a verdict on any other cases as stale.
+    """
+    if user is None or task is None:
+        return
+    errors = [case['error'] for case in result['results'] if case.get('error')]
+    get_submission_buffer().add(Submission(
+        user=user,
+        task=task,
+        code=code,
+        is_successful=result['success'],
+        error_message=errors[0] if errors else None,
+        output=json.dumps(result['results']),
+        test_cases_hash=test_cases_fingerprint(test_cases)
+    ))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_grading(code, test_cases, user=None, task=None, options=None):
+    """Queue a submission for a grade_worker and return the job."""
+    return GradingJob.objects.create(
+        user=user,
+        task=task,
+        code=code,
+        test_cases=test_cases,
+        options=options or {}
+    )
+
+
+def claim_next_job(worker=None):
+    """
+    Atomically claim the oldest queued job, or return None if there is none.
+
+    SKIP LOCKED lets concurrent workers each grab a different row instead of
+    queueing up behind the first worker's lock. The row lock is only held
+    for the claim itself, not while the job runs.
+    """
+    with transaction.atomic():
+        job = (
+            GradingJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=GradingJob.STATUS_QUEUED)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = GradingJob.STATUS_RUNNING
+        job.attempts += 1
+        job.worker = worker or worker_name()
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'worker', 'started_at'])
+    return job
+
+
+def run_grading_job(job):
+    """Grade a claimed job and store its result."""
+    try:
+        job.result = grade_submission(
+            job.code,
+            job.test_cases,
+            task_id=job.task_id,
+            parallel=job.options.get('parallel', False),
+            fail_fast=job.options.get('fail_fast', False),
+            stress_inputs=job.task.stress_inputs if job.task and job.options.get('performance') else None,
+            preflight_rules=task_rules(job.task)
+        )
+        job.status = GradingJob.STATUS_DONE
+        job.error_message = None
+        record_submission(job.user, job.task, job.code, job.result, job.test_cases)
+    except Exception as e:
+        import traceback
+        print(f"Error grading job {job.pk}: {str(e)}")
+        print(traceback.format_exc())
+        job.error_message = str(e)
+        job.status = GradingJob.STATUS_FAILED if job.attempts >= MAX_ATTEMPTS else GradingJob.STATUS_QUEUED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'status', 'error_message', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(older_than_seconds):
+    """
+    Put jobs that have been running for longer than older_than_seconds back
+    in the queue (their worker most likely died), or mark them failed once
+    they have used up MAX_ATTEMPTS. Returns (requeued, failed) counts.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    stale = GradingJob.objects.filter(status=GradingJob.STATUS_RUNNING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=GradingJob.STATUS_FAILED,
+        error_message="Worker did not finish the job",
+        finished_at=timezone.now()
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status=GradingJob.STATUS_QUEUED)
+    return requeued, failed
+
+
+def requeue_jobs(queryset):
+    """Send the given jobs back to the queue regardless of their state."""
+    return queryset.update(
+        status=GradingJob.STATUS_QUEUED,
+        attempts=0,
+        error_message=None,
+        finished_at=None
+    )
@@ -0,0 +1,670 @@
+"""
+Grading harness executed inside the sandboxed child interpreter.
+
+The parent writes a JSON job to stdin:
+
+    {"code": "...", "inputs": ["5, 7", "10, 20"], "case_timeout": 3}
+
+and reads back one JSON frame per line on the original stdout:
+
+    {"type": "case", "index": 0, "output": "12", "error": null, "timed_out": false,
+     "time_ms": 0.41, "cpu_ms": 0.38, "peak_rss_kb": 9216}
+    {"type": "done", "exit_code": 0}
+
+The student code reaches the harness in one of two ways. By default it is
+sent inline as the job's "code", so it never touches the disk. With the
+temp-file fallback (SANDBOX_CODE_DELIVERY = "tempfile") the job carries
+"code_path" instead and the harness reads the file.
+
+Results come back in one of two ways as well. Normally each case's output
+is collected and sent in its case frame. A job with "stream" instead sends
+stdout/stderr as they are written, as {"type": "chunk", "stream": "stdout",
+"data": "..."} frames ahead of each case frame (whose "output" is then
+empty).
+
+Run without arguments, the harness grades a single job and exits.
+
+With --serve it is a warm pool worker: stdlib modules students commonly use
+are imported up front, then jobs are read one per line, so every job starts
+from the same clean, pre-imported state.
+
+With --kernel it is an interactive session: snippets ({"code", "input",
+"case_timeout", "limits"}) are read one per line and all run in one
+persistent namespace, see kernel().
+
+In every mode the student code runs in a forked child that has closed the
+job and result channels. The supervising process only relays the child's
+frames, checked field by field, and writes the "done" frames itself, so
+student code can neither forge a result nor read the next job. The
+expected outputs never come here: the parent checks each case frame and,
+to stop a job early (fail-fast grading), sends SIGUSR1, on which the
+supervisor kills the child and reports the job done (see _stop_job).
+
+The student module is compiled once. When the job names an "entry" function
+(chosen by code_prep.prepare_code) the module is loaded once and the entry is
+called for every input, with the input as its argument if "entry_arity" is
+1; its return value is printed unless it is None. Without an entry the whole
+module is re-executed per input, exactly like a fresh script run. A job with
+"generator" (source defining generate(n)) treats "inputs" as sizes and
+builds each case's input in the harness.
+
+"limits" caps the job process with rlimits (cpu_seconds per case,
+memory_mb of address space, file_size_mb, processes) and truncates each
+case's output after max_output bytes (UTF-8).
+
+This file must not import Django or anything from the project: it runs with
+`python -I` so the project directory is not on sys.path.
+"""
+import ast
+import io
+import json
+import math
+import os
+import signal
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STUDENT_FILENAME = '<student>'
+TRUNCATION_MARKER = "\n... [output truncated]"
+
+# Largest partial line a streaming job holds back before sending it.
+STREAM_CHUNK = 4096
+
+# Imported once by --serve workers so forked jobs don't pay for them.
+PRELOAD_MODULES = (
+    'bisect', 'collections', 'datetime', 'decimal', 'fractions', 'functools',
+    'heapq', 'itertools', 'math', 'random', 're', 'statistics', 'string',
+)
+
+
+class CaseTimeout(BaseException):
+    """Raised inside student code when a single case exceeds its time budget."""
+
+
+class CpuLimitExceeded(BaseException):
+    """Raised inside student code when a case uses up its CPU seconds."""
+
+
+def _on_alarm(signum, frame):
+    raise CaseTimeout()
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _format_error(exc):
+    """Format an exception showing only the student's own frames."""
+    frames = [
+        frame for frame in traceback.extract_tb(exc.__traceback__)
+        if frame.filename == STUDENT_FILENAME
+    ]
+    lines = traceback.format_list(frames) + traceback.format_exception_only(type(exc), exc)
+    return ''.join(lines).strip()
+
+
+class _CappedOutput(io.StringIO):
+    """
+    A stdout/stderr buffer that stops growing after limit bytes, counted as
+    UTF-8 like the frames that carry the output.
+    """
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+
+    def write(self, text):
+        if self.truncated:
+            return len(text)
+        size = len(text.encode('utf-8', 'surrogatepass'))
+        if self.limit and self.size + size > self.limit:
+            head = text.encode('utf-8', 'surrogatepass')[:self.limit - self.size]
+            # Drop a character the cut split in half.
+            super().write(head.decode('utf-8', 'ignore'))
+            self.size = self.limit
+            self.truncated = True
+            return len(text)
+        self.size += size
+        super().write(text)
+        return len(text)
+
+    def text(self):
+        value = self.getvalue()
+        return value + TRUNCATION_MARKER if self.truncated else value
+
+
+class _StreamingOutput(_CappedOutput):
+    """
+    A capped buffer that forwards what is written as "chunk" frames instead
+    of keeping it: every completed line right away, partial lines once
+    STREAM_CHUNK bytes are pending or at the end of the case.
+    """
+
+    def __init__(self, limit, emit, stream):
+        super().__init__(limit)
+        self.emit = emit
+        self.stream = stream
+        self._sent = 0
+        self._marked = False
+
+    def write(self, text):
+        written = super().write(text)
+        pending = self.size - self._sent
+        if self.truncated or pending >= STREAM_CHUNK or '\n' in text:
+            self.flush()
+        return written
+
+    def flush(self):
+        data = self.getvalue()
+        if data:
+            self.seek(0)
+            self.truncate()
+            self._sent += len(data.encode('utf-8', 'surrogatepass'))
+            self.emit({'type': 'chunk', 'stream': self.stream, 'data': data})
+
+    def text(self):
+        self.flush()
+        if self.truncated and not self._marked:
+            self._marked = True
+            self.emit({'type': 'chunk', 'stream': self.stream, 'data': TRUNCATION_MARKER})
+        # Everything was already streamed.
+        return ''
+
+
+def _usage():
+    """(cpu_seconds, peak_rss_kb) of this process so far."""
+    if resource is None:
+        return time.process_time(), None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return usage.ru_utime + usage.ru_stime, peak
+
+
+def _set_limit(kind, soft, hard=None):
+    try:
+        resource.setrlimit(kind, (soft, soft if hard is None else hard))
+    except (ValueError, OSError):
+        # Not permitted or not supported here; the other limits still apply.
+        pass
+
+
+def _apply_limits(limits, case_count):
+    """
+    Apply job-wide rlimits to this (job) process. CPU gets a hard limit for
+    the whole job here, or none when case_count is None (a kernel runs an
+    open-ended number of snippets); _execute sets the soft limit per case.
+    """
+    if resource is None or not limits:
+        return
+    if limits.get('memory_mb'):
+        _set_limit(resource.RLIMIT_AS, limits['memory_mb'] * 1024 * 1024)
+    if limits.get('file_size_mb') is not None:
+        signal.signal(signal.SIGXFSZ, signal.SIG_IGN)  # writes fail with EFBIG instead
+        _set_limit(resource.RLIMIT_FSIZE, int(limits['file_size_mb'] * 1024 * 1024))
+    if limits.get('processes') is not None and hasattr(resource, 'RLIMIT_NPROC'):
+        _set_limit(resource.RLIMIT_NPROC, limits['processes'])
+    if limits.get('cpu_seconds'):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        if case_count is None:
+            return
+        used, _ = _usage()
+        hard = math.ceil(used + limits['cpu_seconds'] * (case_count + 1)) + 1
+        _set_limit(resource.RLIMIT_CPU, hard)
+
+
+def _execute(func, test_input, case_timeout, limits, emit=None):
+    """
+    Run func() with stdin/stdout/stderr swapped for in-memory buffers.
+    Returns (stdout_text, error_text_or_None, timed_out, cpu_ms, peak_rss_kb).
+
+    With emit, stdout and stderr are streamed as "chunk" frames while func
+    runs and stdout_text comes back empty.
+    """
+    limits = limits or {}
+    if emit is not None:
+        stdout = _StreamingOutput(limits.get('max_output'), emit, 'stdout')
+        stderr = _StreamingOutput(limits.get('max_output'), emit, 'stderr')
+    else:
+        stdout = _CappedOutput(limits.get('max_output'))
+        # stderr isn't returned, but is capped so it can't flood the server log.
+        stderr = _CappedOutput(limits.get('max_output'))
+    sys.stdin = io.StringIO(f"{test_input}\n" if test_input else "")
+    sys.stdout = stdout
+    sys.stderr = stderr
+    error = None
+    timed_out = False
+    cpu_before, _ = _usage()
+    if resource is not None and limits.get('cpu_seconds'):
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        # RLIMIT_CPU has one-second granularity; round to the nearest second.
+        soft = max(1, round(cpu_before + limits['cpu_seconds']))
+        _set_limit(resource.RLIMIT_CPU, min(soft, hard) if hard != resource.RLIM_INFINITY else soft, hard)
+    if case_timeout:
+        signal.setitimer(signal.ITIMER_REAL, case_timeout)
+    try:
+        func()
+    except CaseTimeout:
+        timed_out = True
+        error = f"Code execution timed out after {case_timeout} seconds"
+    except CpuLimitExceeded:
+        timed_out = True
+        error = f"CPU time limit of {limits.get('cpu_seconds')} seconds exceeded"
+    except MemoryError:
+        error = f"MemoryError: memory limit of {limits.get('memory_mb')} MB exceeded"
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            error = f"SystemExit: {exc.code}"
+    except BaseException as exc:
+        error = _format_error(exc)
+    finally:
+        if case_timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdin = sys.__stdin__
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+    cpu_after, peak_rss_kb = _usage()
+    stderr.text()
+    return stdout.text(), error, timed_out, round(max(0.0, cpu_after - cpu_before) * 1000, 3), peak_rss_kb
+
+
+def _job_code(job):
+    """The student code, sent inline or (the temp-file fallback) by path."""
+    if job.get('code_path'):
+        with open(job['code_path'], encoding='utf-8') as code_file:
+            return code_file.read()
+    return job.get('code', '')
+
+
+def _compile_cases(job, emit=None):
+    """
+    Compile the student code and return run_case(test_input), which yields
+    a dict with output, error, timed_out, time_ms, cpu_ms and peak_rss_kb.
+    For a job with "stream", output is streamed through emit instead.
+    """
+    code = _job_code(job)
+    case_timeout = job.get('case_timeout')
+    limits = job.get('limits')
+    entry = job.get('entry')
+    stream = emit if job.get('stream') else None
+
+    def measure(func, test_input, prefix=''):
+        started = time.perf_counter()
+        output, error, timed_out, cpu_ms, peak_rss_kb = _execute(func, test_input, case_timeout, limits, stream)
+        return {
+            'output': (prefix + output).strip(), 'error': error, 'timed_out': timed_out,
+            'time_ms': round((time.perf_counter() - started) * 1000, 3),
+            'cpu_ms': cpu_ms, 'peak_rss_kb': peak_rss_kb,
+        }
+
+    def failed(output, error, timed_out):
+        return lambda test_input: {
+            'output': output, 'error': error, 'timed_out': timed_out,
+            'time_ms': 0.0, 'cpu_ms': 0.0, 'peak_rss_kb': _usage()[1],
+        }
+
+    try:
+        compiled = compile(code, STUDENT_FILENAME, 'exec')
+    except (SyntaxError, ValueError) as exc:
+        return failed('', _format_error(exc), False)
+
+    if entry is None:
+        def run_script(test_input):
+            namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+            return measure(lambda: exec(compiled, namespace), test_input)
+        return run_script
+
+    # Load the module once; anything it prints at import time is part of
+    # every case's output, as it would be with one process per case.
+    namespace = {'__name__': '__student__', '__builtins__': __builtins__}
+    load_output, load_error, load_timed_out, _, _ = _execute(
+        lambda: exec(compiled, namespace), '', case_timeout, limits, stream
+    )
+    func = namespace.get(entry)
+    if load_error or not callable(func):
+        return failed(load_output.strip(), load_error or f"{entry} is not callable", load_timed_out)
+    args_for = (lambda test_input: (test_input,)) if job.get('entry_arity', 1) else (lambda test_input: ())
+
+    def run_entry(test_input):
+        def call_entry():
+            result = func(*args_for(test_input))
+            if result is not None:
+                print(result)
+
+        return measure(call_entry, test_input, prefix=load_output)
+    return run_entry
+
+
+def _generate_inputs(source, sizes):
+    """
+    Build stress inputs by calling the task's generate(n) for every size.
+    Lists and tuples are joined with commas, like hand-written test inputs.
+    """
+    namespace = {'__name__': '__generator__', '__builtins__': __builtins__}
+    exec(compile(source, '<generator>', 'exec'), namespace)
+    generate = namespace['generate']
+    inputs = []
+    for size in sizes:
+        value = generate(size)
+        if isinstance(value, (list, tuple)):
+            value = ','.join(map(str, value))
+        inputs.append(str(value))
+    return inputs
+
+
+def run_job(job, emit):
+    """
+    Run job['code'] against job['inputs'], calling emit(frame) per case.
+
+    With job['generator'] the inputs are sizes, and the case inputs are built
+    here by the generator (so large stress inputs never cross the pipe).
+    """
+    inputs = job.get('inputs', [])
+    _apply_limits(job.get('limits'), len(inputs))
+    if job.get('generator'):
+        try:
+            inputs = _generate_inputs(job['generator'], inputs)
+        except BaseException as exc:
+            error = f"Stress input generator failed: {type(exc).__name__}: {exc}"
+            for index in range(len(inputs)):
+                emit({'type': 'case', 'index': index, 'output': '', 'error': error, 'timed_out': False})
+            return
+    run_case = _compile_cases(job, emit)
+
+    for index, test_input in enumerate(inputs):
+        emit({'type': 'case', 'index': index, **run_case(test_input)})
+
+
+def _open_channels():
+    """
+    Keep private handles on the real stdin/stdout for jobs and frames and
+    point fds 0/1/2 at /dev/null, so output written to the raw descriptors
+    goes nowhere instead of into the result channel or the server's log.
+    Returns (jobs, channel). Only the supervising process uses them: student
+    code runs in a forked child that closes both first (see _fork_child).
+    """
+    jobs = os.fdopen(os.dup(0), 'r', encoding='utf-8')
+    channel = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, _stop_job)
+    return jobs, channel
+
+
+# Pid of the job child _supervise is relaying, if any.
+_running = None
+
+
+def _stop_job(signum, frame):
+    """
+    SIGUSR1 from the parent: kill the running job's child, e.g. once a case
+    has failed a fail-fast grading. The supervisor then reports the job done
+    as usual; a signal arriving between jobs is ignored.
+    """
+    if _running is not None:
+        os.kill(_running, signal.SIGKILL)
+
+
+def _frame_writer(stream):
+    """emit(frame) writing one JSON frame per line to stream."""
+    def emit(frame):
+        stream.write(json.dumps(frame) + "\n")
+        stream.flush()
+
+    return emit
+
+
+# Case frame fields a child may report, with their accepted types.
+CASE_FIELDS = {
+    'output': str, 'error': (str, type(None)), 'timed_out': bool,
+    'time_ms': (int, float), 'cpu_ms': (int, float), 'peak_rss_kb': (int, type(None)),
+}
+
+
+def _checked_frame(frame, index):
+    """
+    A copy of frame with only its known fields if it is a chunk frame or
+    the case frame for index; None for anything else, "done" frames included.
+    """
+    if not isinstance(frame, dict):
+        return None
+    if frame.get('type') == 'chunk':
+        if frame.get('stream') in ('stdout', 'stderr') and isinstance(frame.get('data'), str):
+            return {'type': 'chunk', 'stream': frame['stream'], 'data': frame['data']}
+        return None
+    if frame.get('type') != 'case' or type(frame.get('index')) is not int or frame['index'] != index:
+        return None
+    checked = {'type': 'case', 'index': index}
+    for key, kind in CASE_FIELDS.items():
+        if key in frame:
+            if not isinstance(frame[key], kind):
+                return None
+            checked[key] = frame[key]
+    return checked
+
+
+def _line_limit(limits, case_count):
+    """
+    Longest frame line the supervisor reads from a child: the parent's output
+    budget for the whole job (sandbox.job_output_budget), or no limit.
+    """
+    max_output = (limits or {}).get('max_output')
+    return (case_count + 1) * (max_output * 6 + 4096) if max_output else -1
+
+
+def _fork_child(run, channels):
+    """
+    Fork a child that calls run(emit), its frames going through a fresh
+    pipe instead of the result channel. The child closes its copies of the
+    supervisor's channels before anything else, so the student code it runs
+    can neither read other jobs nor write frames the parent would trust.
+    Returns (pid, frames), frames being the read end of the pipe.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.close(read_fd)
+            for stream in channels:
+                stream.close()
+            with os.fdopen(write_fd, 'w', encoding='utf-8') as frames:
+                run(_frame_writer(frames))
+            exit_code = 0
+        except BaseException:
+            pass  # Surfaces in the supervisor as the non-zero exit code.
+        finally:
+            os._exit(exit_code)
+    os.close(write_fd)
+    return pid, os.fdopen(read_fd, 'r', encoding='utf-8', errors='replace')
+
+
+def _relay_cases(frames, pid, case_count, emit, line_limit):
+    """
+    Pass a child's frames on to emit until it has reported case_count cases.
+    Only chunk frames and the case frames expected next get through, rebuilt
+    from their known fields; the child is killed at the first frame that
+    isn't one of those. Returns whether every case was reported.
+    """
+    index = 0
+    while index < case_count:
+        line = frames.readline(line_limit)
+        if not line:
+            return False
+        try:
+            frame = _checked_frame(json.loads(line), index) if line.endswith('\n') else None
+        except ValueError:
+            frame = None
+        if frame is None:
+            os.kill(pid, signal.SIGKILL)
+            return False
+        emit(frame)
+        if frame['type'] == 'case':
+            index += 1
+    return True
+
+
+def _supervise(job, channels, emit):
+    """Run job in a forked child, relaying its frames. Returns the child's exit code."""
+    global _running
+    case_count = len(job.get('inputs', []))
+    pid, frames = _fork_child(lambda child_emit: run_job(job, child_emit), channels)
+    _running = pid
+    try:
+        with frames:
+            _relay_cases(frames, pid, case_count, emit, _line_limit(job.get('limits'), case_count))
+    finally:
+        # Cleared before the child is reaped, so its pid is never signalled once reused.
+        _running = None
+    _, wait_status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(wait_status)
+
+
+def serve():
+    """
+    Warm worker loop: one JSON job per line, each run in a forked child, so
+    every job starts from the same clean, pre-imported state. This process
+    only supervises: it relays the child's frames and writes the "done" frame.
+    """
+    for name in PRELOAD_MODULES:
+        __import__(name)
+    jobs, channel = _open_channels()
+    emit = _frame_writer(channel)
+
+    for line in jobs:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if not hasattr(os, 'fork'):
+            run_job(job, emit)
+            emit({'type': 'done', 'exit_code': 0})
+            continue
+        emit({'type': 'done', 'exit_code': _supervise(job, (jobs, channel), emit)})
+
+
+def _compile_snippet(code):
+    """
+    Compile a kernel snippet like the interactive interpreter does: when it
+    ends in an expression, that expression's repr is echoed unless None.
+    """
+    tree = ast.parse(code, filename=STUDENT_FILENAME)
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    body = compile(tree, STUDENT_FILENAME, 'exec')
+    echo = compile(last, STUDENT_FILENAME, 'eval') if last is not None else None
+    return body, echo
+
+
+def _run_snippet(job, namespace, emit):
+    """Run one kernel snippet in namespace and emit its case frame."""
+    limits = job.get('limits')
+    # Limits are only ever lowered to the same values, so re-applying is harmless.
+    _apply_limits(limits, None)
+    try:
+        body, echo = _compile_snippet(job.get('code', ''))
+    except (SyntaxError, ValueError) as exc:
+        emit({'type': 'case', 'index': 0, 'output': '', 'error': _format_error(exc),
+              'timed_out': False, 'time_ms': 0.0, 'cpu_ms': 0.0, 'peak_rss_kb': _usage()[1]})
+        return
+
+    def run_snippet():
+        exec(body, namespace)
+        if echo is not None:
+            value = eval(echo, namespace)
+            if value is not None:
+                print(repr(value))
+
+    started = time.perf_counter()
+    output, error, timed_out, cpu_ms, peak_rss_kb = _execute(
+        run_snippet, job.get('input', ''), job.get('case_timeout'), limits
+    )
+    emit({
+        'type': 'case', 'index': 0, 'output': output.rstrip('\n'), 'error': error,
+        'timed_out': timed_out, 'time_ms': round((time.perf_counter() - started) * 1000, 3),
+        'cpu_ms': cpu_ms, 'peak_rss_kb': peak_rss_kb,
+    })
+
+
+def kernel():
+    """
+    Interactive kernel: one snippet per line, all run in the same namespace
+    so variables, imports and definitions persist between runs. Each snippet
+    is answered with a "case" frame followed by a "done" frame.
+
+    The namespace lives in one forked child, fed snippets through a pipe;
+    this process relays its case frames and writes the "done" frames. When
+    the child dies (or sends anything but its case frame) the kernel exits.
+    """
+    for name in PRELOAD_MODULES:
+        __import__(name)
+    jobs, channel = _open_channels()
+    emit = _frame_writer(channel)
+    if not hasattr(os, 'fork'):
+        namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+        for line in jobs:
+            if line.strip():
+                _run_snippet(json.loads(line), namespace, emit)
+                emit({'type': 'done', 'exit_code': 0})
+        return
+
+    snippet_read, snippet_write = os.pipe()
+
+    def run_kernel(child_emit):
+        os.close(snippet_write)
+        namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+        with os.fdopen(snippet_read, 'r', encoding='utf-8') as snippets:
+            for snippet in snippets:
+                _run_snippet(json.loads(snippet), namespace, child_emit)
+
+    pid, frames = _fork_child(run_kernel, (jobs, channel))
+    os.close(snippet_read)
+    snippets = os.fdopen(snippet_write, 'w', encoding='utf-8')
+    for line in jobs:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        try:
+            snippets.write(json.dumps(job) + "\n")
+            snippets.flush()
+        except BrokenPipeError:
+            break
+        if not _relay_cases(frames, pid, 1, emit, _line_limit(job.get('limits'), 1)):
+            break
+        emit({'type': 'done', 'exit_code': 0})
+    os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+
+
+def main():
+    if '--serve' in sys.argv[1:]:
+        serve()
+        return
+    if '--kernel' in sys.argv[1:]:
+        kernel()
+        return
+
+    jobs, channel = _open_channels()
+    emit = _frame_writer(channel)
+    job = json.loads(jobs.read() or '{}')
+    if not hasattr(os, 'fork'):
+        run_job(job, emit)
+        emit({'type': 'done', 'exit_code': 0})
+        return
+    emit({'type': 'done', 'exit_code': _supervise(job, (jobs, channel), emit)})
+
+
+if __name__ == '__main__':
+    main()
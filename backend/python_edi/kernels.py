@@ -0,0 +1,270 @@
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .admission import SandboxBusy, get_admission_controller
+from .sandbox import (
+    CASE_TIMEOUT, WorkerAborted, WorkerOutputLimit, WorkerTimeout, job_output_budget,
+    kill_harness, read_frames, sandbox_limits, spawn_harness,
+)
+
+
+class KernelNotFound(Exception):
+    """No live kernel with that session id (or execution) belongs to the caller."""
+
+
+class Kernel:
+    """
+    One long-lived harness interpreter (`harness.py --kernel`) holding the
+    state of an editor session. Snippets run one at a time; a snippet that
+    overruns its deadline, floods the output or crashes the kernel kills it,
+    and the session has to start over.
+
+    execute() runs a snippet and returns its result. start() runs it on a
+    background thread instead and returns its execution number, whose
+    result wait_for() long-polls; the last results_kept results are kept.
+    """
+    results_kept = 16
+
+    def __init__(self, session_id, owner, memory_mb):
+        self.session_id = session_id
+        self.owner = owner
+        self.limits = {**sandbox_limits(), 'memory_mb': memory_mb}
+        self.process = spawn_harness(kernel=True)
+        self.lock = threading.Lock()
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.executions = 0
+        self.running = None
+        self._results = {}
+        self._finished = threading.Condition()
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def execute(self, code, stdin='', case_timeout=CASE_TIMEOUT, wait=None):
+        """
+        Run a snippet in the kernel's namespace and return its case dict
+        (output, error, timed_out, time_ms, cpu_ms, peak_rss_kb), waiting up
+        to wait seconds for a snippet already running in this session.
+        """
+        self._acquire(case_timeout, wait)
+        try:
+            self.executions += 1
+            return self._run(code, stdin, case_timeout)
+        finally:
+            self._release()
+
+    def start(self, code, stdin='', case_timeout=CASE_TIMEOUT, wait=None):
+        """
+        Start a snippet on a background thread and return its execution
+        number. Waits up to wait seconds for a snippet already running in
+        this session before taking a sandbox admission slot, so a snippet
+        queued behind its own session doesn't hold a slot another session
+        could use. The slot is given back when the snippet finishes.
+        """
+        self._acquire(case_timeout, wait)
+        controller = get_admission_controller()
+        try:
+            controller.acquire()
+        except SandboxBusy:
+            self._release()
+            raise
+        with self._finished:
+            self.executions += 1
+            execution = self.running = self.executions
+        threading.Thread(
+            target=self._run_in_background, args=(execution, code, stdin, case_timeout, controller),
+            daemon=True
+        ).start()
+        return execution
+
+    def wait_for(self, execution, timeout):
+        """
+        The result of a start()ed execution, waiting up to timeout seconds
+        for it to finish; None if it is still running. Raises KernelNotFound
+        for executions this kernel never started or no longer keeps.
+        """
+        with self._finished:
+            self._finished.wait_for(lambda: self.running != execution, timeout=timeout)
+            if execution in self._results:
+                return self._results[execution]
+            if self.running == execution:
+                return None
+        raise KernelNotFound(f"{self.session_id}/{execution}")
+
+    def _run_in_background(self, execution, code, stdin, case_timeout, controller):
+        result = self._failure("The session's interpreter failed; the session was reset")
+        try:
+            result = self._run(code, stdin, case_timeout)
+        finally:
+            controller.release()
+            with self._finished:
+                self._results[execution] = result
+                self._results.pop(execution - self.results_kept, None)
+                self.running = None
+                self._finished.notify_all()
+            self._release()
+
+    def _acquire(self, case_timeout, wait):
+        if not self.lock.acquire(timeout=-1 if wait is None else wait):
+            raise SandboxBusy(wait=max(1, int(case_timeout)))
+
+    def _release(self):
+        self.last_used = time.monotonic()
+        self.lock.release()
+
+    def _run(self, code, stdin, case_timeout):
+        # Called with self.lock held.
+        job = {'code': code, 'input': stdin, 'case_timeout': case_timeout, 'limits': self.limits}
+        try:
+            self.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+            # The harness enforces case_timeout; the extra second is a backstop.
+            frames, finished = read_frames(
+                self.process, time.monotonic() + case_timeout + 1, max_bytes=job_output_budget({
+                    'inputs': [stdin], 'limits': self.limits,
+                })
+            )
+        except WorkerAborted as exc:
+            self.kill()
+            if isinstance(exc, WorkerTimeout):
+                error = f"Code execution timed out after {case_timeout} seconds; the session was reset"
+            elif isinstance(exc, WorkerOutputLimit):
+                error = "Output limit exceeded; the session was reset"
+            else:
+                error = "Execution was cancelled; the session was reset"
+            return self._failure(error, timed_out=isinstance(exc, WorkerTimeout))
+        except OSError:
+            frames, finished = [], False
+
+        case = next((frame for frame in frames if frame.get('type') == 'case'), None)
+        if not finished or case is None:
+            self.kill()
+            return self._failure("The session's interpreter exited (memory limit?); the session was reset")
+        return {key: case.get(key) for key in (
+            'output', 'error', 'timed_out', 'time_ms', 'cpu_ms', 'peak_rss_kb',
+        )}
+
+    def _failure(self, error, timed_out=False):
+        return {
+            'output': '', 'error': error, 'timed_out': timed_out,
+            'time_ms': None, 'cpu_ms': None, 'peak_rss_kb': None,
+        }
+
+    def kill(self):
+        kill_harness(self.process)
+
+
+class KernelManager:
+    """
+    Keeps at most max_kernels per-session kernels in this process and kills
+    the ones idle for longer than idle_timeout seconds.
+
+    Kernels live in the memory of the web process that started them, so a
+    session only works if every request for it reaches that process: run
+    the site with a single web process (threads are fine), or route on the
+    session cookie. A request that lands elsewhere just gets a new session.
+    """
+
+    def __init__(self, max_kernels, idle_timeout, memory_mb):
+        self.max_kernels = max_kernels
+        self.idle_timeout = idle_timeout
+        self.memory_mb = memory_mb
+        self._lock = threading.Lock()
+        self._kernels = {}
+        self._counters = {'started': 0, 'reaped': 0, 'crashed': 0, 'shut_down': 0, 'rejected': 0}
+        self._reaper = threading.Thread(target=self._reap_forever, daemon=True)
+        self._reaper.start()
+
+    def _lookup(self, session_id, owner):
+        kernel = self._kernels.get(session_id)
+        if kernel is None or kernel.owner != owner:
+            raise KernelNotFound(session_id)
+        return kernel
+
+    def get(self, session_id, owner):
+        """The caller's kernel for session_id; raises KernelNotFound."""
+        with self._lock:
+            return self._lookup(session_id, owner)
+
+    def get_or_start(self, session_id, owner):
+        """
+        Return the caller's kernel for session_id, starting a new one (with a
+        fresh session id) if session_id is empty or its kernel is gone.
+        """
+        with self._lock:
+            if session_id:
+                try:
+                    kernel = self._lookup(session_id, owner)
+                    if kernel.is_alive():
+                        # Keep the reaper off it until the caller's snippet starts.
+                        kernel.last_used = time.monotonic()
+                        return kernel
+                    del self._kernels[session_id]
+                    self._counters['crashed'] += 1
+                except KernelNotFound:
+                    pass
+            self._reap_locked()
+            if len(self._kernels) >= self.max_kernels:
+                self._counters['rejected'] += 1
+                raise SandboxBusy(wait=max(1, int(self.idle_timeout)))
+            kernel = Kernel(uuid.uuid4().hex, owner, self.memory_mb)
+            self._kernels[kernel.session_id] = kernel
+            self._counters['started'] += 1
+            return kernel
+
+    def shutdown(self, session_id, owner):
+        with self._lock:
+            kernel = self._lookup(session_id, owner)
+            del self._kernels[session_id]
+            self._counters['shut_down'] += 1
+        kernel.kill()
+
+    def _reap_locked(self):
+        now = time.monotonic()
+        for session_id, kernel in list(self._kernels.items()):
+            idle = not kernel.lock.locked() and now - kernel.last_used > self.idle_timeout
+            if idle or not kernel.is_alive():
+                del self._kernels[session_id]
+                self._counters['reaped' if idle else 'crashed'] += 1
+                kernel.kill()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(max(1, min(self.idle_timeout / 2, 30)))
+            with self._lock:
+                self._reap_locked()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_kernels': self.max_kernels,
+                'idle_timeout': self.idle_timeout,
+                'active': len(self._kernels),
+                'busy': sum(1 for kernel in self._kernels.values() if kernel.lock.locked()),
+                **self._counters,
+            }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_kernel_manager():
+    """Return the process-wide kernel manager, or None if kernels are disabled."""
+    global _manager
+    max_kernels = getattr(settings, 'SANDBOX_MAX_KERNELS', 0)
+    if max_kernels <= 0:
+        return None
+    with _manager_lock:
+        if _manager is None:
+            _manager = KernelManager(
+                max_kernels,
+                getattr(settings, 'SANDBOX_KERNEL_IDLE_TIMEOUT', 300),
+                getattr(settings, 'SANDBOX_KERNEL_MEMORY_MB', 256)
+            )
+        return _manager
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import httpx
+from django.conf import settings
+
+# Statuses worth another attempt: rate limited, or the API having a bad moment.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Failures that happen before the API has seen the request, so a retry is safe.
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+# Calls kept for the latency percentiles in stats().
+LATENCY_WINDOW = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def completions_url():
+    return f"{settings.OPENAI_API_BASE.rstrip('/')}/chat/completions"
+
+
+def _headers():
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {settings.OPENAI_API_KEY}"
+    }
+
+
+def _retry_after(response):
+    """Seconds the API asked us to wait (Retry-After, seconds or HTTP date), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """
+    One pooled HTTP client for every chat completions call in this process.
+
+    Requests run on a private event loop thread with an httpx.AsyncClient,
+    so connections (and their TLS sessions) are kept alive and reused across
+    calls from any request thread. At most max_concurrency calls are in
+    flight; a 429/5xx response or a connection failure is retried up to
+    max_retries times with jittered exponential backoff, waiting as long as
+    the API's Retry-After header asks when it sends one (up to backoff_max).
+
+    chat() and stream_chat() are the blocking facade used by the views;
+    achat() is the same call for async code running on any event loop.
+    """
+
+    def __init__(self, connect_timeout, read_timeout, max_connections, max_concurrency,
+                 max_retries, backoff_base, backoff_max):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='llm-client', daemon=True)
+        self._thread.start()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'calls': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0, 'retries': 0, 'streams': 0}
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _record(self, started, outcome, retries, label):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._counters[outcome] += 1
+            self._counters['retries'] += retries
+            self._latencies.append(elapsed_ms)
+        # Failures are worth a warning; the rest only when debugging.
+        logger.log(
+            logging.WARNING if outcome == 'failed' else logging.DEBUG,
+            "LLM %s %s in %.0f ms (%d retries)", label, outcome, elapsed_ms, retries
+        )
+
+    def _backoff(self, attempt, response=None):
+        asked = _retry_after(response) if response is not None else None
+        if asked is not None:
+            return min(asked, self.backoff_max)
+        # Full jitter: spread retries from many callers out instead of in waves.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _send(self, payload, stream):
+        """
+        Send one request, retrying as configured. Returns (response, retries);
+        a streamed response is returned unread and must be closed.
+        """
+        retries = 0
+        while True:
+            try:
+                request = self._client.build_request('POST', completions_url(), headers=_headers(), json=payload)
+                response = await self._client.send(request, stream=stream)
+            except RETRY_ERRORS:
+                if retries >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(retries))
+                retries += 1
+                continue
+            if response.status_code not in RETRY_STATUSES or retries >= self.max_retries:
+                return response, retries
+            wait = self._backoff(retries, response)
+            await response.aclose()
+            logger.info("LLM API returned %s; retrying in %.2fs", response.status_code, wait)
+            await asyncio.sleep(wait)
+            retries += 1
+
+    async def _chat(self, payload):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.monotonic()
+        retries = 0
+        outcome = 'failed'
+        try:
+            async with self._semaphore:
+                response, retries = await self._send(payload, stream=False)
+            response.raise_for_status()
+            outcome = 'succeeded'
+            return response.json()
+        finally:
+            self._record(started, outcome, retries, 'call')
+
+    async def _stream(self, payload):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        started = time.monotonic()
+        retries = 0
+        outcome = 'failed'
+        try:
+            async with self._semaphore:
+                response, retries = await self._send({**payload, 'stream': True}, stream=True)
+                try:
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                    # Server-sent events: "data: {json chunk}" lines, ending with "data: [DONE]"
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        data = line[len('data:'):].strip()
+                        if data == '[DONE]':
+                            break
+                        choices = json.loads(data).get('choices') or [{}]
+                        delta = choices[0].get('delta', {}).get('content')
+                        if delta:
+                            yield delta
+                    outcome = 'succeeded'
+                except GeneratorExit:
+                    # The consumer went away before the end of the answer.
+                    outcome = 'cancelled'
+                    raise
+                finally:
+                    await response.aclose()
+        finally:
+            self._record(started, outcome, retries, 'stream')
+
+    def chat(self, payload):
+        """
+        POST a chat completion and return the decoded response body. Raises
+        httpx.HTTPStatusError for an error status left after retrying, and
+        httpx.HTTPError for transport failures and timeouts.
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+        return self._run(self._chat(payload)).result()
+
+    async def achat(self, payload):
+        """chat() for coroutines, from any event loop."""
+        with self._lock:
+            self._counters['calls'] += 1
+        return await asyncio.wrap_future(self._run(self._chat(payload)))
+
+    def stream_chat(self, payload):
+        """
+        Stream a chat completion, yielding the pieces of text as they arrive.
+        Closing the generator closes the upstream response, which cancels the
+        generation. Errors are raised as in chat().
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['streams'] += 1
+        pieces = self._stream(payload)
+        try:
+            while True:
+                try:
+                    yield self._run(pieces.__anext__()).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(pieces.aclose()).result()
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+        percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1) if latencies else None
+        return {
+            **counters,
+            'max_concurrency': self.max_concurrency,
+            'latency_ms_p50': percentile(0.5),
+            'latency_ms_p95': percentile(0.95),
+            'latency_ms_max': round(latencies[-1], 1) if latencies else None,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Return the process-wide LLM client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(
+                connect_timeout=getattr(settings, 'LLM_CONNECT_TIMEOUT', 5),
+                read_timeout=getattr(settings, 'LLM_READ_TIMEOUT', 60),
+                max_connections=getattr(settings, 'LLM_MAX_CONNECTIONS', 20),
+                max_concurrency=getattr(settings, 'LLM_MAX_CONCURRENCY', 8),
+                max_retries=getattr(settings, 'LLM_MAX_RETRIES', 3),
+                backoff_base=getattr(settings, 'LLM_BACKOFF_BASE', 0.5),
+                backoff_max=getattr(settings, 'LLM_BACKOFF_MAX', 20),
+            )
+        return _client
+
+
+def llm_stats():
+    """Counters and latency percentiles of the LLM client (None before its first call)."""
+    return _client.stats() if _client is not None else None
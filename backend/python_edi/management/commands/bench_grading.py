@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.sandbox import default_parallelism, run_test_cases, run_test_cases_parallel
+
+# Each case burns roughly --work milliseconds of CPU before answering.
+BENCH_CODE = """
+import time
+
+def main(input_data):
+    deadline = time.process_time() + {work} / 1000
+    total = 0
+    while time.process_time() < deadline:
+        total += 1
+    return int(input_data) * 2
+"""
+
+
+class Command(BaseCommand):
+    help = "Benchmark sequential against parallel (and fail-fast) test case execution."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', type=int, default=8, help="Test cases per submission.")
+        parser.add_argument('--work', type=int, default=100, help="CPU milliseconds per case.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per mode.")
+        parser.add_argument('--workers', type=int, default=None, help="Parallel workers (default: cores).")
+
+    def handle(self, *args, **options):
+        code = BENCH_CODE.format(work=options['work'])
+        inputs = [str(i) for i in range(options['cases'])]
+        expected = [str(i * 2) for i in range(options['cases'])]
+        # Make the second case fail so fail-fast has something to stop on.
+        failing = list(expected)
+        failing[1] = 'wrong'
+        workers = options['workers'] or default_parallelism()
+
+        modes = [
+            ('sequential', lambda: run_test_cases(code, inputs, expected=expected)),
+            (f'parallel x{workers}', lambda: run_test_cases_parallel(
+                code, inputs, expected=expected, max_workers=workers)),
+            ('sequential fail-fast', lambda: run_test_cases(
+                code, inputs, expected=failing, fail_fast=True)),
+            (f'parallel x{workers} fail-fast', lambda: run_test_cases_parallel(
+                code, inputs, expected=failing, fail_fast=True, max_workers=workers)),
+        ]
+
+        self.stdout.write(
+            f"{options['cases']} cases x {options['work']} ms CPU, {options['repeat']} runs per mode"
+        )
+        for name, run in modes:
+            run()  # warm the worker pool
+            timings = []
+            skipped = 0
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                cases = run()
+                timings.append((time.perf_counter() - started) * 1000)
+                skipped = sum(1 for case in cases if case['skipped'])
+            self.stdout.write(
+                f"{name:<28} median {statistics.median(timings):8.1f} ms"
+                f"   min {min(timings):8.1f} ms   skipped {skipped}"
+            )
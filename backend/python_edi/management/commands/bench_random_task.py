@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from python_edi.models import PythonTask, Submission
+from python_edi.task_selection import DIFFICULTIES, get_random_task_index, pick_random_task
+
+# Roughly the size of a generated task's text and test cases.
+DESCRIPTION = "Write a function that takes a comma-separated list of integers and returns {n}. " * 4
+TEST_CASES = [{'input': '1,2,3,4,5', 'expected_output': '15'}] * 5
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark random-task selection (random.choice over the queryset against the cached id "
+        "index) as the task bank grows. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help="Task bank sizes to measure.")
+        parser.add_argument('--picks', type=int, default=200, help="Picks per size with the index.")
+        parser.add_argument('--naive-picks', type=int, default=3, help="Picks per size with random.choice.")
+        parser.add_argument('--naive-limit', type=int, default=100000,
+                            help="Largest bank random.choice is measured on (it loads every row).")
+        parser.add_argument('--solved', type=int, default=100, help="Tasks the benchmark user has solved.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        get_random_task_index().invalidate()
+
+    def _run(self, options):
+        User = get_user_model()
+        user = User.objects.create(**{User.USERNAME_FIELD: f"bench-random-task-{time.time_ns()}@example.com"})
+        index = get_random_task_index()
+        for size in sorted(options['sizes']):
+            self._grow(size)
+            index.invalidate()
+            started = time.perf_counter()
+            index.counts()
+            rebuild_ms = (time.perf_counter() - started) * 1000
+            self._solve(user, options['solved'])
+
+            line = f"{size:>9} tasks   index load {rebuild_ms:8.1f} ms"
+            timings = self._time(lambda: pick_random_task('easy', user), options['picks'])
+            line += f"   pick median {statistics.median(timings):6.2f} ms  p95 {timings[int(len(timings) * 0.95) - 1]:6.2f} ms"
+            if size <= options['naive_limit']:
+                timings = self._time(self._naive_pick, options['naive_picks'])
+                line += f"   random.choice median {statistics.median(timings):9.1f} ms"
+            else:
+                line += "   random.choice skipped"
+            self.stdout.write(line)
+
+    def _grow(self, size):
+        missing = size - PythonTask.objects.count()
+        for start in range(0, max(missing, 0), 5000):
+            PythonTask.objects.bulk_create([
+                PythonTask(
+                    title=f"Bench task {start + i}",
+                    description=DESCRIPTION.format(n=start + i),
+                    difficulty=DIFFICULTIES[(start + i) % len(DIFFICULTIES)],
+                    test_cases=TEST_CASES,
+                    hints=["Think about it."],
+                )
+                for i in range(min(5000, missing - start))
+            ])
+
+    def _solve(self, user, count):
+        ids = list(PythonTask.objects.filter(difficulty='easy').values_list('id', flat=True)[:count * 10])
+        Submission.objects.filter(user=user).delete()
+        Submission.objects.bulk_create([
+            Submission(user=user, task_id=task_id, code='', is_successful=True)
+            for task_id in random.sample(ids, min(count, len(ids)))
+        ])
+
+    def _naive_pick(self):
+        # What random-task did before the index.
+        tasks = PythonTask.objects.filter(pooled=False, duplicate_of__isnull=True, difficulty='easy')
+        if not tasks.exists():
+            tasks = PythonTask.objects.filter(pooled=False, duplicate_of__isnull=True)
+        if not tasks.exists():
+            return None
+        return random.choice(tasks)
+
+    def _time(self, pick, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            pick()
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
@@ -0,0 +1,59 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from python_edi.sandbox import run_test_cases
+
+BENCH_CODE = """
+def main(input_data):
+    return int(input_data) + {salt}
+"""
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-execution sandbox overhead for each code delivery method under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200, help="Executions per mode.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Executions in flight at once.")
+        parser.add_argument('--cold', action='store_true',
+                            help="Also measure without the warm worker pool.")
+
+    def handle(self, *args, **options):
+        modes = [('stdin', None), ('tempfile', None)]
+        if options['cold']:
+            modes += [('stdin', 0), ('tempfile', 0)]
+
+        self.stdout.write(f"{options['runs']} executions per mode, {options['concurrency']} concurrent")
+        for delivery, pool_size in modes:
+            overrides = {'SANDBOX_CODE_DELIVERY': delivery}
+            if pool_size is not None:
+                overrides['SANDBOX_POOL_SIZE'] = pool_size
+            with override_settings(**overrides):
+                timings, elapsed = self._measure(options['runs'], options['concurrency'])
+            timings.sort()
+            name = f"{delivery}{' (cold)' if pool_size == 0 else ''}"
+            self.stdout.write(
+                f"{name:<16} median {statistics.median(timings):7.2f} ms"
+                f"   p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms"
+                f"   {len(timings) / elapsed:7.1f} runs/s"
+            )
+
+    def _measure(self, runs, concurrency):
+        def run_once(salt):
+            # Distinct code per run, so nothing is served from a cache.
+            code = BENCH_CODE.format(salt=salt)
+            started = time.perf_counter()
+            case = run_test_cases(code, ['1'])[0]
+            if case['error']:
+                raise RuntimeError(case['error'])
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_once, range(concurrency)))  # warm the worker pool
+            started = time.perf_counter()
+            timings = list(executor.map(run_once, range(runs)))
+        return timings, time.perf_counter() - started
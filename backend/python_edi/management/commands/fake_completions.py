@@ -0,0 +1,181 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_ANSWER = (
+    "Your loop stops one element early: range(len(items) - 1) never reaches the last item. "
+    "Use range(len(items)), or better, iterate over the list directly with `for item in items:`."
+)
+
+
+# Tasks returned for task generation prompts, picked at random.
+FAKE_TASKS = [
+    {
+        "title": "Sum of Numbers",
+        "description": "Write a function that takes comma-separated integers and returns their sum.",
+        "test_cases": [
+            {"input": "1, 2, 3", "expected_output": "6"},
+            {"input": "10, -4", "expected_output": "6"},
+            {"input": "7", "expected_output": "7"},
+        ],
+        "hints": ["Split the input on commas", "Convert each part to int", "Use sum()"],
+        "reference_solution": "def main(input_data):\n    return sum(int(x) for x in input_data.split(','))\n",
+    },
+    {
+        "title": "Largest Number",
+        "description": "Write a function that takes comma-separated integers and returns the largest one.",
+        "test_cases": [
+            {"input": "1, 9, 3", "expected_output": "9"},
+            {"input": "-5, -2", "expected_output": "-2"},
+            {"input": "4", "expected_output": "4"},
+        ],
+        "hints": ["Split the input on commas", "Convert each part to int", "Use max()"],
+        "reference_solution": "def main(input_data):\n    return max(int(x) for x in input_data.split(','))\n",
+    },
+    {
+        # Inconsistent on purpose: the second expected output is wrong.
+        "title": "Count Even Numbers",
+        "description": "Write a function that takes comma-separated integers and returns how many are even.",
+        "test_cases": [
+            {"input": "1, 2, 4", "expected_output": "2"},
+            {"input": "3, 5", "expected_output": "1"},
+            {"input": "8", "expected_output": "1"},
+        ],
+        "hints": ["Split the input on commas", "Check x % 2 == 0", "Count the matches"],
+        "reference_solution": "def main(input_data):\n    return sum(1 for x in input_data.split(',') if int(x) % 2 == 0)\n",
+    },
+]
+
+
+def _task_answer(body):
+    """The JSON answer for a task generation prompt, or None for other prompts."""
+    content = ' '.join(str(message.get('content', '')) for message in body.get('messages', []))
+    if 'programming task' not in content or 'JSON' not in content:
+        return None
+    batch = re.search(r'Generate (\d+) different', content)
+    if batch:
+        return json.dumps({'tasks': [dict(random.choice(FAKE_TASKS)) for _ in range(int(batch.group(1)))]})
+    task = dict(random.choice(FAKE_TASKS))
+    task.pop('reference_solution')
+    return json.dumps(task)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is routine here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(port=0, delay=0.05, answer=DEFAULT_ANSWER, rate_limit=0.0, log=print):
+    """
+    Build the fake API server bound to 127.0.0.1:port (0 picks a free port),
+    ready for serve_forever(). server.requests counts the completion
+    requests it has received, rate limited ones included.
+    """
+    words = answer.split(' ')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            log(format % args)
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/v1/chat/completions':
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            with server.lock:
+                server.requests += 1
+            if random.random() < rate_limit:
+                data = b'{"error": {"message": "Rate limit reached", "type": "requests"}}'
+                self.send_response(429)
+                self.send_header('Retry-After', '1')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            task_answer = _task_answer(body)
+            tokens = words if task_answer is None else [task_answer]
+            if not body.get('stream'):
+                # As long as streaming the same answer would take.
+                time.sleep(delay * len(words))
+                data = json.dumps({
+                    'object': 'chat.completion',
+                    'model': body.get('model'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {
+                        'role': 'assistant', 'content': ' '.join(tokens),
+                    }}],
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            if task_answer is not None:
+                time.sleep(delay * len(words))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for index, word in enumerate(tokens):
+                    chunk = {
+                        'object': 'chat.completion.chunk',
+                        'choices': [{'index': 0, 'delta': {'content': word if index == 0 else ' ' + word}}],
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    time.sleep(delay)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+                log(f"Client disconnected after {index} of {len(tokens)} tokens")
+
+        def _write_chunk(self, data):
+            # Streamed like the real API: HTTP/1.1 chunked transfer encoding.
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+    server = _Server(('127.0.0.1', port), Handler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    return server
+
+
+class Command(BaseCommand):
+    help = ("Serve a fake OpenAI-compatible chat completions API for local development. "
+            "Point OPENAI_API_BASE at http://127.0.0.1:<port>/v1 to use it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay', type=float, default=0.05,
+                            help="Seconds between streamed tokens.")
+        parser.add_argument('--answer', default=DEFAULT_ANSWER, help="Text every completion returns.")
+        parser.add_argument('--rate-limit', type=float, default=0.0,
+                            help="Fraction of requests answered 429 with Retry-After: 1.")
+
+    def handle(self, *args, **options):
+        server = make_server(
+            options['port'], delay=options['delay'], answer=options['answer'],
+            rate_limit=options['rate_limit'], log=self.stdout.write,
+        )
+        self.stdout.write(f"Fake completions API on http://127.0.0.1:{options['port']}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
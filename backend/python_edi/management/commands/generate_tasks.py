@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.task_generation import DEFAULT_BATCH_SIZE, generate_tasks
+from python_edi.task_pool import DIFFICULTIES
+
+
+class Command(BaseCommand):
+    help = ("Bulk-seed the task bank: generate tasks several per API call, keep only those whose "
+            "reference solution passes every test case in the sandbox.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help="Validated tasks wanted per difficulty.")
+        parser.add_argument('--difficulty', action='append', dest='difficulties', choices=DIFFICULTIES,
+                            help="Only this difficulty (repeatable). Default: all of them.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Tasks requested per API call.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Tasks validated at once (default: cores, at most the pool size).")
+        parser.add_argument('--pooled', action='store_true',
+                            help="Put the tasks in the generate-task pool instead of publishing them.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Generate and validate, but save nothing.")
+
+    def handle(self, *args, **options):
+        for difficulty in options['difficulties'] or DIFFICULTIES:
+            started = time.monotonic()
+            totals = generate_tasks(
+                difficulty,
+                options['count'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                pooled=options['pooled'],
+                save=not options['dry_run'],
+                progress=lambda message: self.stdout.write(f"  {message}")
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{difficulty}: {len(totals['tasks'])} task(s) {'validated' if options['dry_run'] else 'saved'}, "
+                f"{totals['discarded']} discarded, {totals['received']} received for "
+                f"{totals['requested']} requested in {time.monotonic() - started:.1f}s"
+            ))
@@ -0,0 +1,60 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.grading import claim_next_job, requeue_stale_jobs, run_grading_job, worker_name
+from python_edi.submission_buffer import flush_submissions
+
+
+class Command(BaseCommand):
+    help = "Claim queued grading jobs and grade them until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help="Requeue jobs that have been running for this many seconds.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue once and exit instead of polling.")
+        parser.add_argument('--requeue-stale', action='store_true',
+                            help="Only requeue stale jobs and exit.")
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            requeued, failed = requeue_stale_jobs(options['stale_after'])
+            self.stdout.write(f"Requeued {requeued} stale job(s), marked {failed} as failed.")
+            return
+
+        name = worker_name()
+        self.stopping = False
+
+        def stop(signum, frame):
+            # Finish the job in hand, then exit.
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Grade worker {name} started.")
+        last_sweep = 0
+        while not self.stopping:
+            if time.monotonic() - last_sweep > options['stale_after']:
+                requeued, failed = requeue_stale_jobs(options['stale_after'])
+                if requeued or failed:
+                    self.stdout.write(f"Requeued {requeued} stale job(s), marked {failed} as failed.")
+                last_sweep = time.monotonic()
+
+            job = claim_next_job(name)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            run_grading_job(job)
+            self.stdout.write(f"Job {job.pk}: {job.status}")
+
+        # Don't leave buffered submissions behind when the worker exits.
+        flush_submissions()
+        self.stdout.write(f"Grade worker {name} stopped.")
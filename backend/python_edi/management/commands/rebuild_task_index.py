@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.task_index import reindex_tasks
+
+
+class Command(BaseCommand):
+    help = ("Recompute every task's near-duplicate signature from the table, optionally "
+            "linking existing near-duplicates to the oldest task of their group.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--link-duplicates', action='store_true',
+                            help="Also link tasks that nearly duplicate an older task to it.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Tasks loaded and written back per batch.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = reindex_tasks(
+            link_duplicates=options['link_duplicates'],
+            batch_size=options['batch_size'],
+            progress=lambda totals: self.stdout.write(f"{totals['tasks']} task(s) indexed")
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {totals['tasks']} task(s) in {time.monotonic() - started:.1f}s"
+            + (f", linked {totals['linked']} near-duplicate(s)" if options['link_duplicates'] else "")
+        ))
@@ -0,0 +1,51 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.task_pool import DIFFICULTIES, available, low_water, pool_size, refill
+
+
+class Command(BaseCommand):
+    help = ("Fill the pre-generated task pool up to TASK_POOL_SIZE tasks per difficulty, "
+            "once or (with --loop) whenever it drops below TASK_POOL_LOW_WATER.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--difficulty', action='append', dest='difficulties', choices=DIFFICULTIES,
+                            help="Only this difficulty (repeatable). Default: all of them.")
+        parser.add_argument('--size', type=int, default=None,
+                            help="Tasks to keep per difficulty (default: TASK_POOL_SIZE).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep watching the pool instead of filling it once.")
+        parser.add_argument('--poll-interval', type=float, default=10.0,
+                            help="Seconds between pool checks with --loop.")
+
+    def handle(self, *args, **options):
+        difficulties = options['difficulties'] or DIFFICULTIES
+        size = options['size'] if options['size'] is not None else pool_size()
+        self.stopping = False
+
+        def stop(signum, frame):
+            # Finish the task being generated, then exit.
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        first = True
+        while not self.stopping:
+            for difficulty in difficulties:
+                if self.stopping:
+                    break
+                ready = available(difficulty)
+                # In the loop, wait for the low-water mark like the request path does.
+                if ready >= size or (not first and ready >= low_water()):
+                    continue
+                generated = refill(difficulty, size)
+                self.stdout.write(
+                    f"{difficulty}: generated {generated} task(s), {available(difficulty)}/{size} ready"
+                )
+            if not options['loop']:
+                break
+            first = False
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from python_edi.models import PythonTask
+from python_edi.regrade import DEFAULT_BATCH_SIZE, regrade, stale_submissions
+
+
+class Command(BaseCommand):
+    help = ("Regrade stored submissions whose task's test cases changed, "
+            "running only the added or edited cases.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', type=int, action='append', dest='tasks',
+                            help="Only this task id (repeatable). Default: every task.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Submissions graded at once (default: cores, at most the pool size).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Submissions loaded and written back per batch.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many submissions are stale.")
+
+    def handle(self, *args, **options):
+        tasks = PythonTask.objects.all().order_by('id')
+        if options['tasks']:
+            tasks = tasks.filter(pk__in=options['tasks'])
+
+        if options['dry_run']:
+            for task in tasks:
+                stale = stale_submissions(task).count()
+                if stale:
+                    self.stdout.write(f"Task {task.pk} ({task.title}): {stale} stale submission(s)")
+            return
+
+        started = time.monotonic()
+
+        def progress(task, done, total, cases_run):
+            rate = done / max(time.monotonic() - started, 1e-9)
+            self.stdout.write(
+                f"Task {task.pk}: {done}/{total} submissions regraded "
+                f"({cases_run} case(s) run in this batch, {rate:.1f}/s)"
+            )
+
+        totals = regrade(
+            tasks, workers=options['workers'], batch_size=options['batch_size'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Regraded {totals['submissions']} submission(s), running {totals['cases_run']} case(s) "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0004_gradingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradingjob',
+            name='options',
+            field=models.JSONField(blank=True, default=dict, help_text="Grading options, e.g. {'parallel': true, 'fail_fast': true}"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0005_gradingjob_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='stress_inputs',
+            field=models.JSONField(blank=True, default=dict, help_text="Optional performance inputs: {'generator': 'def generate(n): ...', 'sizes': [...], 'repeat': 3}"),
+        ),
+    ]
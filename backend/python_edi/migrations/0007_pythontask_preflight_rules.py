@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0006_pythontask_stress_inputs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='preflight_rules',
+            field=models.JSONField(blank=True, default=dict, help_text="Overrides for the static pre-flight checks, e.g. {'forbidden_imports': ['os'], 'require_entry': true}"),
+        ),
+    ]
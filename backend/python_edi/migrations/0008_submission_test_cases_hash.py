@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 21:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0007_pythontask_preflight_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='test_cases_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['task', 'test_cases_hash'], name='submission_task_tc_hash'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-17 21:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0008_submission_test_cases_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssistanceAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('task_key', models.CharField(max_length=64)),
+                ('error_type', models.CharField(blank=True, max_length=100)),
+                ('question', models.TextField(blank=True)),
+                ('signature', models.JSONField(default=list)),
+                ('response', models.TextField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='assistance_created'), models.Index(fields=['last_used_at'], name='assistance_last_used')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AssistanceAnswerBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=16)),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='python_edi.assistanceanswer')),
+            ],
+        ),
+    ]
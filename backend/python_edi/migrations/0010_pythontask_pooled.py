@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0009_assistance_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='pooled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='pythontask',
+            index=models.Index(condition=models.Q(('pooled', True)), fields=['difficulty', 'id'], name='pythontask_pool'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0010_pythontask_pooled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='reference_solution',
+            field=models.TextField(blank=True, default='', help_text='Known-good solution defining main(input_data); generated tasks are validated by running it'),
+        ),
+    ]
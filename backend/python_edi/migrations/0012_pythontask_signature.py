@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 21:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0011_pythontask_reference_solution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Canonical task this one nearly duplicates; duplicates are left out of random-task', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='python_edi.pythontask'),
+        ),
+        migrations.AddField(
+            model_name='pythontask',
+            name='signature',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0012_pythontask_signature'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pythontask',
+            index=models.Index(condition=models.Q(('pooled', False)), fields=['duplicate_of', '-created_at', '-id'], name='pythontask_listing'),
+        ),
+        migrations.AddIndex(
+            model_name='pythontask',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', True), ('pooled', False)), fields=['difficulty', '-created_at', '-id'], name='pythontask_listing_difficulty'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0013_pythontask_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pythontask',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def drop_stale_signatures(apps, schema_editor):
+    """
+    Near-duplicate signatures of cached assistance answers were computed
+    with the old per-permutation MinHash and can't match the new ones; the
+    request code behind them isn't stored, so they can't be recomputed.
+    Drop them and their bands. The answers still serve exact repeats and
+    age out with AI_CACHE_TTL.
+    """
+    AssistanceAnswer = apps.get_model('python_edi', 'AssistanceAnswer')
+    AssistanceAnswerBand = apps.get_model('python_edi', 'AssistanceAnswerBand')
+    AssistanceAnswerBand.objects.all().delete()
+    AssistanceAnswer.objects.update(signature=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('python_edi', '0014_pythontask_revision'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_stale_signatures, migrations.RunPython.noop),
+    ]
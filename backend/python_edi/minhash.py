@@ -0,0 +1,85 @@
+import hashlib
+import re
+
+# Signature length, and the banding used for locality-sensitive lookups:
+# BANDS bands of ROWS values each. Two sets land in a common band with high
+# probability once their Jaccard similarity passes about (1/BANDS)**(1/ROWS),
+# here ~0.5; candidates are then checked against the real threshold.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Part of every band key. Bump it whenever signature() changes, so bands
+# stored under an older scheme never match new signatures (stored
+# signatures have to be recomputed or dropped; see migration 0015).
+SCHEME = 2
+
+# Bin values are hashes divided by NUM_PERM, so below 2**58; a densified
+# (borrowed) value adds a multiple of this, so it never equals a real one.
+_DENSIFY_OFFSET = 1 << 58
+_EMPTY = (1 << 64) - 1
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def words(text):
+    """Lower-cased word tokens of text."""
+    return _WORD_RE.findall((text or '').lower())
+
+
+def shingles(tokens, size=3, prefix=''):
+    """The set of size-token windows of tokens (the whole sequence if shorter)."""
+    tokens = list(tokens)
+    if len(tokens) <= size:
+        return {prefix + ' '.join(tokens)} if tokens else set()
+    return {prefix + ' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def signature(features):
+    """
+    MinHash signature (a list of NUM_PERM ints) of a set of strings.
+
+    Uses one-permutation hashing: each feature's hash picks one of NUM_PERM
+    bins and competes for its minimum, so a signature costs one hash per
+    feature instead of NUM_PERM. An empty bin borrows the value of the next
+    non-empty bin to its right, offset by the distance (rotation
+    densification), which keeps similarity() accurate for small sets.
+    """
+    bins = [None] * NUM_PERM
+    for feature in features:
+        h = _hash(feature)
+        index, value = h % NUM_PERM, h // NUM_PERM
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return [_EMPTY] * NUM_PERM
+    sig = []
+    for index in range(NUM_PERM):
+        distance = 0
+        while bins[(index + distance) % NUM_PERM] is None:
+            distance += 1
+        sig.append(bins[(index + distance) % NUM_PERM] + distance * _DENSIFY_OFFSET)
+    return sig
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def band_keys(sig, namespace=''):
+    """
+    One key per band of sig. Sets sharing any key are near-duplicate
+    candidates; namespace keeps unrelated groups (another task, say) apart.
+    """
+    return [
+        hashlib.blake2b(
+            f"v{SCHEME}|{namespace}|{index}|{','.join(map(str, sig[index * ROWS:(index + 1) * ROWS]))}".encode('utf-8'),
+            digest_size=8
+        ).hexdigest()
+        for index in range(BANDS)
+    ]
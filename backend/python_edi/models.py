@@ -19,6 +19,14 @@ class PythonTask(models.Model):
     
     For tasks where input is a string of comma-separated values and output is a single value.
     The test runner will automatically parse these inputs when passed to the student's function.
+
+    Stress inputs example (used by performance mode):
+    {
+        "generator": "def generate(n):\n    return list(range(n, 0, -1))",
+        "sizes": [1000, 4000, 16000, 64000, 256000]
+    }
+    generate(n) returns the input string for size n (lists are joined with
+    commas). It runs inside the sandbox, like student code.
     """
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -30,7 +38,48 @@ class PythonTask(models.Model):
     expected_output = models.TextField(blank=True, null=True)
     test_cases = models.JSONField(default=list, help_text="List of dictionaries with 'input' and 'expected_output' keys")
     hints = models.JSONField(default=list, help_text="List of hints for the task, in increasing order of helpfulness")
+    reference_solution = models.TextField(
+        blank=True, default='',
+        help_text="Known-good solution defining main(input_data); generated tasks are validated by running it"
+    )
+    stress_inputs = models.JSONField(
+        default=dict, blank=True,
+        help_text="Optional performance inputs: {'generator': 'def generate(n): ...', 'sizes': [...], 'repeat': 3}"
+    )
+    preflight_rules = models.JSONField(
+        default=dict, blank=True,
+        help_text="Overrides for the static pre-flight checks, e.g. {'forbidden_imports': ['os'], 'require_entry': true}"
+    )
+    # MinHash of the title, description and test cases, kept by a pre_save
+    # signal; python_edi/task_index.py finds near-duplicate tasks with it.
+    signature = models.JSONField(default=list, blank=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates',
+        help_text="Canonical task this one nearly duplicates; duplicates are left out of random-task"
+    )
+    # Pre-generated by the task pool (python_edi/task_pool.py) and not yet
+    # handed out by generate-task/; hidden from task listings until then.
+    pooled = models.BooleanField(default=False)
+    # Bumped on every change (see signals.py); task detail and hints
+    # responses are cached and ETagged by it (python_edi/task_cache.py).
+    revision = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['difficulty', 'id'], condition=models.Q(pooled=True), name='pythontask_pool'),
+            # The task list: served, canonical tasks newest first, optionally
+            # of one difficulty (see TaskCursorPagination). duplicate_of leads
+            # the first so "IS NULL" can use it rather than the plain FK index.
+            models.Index(
+                fields=['duplicate_of', '-created_at', '-id'],
+                condition=models.Q(pooled=False), name='pythontask_listing'
+            ),
+            models.Index(
+                fields=['difficulty', '-created_at', '-id'],
+                condition=models.Q(pooled=False, duplicate_of__isnull=True), name='pythontask_listing_difficulty'
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -42,7 +91,15 @@ class Submission(models.Model):
     is_successful = models.BooleanField(default=False)
     error_message = models.TextField(blank=True, null=True)
     output = models.TextField(blank=True, null=True)
+    # Fingerprint of the task's test cases this verdict was computed against;
+    # `manage.py regrade` re-runs submissions whose task no longer matches.
+    test_cases_hash = models.CharField(max_length=64, blank=True, default='')
     submitted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'test_cases_hash'], name='submission_task_tc_hash'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.task.title}"
@@ -56,3 +113,73 @@ class ChatMessage(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class GradingJob(models.Model):
+    """
+    A queued submission waiting to be graded by `manage.py grade_worker`.
+
+    Workers claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of them can run across processes and nodes without double-grading.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    task = models.ForeignKey(PythonTask, on_delete=models.SET_NULL, null=True, blank=True)
+    code = models.TextField()
+    test_cases = models.JSONField(default=list, help_text="List of dictionaries with 'input' and 'expectedOutput' keys")
+    options = models.JSONField(default=dict, blank=True, help_text="Grading options, e.g. {'parallel': true, 'fail_fast': true}")
+    status = models.CharField(max_length=20, choices=[
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed')
+    ], default=STATUS_QUEUED)
+    result = models.JSONField(blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='gradingjob_status_created'),
+        ]
+
+    def __str__(self):
+        return f"Grading job {self.pk} ({self.status})"
+
+class AssistanceAnswer(models.Model):
+    """
+    A cached AI assistance answer (see python_edi/assistance_cache.py).
+
+    fingerprint is the exact key of the request. The MinHash signature of the
+    request's error and code shape, with its LSH band keys in
+    AssistanceAnswerBand, finds near-duplicate requests on the same task.
+    """
+    fingerprint = models.CharField(max_length=64, unique=True)
+    task_key = models.CharField(max_length=64)
+    error_type = models.CharField(max_length=100, blank=True)
+    question = models.TextField(blank=True)
+    signature = models.JSONField(default=list)
+    response = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='assistance_created'),
+            models.Index(fields=['last_used_at'], name='assistance_last_used'),
+        ]
+
+    def __str__(self):
+        return f"Assistance answer {self.fingerprint[:12]} ({self.hits} hits)"
+
+class AssistanceAnswerBand(models.Model):
+    answer = models.ForeignKey(AssistanceAnswer, on_delete=models.CASCADE, related_name='bands')
+    key = models.CharField(max_length=16, db_index=True)
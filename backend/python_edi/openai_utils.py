@@ -1,11 +1,14 @@
-import requests
+import httpx
 import json
 import os
-import tempfile
-import subprocess
 from django.conf import settings
 import re
 import time
+from .assistance_cache import assistance_fingerprint, lookup_answer, store_answer
+from .llm_client import get_llm_client
+from .preflight import preflight
+from .single_flight import assistance_flight
+from .sandbox import run_test_cases
 
 def execute_python_code(code, test_input=None):
     """
@@ -29,80 +32,43 @@ def execute_python_code(code, test_input=None):
 
 def process_code_locally(code, test_input=None):
     """
-    Execute Python code by saving it to a temporary file and running it as a subprocess.
-    This is safer and more realistic than using exec.
+    Execute Python code in the sandbox harness.
+    Runs on a warm pool worker when one is free, otherwise in a freshly
+    spawned interpreter, so the code never runs inside the web process.
     """
     try:
-        # Pre-process code to ensure proper output
-        processed_code = code
-
-        # Check if code includes a main function but doesn't call it
-        if "def main(" in code and "main(" not in code.split("def main(")[1]:
-            processed_code += "\n\n# Auto-added by the system\ninput_value = input()\nprint(main(input_value))\n"
-        elif "def main():" in code and "main()" not in code.split("def main():")[1]:
-            processed_code += "\n\n# Auto-added by the system\nprint(main())\n"
-        elif "def solution(" in code and "solution(" not in code.split("def solution(")[1]:
-            processed_code += "\n\n# Auto-added by the system\ninput_value = input()\nresult = solution(input_value)\nprint(result)\n"
-
-        # Create a temporary file to store the code
-        with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(processed_code)
-        
-        try:
-            # Prepare input data (add newline for proper stdin handling)
-            input_data = f"{test_input}\n" if test_input else ""
-            
-            # Run the Python interpreter as a subprocess
-            process = subprocess.run(
-                ["python", temp_file_path],
-                input=input_data,
-                capture_output=True,
-                text=True,
-                timeout=3  # 3 second timeout
-            )
-            
-            # Get the output and errors
-            output = process.stdout.strip() if process.stdout else ""
-            error = process.stderr.strip() if process.stderr else None
-            
-            # Check for errors
-            if process.returncode != 0:
-                return {
-                    "success": False,
-                    "output": None,
-                    "error": f"Execution error: {error or 'Unknown error'}"
-                }
-            
-            print(f"Execution successful, output: {output}")
-            return {
-                "success": True,
-                "output": output,
-                "error": None
-            }
-            
-        except subprocess.TimeoutExpired:
+        # Not cached like grading verdicts: a free-form run may use random,
+        # time or hash ordering, and "Run" should show what it prints now.
+        # Same preparation and driver as grading: main()/solution() is called
+        # with the input and its return value printed.
+        case = run_test_cases(code, [test_input or ""])[0]
+        usage = {key: case[key] for key in ('time_ms', 'cpu_ms', 'peak_rss_kb')}
+
+        if case['timed_out']:
             return {
                 "success": False,
                 "output": None,
-                "error": "Code execution timed out after 3 seconds"
+                "error": case['error'],
+                **usage
             }
-        except Exception as e:
-            import traceback
-            print(f"Execution error: {str(e)}")
-            print(traceback.format_exc())
-            return {
+
+        if case['error']:
+            result = {
                 "success": False,
                 "output": None,
-                "error": f"Error executing code: {str(e)}"
+                "error": f"Execution error: {case['error']}",
+                **usage
             }
-        finally:
-            # Clean up the temporary file
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file {temp_file_path}: {e}")
-                
+        else:
+            print(f"Execution successful, output: {case['output']}")
+            result = {
+                "success": True,
+                "output": case['output'],
+                "error": None,
+                **usage
+            }
+        return result
+
     except Exception as e:
         return {
             "success": False,
@@ -110,13 +76,8 @@ def process_code_locally(code, test_input=None):
             "error": f"Error in local execution: {str(e)}"
         }
 
-def get_ai_assistance(code, error_message, task_description, user_message=""):
-    """
-    Get AI assistance for debugging Python code.
-    """
-    # Check for syntax errors
-    if "Syntax Error" in error_message or "invalid token" in error_message.lower() or "unexpected token" in error_message.lower():
-        return """I see you're getting a syntax error. This usually means there's a problem with the structure of your code. Here are some common issues to check:
+# Canned answer for code that doesn't parse; no API call is needed for it.
+SYNTAX_ERROR_HELP = """I see you're getting a syntax error. This usually means there's a problem with the structure of your code. Here are some common issues to check:
 
 1. **Mismatched quotes**: Make sure all your quotes (', ", ''') are properly opened and closed.
    Example: `print('Hello)` is missing the closing quote.
@@ -133,12 +94,9 @@ def get_ai_assistance(code, error_message, task_description, user_message=""):
 5. **Unicode characters**: Ensure you're not using special Unicode characters like "smart quotes" (", ") instead of regular quotes.
 
 Look closely at the line where the error occurs and the character position mentioned in the error message."""
-    
-    api_key = settings.OPENAI_API_KEY
-    if not api_key:
-        # Return generic assistance if API key is not available
-        print("Warning: OpenAI API key not set. Using generic assistance.")
-        return """I'll help you solve this problem! Here are some tips:
+
+# Answer used when no OpenAI API key is configured.
+GENERIC_HELP = """I'll help you solve this problem! Here are some tips:
 
 1. Make sure you've understood the problem requirements correctly.
 2. Check that your function names match exactly what's asked in the problem.
@@ -149,12 +107,27 @@ Look closely at the line where the error occurs and the character position menti
 If you're getting an error, carefully read the error message - it often tells you exactly what's wrong.
 
 Feel free to ask specific questions about your code!"""
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
+
+def _assistance_fast_path(code, error_message):
+    """
+    Answer without the API when possible: the canned syntax-error help, or
+    the generic tips when no API key is set. Returns None otherwise.
+    """
+    # Check for syntax errors, in the code itself or in the reported error
+    syntax = [diagnostic for diagnostic in preflight(code or '') if diagnostic['rule'] == 'syntax']
+    if syntax or "Syntax Error" in error_message or "invalid token" in error_message.lower() or "unexpected token" in error_message.lower():
+        details = f"Python reports:\n```\n{syntax[0]['message']}\n```\n\n" if syntax else ""
+        return details + SYNTAX_ERROR_HELP
+
+    if not settings.OPENAI_API_KEY:
+        # Return generic assistance if API key is not available
+        print("Warning: OpenAI API key not set. Using generic assistance.")
+        return GENERIC_HELP
+    return None
+
+
+def _assistance_payload(code, error_message, task_description, user_message):
+    """Chat completion payload asking for help with the student's code."""
     prompt = f"""
     I'm trying to solve this Python task:
     
@@ -177,20 +150,34 @@ Feel free to ask specific questions about your code!"""
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.7
     }
-    
+    return payload
+
+
+def get_ai_assistance(code, error_message, task_description, user_message=""):
+    """
+    Get AI assistance for debugging Python code.
+    Answers come from the assistance cache when an identical or very similar
+    question was answered before; identical requests in flight at the same
+    time (a whole class hitting the same error) share one API call.
+    """
+    error_message = error_message or ''
+    canned = _assistance_fast_path(code, error_message)
+    if canned is not None:
+        return canned
+
+    cached = lookup_answer(code, error_message, task_description, user_message)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload
+        return assistance_flight().do(
+            assistance_fingerprint(code, error_message, task_description, user_message),
+            lambda: _request_assistance(code, error_message, task_description, user_message)
         )
-        response.raise_for_status()
-        
-        return response.json()["choices"][0]["message"]["content"]
-    except requests.exceptions.HTTPError as http_err:
+    except httpx.HTTPStatusError as http_err:
         print(f"HTTP error in AI assistance: {http_err}")
         try:
-            error_detail = response.json()
+            error_detail = http_err.response.json()
             print(f"API error details: {error_detail}")
             return f"I couldn't provide assistance at this time. API error: {http_err}"
         except:
@@ -200,6 +187,47 @@ Feel free to ask specific questions about your code!"""
         print(f"Error getting AI assistance: {e}")
         return f"Sorry, I couldn't provide assistance at this time. Error: {str(e)}"
 
+def _request_assistance(code, error_message, task_description, user_message):
+    payload = _assistance_payload(code, error_message, task_description, user_message)
+    completion = get_llm_client().chat(payload)
+    answer = completion["choices"][0]["message"]["content"]
+    store_answer(code, error_message, task_description, user_message, answer)
+    return answer
+
+def stream_ai_assistance(code, error_message, task_description, user_message=""):
+    """
+    Like get_ai_assistance, but yields the answer in pieces as the API
+    generates them (a streamed chat completion). Closing the generator
+    closes the upstream connection, which cancels the generation.
+    Errors are yielded as text, the same way get_ai_assistance returns them.
+    """
+    error_message = error_message or ''
+    canned = _assistance_fast_path(code, error_message)
+    if canned is None:
+        canned = lookup_answer(code, error_message, task_description, user_message)
+    if canned is not None:
+        yield canned
+        return
+
+    payload = _assistance_payload(code, error_message, task_description, user_message)
+    pieces = get_llm_client().stream_chat(payload)
+    answer = []
+    try:
+        for piece in pieces:
+            answer.append(piece)
+            yield piece
+    except httpx.HTTPStatusError as http_err:
+        print(f"HTTP error in AI assistance: {http_err}")
+        yield f"I couldn't provide assistance at this time. API error: {http_err}"
+        return
+    except Exception as e:
+        print(f"Error getting AI assistance: {e}")
+        yield f"Sorry, I couldn't provide assistance at this time. Error: {str(e)}"
+        return
+    finally:
+        pieces.close()
+    store_answer(code, error_message, task_description, user_message, ''.join(answer))
+
 def get_task_template(task_title, task_description=None, test_cases=None):
     """
     Return a code template based on task title and input format.
@@ -323,21 +351,89 @@ def main(input_data):
 # Do not modify below this line - the system will auto-run your code
 """.format(task_title)
 
-def generate_python_task(difficulty='easy'):
+def _clean_task(task_json):
     """
-    Generate a Python programming task using OpenAI API.
-    The task will have multiple test cases with integer output.
+    Check a generated task and normalize it in place: at most three test
+    cases, integer expected outputs, a hints list. Raises ValueError.
     """
+    # Validate the response format
+    if not all(key in task_json for key in ['title', 'description', 'test_cases']):
+        print("Invalid response format from OpenAI API")
+        raise ValueError("Invalid task format received from OpenAI API: missing required fields")
+        
+    # Make sure there are at least one test case
+    if not task_json.get('test_cases'):
+        print("No test cases from OpenAI API")
+        raise ValueError("Invalid task format: no test cases provided")
+    
+    # Ensure we have at least one test case, but not more than three
+    test_cases = task_json.get('test_cases', [])
+    if len(test_cases) > 3:
+        test_cases = test_cases[:3]
+    
+    # Validate each test case format and ensure expected_output is an integer
+    for i, test_case in enumerate(test_cases):
+        if not all(key in test_case for key in ['input', 'expected_output']):
+            print(f"Invalid test case format in case {i+1}")
+            raise ValueError(f"Invalid test case format in case {i+1}: missing required fields")
+        
+        # Ensure expected_output is an integer
+        try:
+            test_case['expected_output'] = str(int(float(test_case['expected_output'])))
+        except (ValueError, TypeError):
+            print(f"Expected output is not an integer in test case {i+1}")
+            raise ValueError(f"Invalid test case format: expected output must be an integer")
+    
+    # Check for hints
+    if 'hints' not in task_json or not isinstance(task_json['hints'], list):
+        task_json['hints'] = []
+        print("No hints provided in the response")
+    
+    # Update the task with the validated test cases
+    task_json['test_cases'] = test_cases
+    return task_json
+
+def _parse_json_content(content):
+    """Decode the JSON in a completion, also when it's wrapped in a markdown code block."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON from OpenAI: {e}")
+        # Try to extract JSON from markdown code blocks
+        json_matches = re.findall(r'```(?:json)?\s*(.*?)\s*```', content, re.DOTALL)
+        if json_matches:
+            print("Attempting to parse JSON from code blocks...")
+            try:
+                return json.loads(json_matches[0])
+            except Exception as inner:
+                print(f"Failed to parse JSON from code blocks: {inner}")
+        raise ValueError(f"Failed to parse task JSON from OpenAI API response: {e}")
+
+def _request_task_json(payload):
+    """Send a task generation prompt and return the decoded JSON answer."""
     api_key = settings.OPENAI_API_KEY
     if not api_key:
         print("Error: OpenAI API key not set.")
         raise ValueError("OpenAI API key is not configured. Please set the OPENAI_API_KEY environment variable.")
-    
+
+    print("Sending request to OpenAI API...")
+    try:
+        completion = get_llm_client().chat(payload)
+    except httpx.HTTPStatusError as http_err:
+        print(f"OpenAI API error: {http_err.response.text}")
+        raise Exception(f"OpenAI API returned status code {http_err.response.status_code}")
+    
+    content = completion["choices"][0]["message"]["content"]
+    # Print the received content for debugging
+    print(f"Received response content: {content[:100]}...")
+    return _parse_json_content(content)
+
+def generate_python_task(difficulty='easy'):
+    """
+    Generate a Python programming task using OpenAI API.
+    The task will have multiple test cases with integer output.
+    """
     print(f"Generating {difficulty} task using OpenAI API...")
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
     
     prompt = f"""
     Generate a {difficulty} Python programming task for a student to solve.
@@ -398,83 +494,71 @@ def generate_python_task(difficulty='easy'):
     }
     
     try:
-        print("Sending request to OpenAI API...")
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload
-        )
-        
-        # Print information about the response
-        print(f"OpenAI API response status: {response.status_code}")
-        if response.status_code != 200:
-            print(f"OpenAI API error: {response.text}")
-            raise Exception(f"OpenAI API returned status code {response.status_code}")
-            
-        response.raise_for_status()
-        
-        content = response.json()["choices"][0]["message"]["content"]
-        # Extract JSON from the response
-        try:
-            # Print the received content for debugging
-            print(f"Received response content: {content[:100]}...")
-            
-            task_json = json.loads(content)
-            
-            # Validate the response format
-            if not all(key in task_json for key in ['title', 'description', 'test_cases']):
-                print("Invalid response format from OpenAI API")
-                raise ValueError("Invalid task format received from OpenAI API: missing required fields")
-                
-            # Make sure there are at least one test case
-            if not task_json.get('test_cases'):
-                print("No test cases from OpenAI API")
-                raise ValueError("Invalid task format: no test cases provided")
-            
-            # Ensure we have at least one test case, but not more than three
-            test_cases = task_json.get('test_cases', [])
-            if len(test_cases) > 3:
-                test_cases = test_cases[:3]
-            
-            # Validate each test case format and ensure expected_output is an integer
-            for i, test_case in enumerate(test_cases):
-                if not all(key in test_case for key in ['input', 'expected_output']):
-                    print(f"Invalid test case format in case {i+1}")
-                    raise ValueError(f"Invalid test case format in case {i+1}: missing required fields")
-                
-                # Ensure expected_output is an integer
-                try:
-                    test_case['expected_output'] = str(int(float(test_case['expected_output'])))
-                except (ValueError, TypeError):
-                    print(f"Expected output is not an integer in test case {i+1}")
-                    raise ValueError(f"Invalid test case format: expected output must be an integer")
-            
-            # Check for hints
-            if 'hints' not in task_json or not isinstance(task_json['hints'], list):
-                task_json['hints'] = []
-                print("No hints provided in the response")
-            
-            # Update the task with the validated test cases
-            task_json['test_cases'] = test_cases
-            
-            print(f"Successfully generated task: {task_json['title']} with {len(test_cases)} test cases")
-            return task_json
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON from OpenAI: {e}")
-            # Try to extract JSON from markdown code blocks
-            import re
-            json_matches = re.findall(r'```(?:json)?\s*(.*?)\s*```', content, re.DOTALL)
-            if json_matches:
-                print("Attempting to parse JSON from code blocks...")
-                try:
-                    task_json = json.loads(json_matches[0])
-                    print(f"Successfully extracted task from code block: {task_json['title']}")
-                    return task_json
-                except Exception as e:
-                    print(f"Failed to parse JSON from code blocks: {e}")
-            
-            raise ValueError(f"Failed to parse task JSON from OpenAI API response: {e}")
-            
+        task_json = _clean_task(_request_task_json(payload))
+        print(f"Successfully generated task: {task_json['title']} with {len(task_json['test_cases'])} test cases")
+        return task_json
     except Exception as e:
         print(f"Error generating task: {str(e)}")
-        raise ValueError(f"Failed to generate task: {str(e)}") 
\ No newline at end of file
+        raise ValueError(f"Failed to generate task: {str(e)}")
+
+def generate_python_tasks(difficulty='easy', count=5):
+    """
+    Generate count tasks in one API call, each with a reference solution
+    (source defining main(input_data)) so its test cases can be checked by
+    running it. Returns the tasks that are well-formed; malformed ones are
+    dropped. Raises ValueError if the call fails or the answer isn't JSON.
+    """
+    print(f"Generating {count} {difficulty} tasks using OpenAI API...")
+
+    prompt = f"""
+    Generate {count} different {difficulty} Python programming tasks for students to solve.
+    
+    IMPORTANT: Each task MUST result in an integer output only (not a float, not a string, not an array).
+    The function should process the input and return a single integer value.
+    
+    Each task should include:
+    1. A clear title
+    2. A description of the problem that includes what the function should do and what input it takes
+    3. THREE test cases with input and expected integer output
+    4. THREE hints of increasing helpfulness to guide students when they get stuck
+    5. A correct reference solution: Python source defining main(input_data), which receives the
+       input string and returns the integer answer
+    
+    Format the response as a JSON object with a single field "tasks": an array of {count} objects
+    with the following fields:
+    - title: string
+    - description: string
+    - test_cases: array with THREE objects containing 'input' and 'expected_output' fields
+    - hints: array with THREE strings containing hints in order of increasing helpfulness
+    - reference_solution: string
+    
+    Ensure that:
+    1. The tasks are about different problems
+    2. The expected_output of every test case is ALWAYS an integer, and is exactly what the reference solution returns for its input
+    3. The output is in valid JSON format
+    4. Each description clearly states what the input format is (e.g., a string of comma-separated values)
+    """
+
+    payload = {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": min(4000, 700 * count)
+    }
+
+    try:
+        answer = _request_task_json(payload)
+    except Exception as e:
+        print(f"Error generating tasks: {str(e)}")
+        raise ValueError(f"Failed to generate tasks: {str(e)}")
+
+    tasks = []
+    for task_json in (answer.get('tasks') if isinstance(answer, dict) else answer) or []:
+        try:
+            if not isinstance(task_json, dict) or not isinstance(task_json.get('reference_solution'), str):
+                raise ValueError("Invalid task format: no reference solution provided")
+            tasks.append(_clean_task(task_json))
+        except ValueError as e:
+            print(f"Dropping generated task: {e}")
+    print(f"Received {len(tasks)} well-formed task(s) out of {count} requested")
+    return tasks
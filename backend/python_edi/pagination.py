@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Newest tasks first, paged by an opaque cursor on (created_at, id)
+    rather than an offset, so a page costs the same however deep it is
+    and tasks added meanwhile don't shift later pages.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,130 @@
+import math
+
+from .sandbox import run_stress_cases
+
+# Sizes used when a task's stress_inputs doesn't list its own. A wide range
+# is what tells O(n) from O(n log n); slow solutions stop at the first size
+# that times out.
+DEFAULT_SIZES = [1000, 4000, 16000, 64000, 256000]
+
+# Each size is run this many times and the fastest run is kept, which
+# filters out most scheduling noise.
+DEFAULT_REPEAT = 3
+
+# Upper bounds on a report's runs, whatever a task's stress_inputs asks
+# for, so one report can't hold a sandbox slot indefinitely.
+MAX_SIZES = 6
+MAX_REPEAT = 5
+
+# Candidate growth curves, from slowest to fastest growing. On a tie the
+# slower-growing curve wins.
+COMPLEXITY_CLASSES = [
+    ('O(1)', lambda n: 1.0),
+    ('O(log n)', lambda n: math.log(n)),
+    ('O(n)', lambda n: float(n)),
+    ('O(n log n)', lambda n: n * math.log(n)),
+    ('O(n^2)', lambda n: float(n) ** 2),
+    ('O(n^3)', lambda n: float(n) ** 3),
+]
+
+# Fits need at least this many sizes that completed.
+MIN_POINTS = 3
+
+
+def fit_complexity(sizes, times):
+    """
+    Fit time = a + b * f(n) for every candidate f and pick the curve with the
+    smallest residual. Errors are weighted relative to each time, so the
+    largest size doesn't decide the fit on its own. Returns
+    {'class', 'residuals'}, or None when there aren't enough points.
+    """
+    if len(sizes) < MIN_POINTS:
+        return None
+    weights = [1.0 / max(t, 1e-3) ** 2 for t in times]
+    total = sum(weights)
+    mean_t = sum(w * t for w, t in zip(weights, times)) / total
+    scale = sum(w * (t - mean_t) ** 2 for w, t in zip(weights, times)) or 1.0
+    residuals = {}
+    for name, curve in COMPLEXITY_CLASSES:
+        xs = [curve(n) for n in sizes]
+        mean_x = sum(w * x for w, x in zip(weights, xs)) / total
+        var_x = sum(w * (x - mean_x) ** 2 for w, x in zip(weights, xs))
+        slope = sum(
+            w * (x - mean_x) * (t - mean_t) for w, x, t in zip(weights, xs, times)
+        ) / var_x if var_x else 0.0
+        # A curve that only fits by shrinking as n grows isn't a growth curve.
+        slope = max(slope, 0.0)
+        intercept = mean_t - slope * mean_x
+        error = sum(w * (t - intercept - slope * x) ** 2 for w, x, t in zip(weights, xs, times))
+        residuals[name] = round(error / scale, 6)
+    best = min(residuals, key=lambda name: residuals[name])
+    for name, _ in COMPLEXITY_CLASSES:
+        if residuals[name] <= residuals[best] * 1.05 + 1e-9:
+            best = name
+            break
+    return {'class': best, 'residuals': residuals}
+
+
+def stress_plan(stress_inputs):
+    """
+    (generator, sizes, repeat) from a task's stress_inputs, or None if it
+    doesn't define a generator. Sizes that aren't positive integers are
+    dropped, and sizes and repeat are capped at MAX_SIZES and MAX_REPEAT.
+    """
+    if not isinstance(stress_inputs, dict):
+        return None
+    generator = stress_inputs.get('generator')
+    if not isinstance(generator, str) or not generator.strip():
+        return None
+    sizes = stress_inputs.get('sizes') or DEFAULT_SIZES
+    if not isinstance(sizes, list):
+        sizes = DEFAULT_SIZES
+    sizes = sorted({size for size in sizes if isinstance(size, int) and not isinstance(size, bool) and size > 0})
+    repeat = stress_inputs.get('repeat') or DEFAULT_REPEAT
+    repeat = repeat if isinstance(repeat, int) and not isinstance(repeat, bool) else DEFAULT_REPEAT
+    return generator, (sizes or DEFAULT_SIZES)[:MAX_SIZES], min(max(1, repeat), MAX_REPEAT)
+
+
+def performance_report(code, stress_inputs):
+    """
+    Run code on a task's generated stress inputs and describe how it scales.
+
+    stress_inputs is PythonTask.stress_inputs:
+        {"generator": "def generate(n): ...", "sizes": [...], "repeat": 3}
+
+    Returns {"points": [{"size", "time_ms", "cpu_ms", "peak_rss_kb",
+    "error"}, ...], "complexity", "residuals"}. Sizes run in increasing
+    order, so peak_rss_kb (a high-water mark) is the peak up to that size.
+    stress_inputs must be usable (see stress_plan).
+    """
+    generator, sizes, repeat = stress_plan(stress_inputs)
+    runs = [size for size in sizes for _ in range(repeat)]
+    cases = run_stress_cases(code, generator, runs)
+
+    points = []
+    for offset, size in enumerate(sizes):
+        group = cases[offset * repeat:(offset + 1) * repeat]
+        if all(case['skipped'] for case in group):
+            break
+        failed = next((case for case in group if case['error']), None)
+        finished = [case for case in group if not case['error'] and not case['skipped']]
+        fastest = min(finished, key=lambda case: case['time_ms']) if finished else None
+        points.append({
+            'size': size,
+            'time_ms': fastest['time_ms'] if fastest else None,
+            'cpu_ms': fastest['cpu_ms'] if fastest else None,
+            'peak_rss_kb': max((case['peak_rss_kb'] for case in group if case['peak_rss_kb'] is not None), default=None),
+            'error': failed['error'] if failed else None,
+        })
+        if failed:
+            break
+
+    # CPU time is fitted rather than wall time: it doesn't include waiting
+    # for a busy host.
+    measured = [point for point in points if point['cpu_ms'] is not None and not point['error']]
+    fit = fit_complexity([point['size'] for point in measured], [point['cpu_ms'] for point in measured])
+    return {
+        'points': points,
+        'complexity': fit['class'] if fit else None,
+        'residuals': fit['residuals'] if fit else None,
+    }
@@ -0,0 +1,160 @@
+import ast
+import json
+from functools import lru_cache
+
+from .code_prep import ENTRY_POINTS, format_compile_error, parse_code
+
+# Rules applied when a task doesn't override them (PythonTask.preflight_rules
+# is merged over these). Every diagnostic is an error: the code is not run.
+DEFAULT_RULES = {
+    # Top-level modules student code may not import. While any are listed,
+    # __import__() and import_module() calls must name a literal module.
+    'forbidden_imports': ['os', 'subprocess', 'socket'],
+    # Require a main() or solution() function instead of a bare script.
+    'require_entry': False,
+    # Reject `while True:` loops that nothing can ever leave.
+    'infinite_loops': True,
+}
+
+
+def task_rules(task):
+    """The pre-flight rules for a PythonTask (or the defaults for None)."""
+    overrides = getattr(task, 'preflight_rules', None) or {}
+    return {**DEFAULT_RULES, **overrides}
+
+
+def _diagnostic(rule, message, node=None, line=None, col=None):
+    return {
+        'rule': rule,
+        'severity': 'error',
+        'message': message,
+        'line': getattr(node, 'lineno', line),
+        'col': getattr(node, 'col_offset', col),
+    }
+
+
+def _is_dynamic_import(node):
+    """An __import__() or import_module() call whose module isn't a string literal."""
+    if not isinstance(node, ast.Call) or _call_name(node) not in ('__import__', 'import_module'):
+        return False
+    module = node.args[0] if node.args else next(
+        (keyword.value for keyword in node.keywords if keyword.arg == 'name'), None
+    )
+    return not (isinstance(module, ast.Constant) and isinstance(module.value, str))
+
+
+def _imported_modules(node):
+    """Top-level module names imported by an import statement or call."""
+    if isinstance(node, ast.Import):
+        return [alias.name.split('.')[0] for alias in node.names]
+    if isinstance(node, ast.ImportFrom):
+        return [node.module.split('.')[0]] if node.module and not node.level else []
+    if isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant):
+        if _call_name(node) in ('__import__', 'import_module') and isinstance(node.args[0].value, str):
+            return [node.args[0].value.split('.')[0]]
+    return []
+
+
+def _is_always_true(test):
+    return isinstance(test, ast.Constant) and bool(test.value) and test.value is not Ellipsis
+
+
+def _call_name(node):
+    func = node.func
+    return func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+
+
+def _can_leave(loop):
+    """
+    True if anything in the loop body can end the loop: a break that belongs
+    to it, or a return, raise, yield or exit() call anywhere inside it. An
+    input() call counts too, since it raises EOFError once stdin runs out.
+    """
+    def visit(nodes, nested):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                continue
+            if isinstance(node, ast.Break) and not nested:
+                return True
+            if isinstance(node, (ast.Return, ast.Raise, ast.Yield, ast.YieldFrom, ast.Await)):
+                return True
+            if isinstance(node, ast.Call) and _call_name(node) in ('exit', 'quit', '_exit', 'input'):
+                return True
+            if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+                # A break in a nested loop's body only leaves that loop;
+                # its else clause still runs in ours.
+                if visit(node.body, True) or visit(node.orelse, nested):
+                    return True
+                continue
+            if visit(ast.iter_child_nodes(node), nested):
+                return True
+        return False
+
+    return visit(loop.body, False)
+
+
+@lru_cache(maxsize=1024)
+def _analyze(code, rules_key):
+    rules = json.loads(rules_key)
+    tree, exc = parse_code(code)
+    if exc is not None:
+        return (_diagnostic(
+            'syntax', format_compile_error(exc),
+            line=getattr(exc, 'lineno', None), col=getattr(exc, 'offset', None)
+        ),)
+
+    diagnostics = []
+    forbidden = set(rules.get('forbidden_imports') or [])
+    for node in ast.walk(tree):
+        for module in _imported_modules(node):
+            if module in forbidden:
+                diagnostics.append(_diagnostic(
+                    'forbidden-import', f"Importing '{module}' is not allowed here", node
+                ))
+        if forbidden and _is_dynamic_import(node):
+            diagnostics.append(_diagnostic(
+                'forbidden-import', "Import modules by name: computed module names are not allowed here", node
+            ))
+        if (rules.get('infinite_loops') and isinstance(node, ast.While)
+                and _is_always_true(node.test) and not _can_leave(node)):
+            diagnostics.append(_diagnostic(
+                'infinite-loop', "This loop never ends: it has no break, return or raise", node
+            ))
+
+    if rules.get('require_entry'):
+        names = {
+            node.name for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+        if not names.intersection(ENTRY_POINTS):
+            diagnostics.append(_diagnostic(
+                'missing-entry', f"Define a {' or '.join(f'{name}()' for name in ENTRY_POINTS)} function",
+                line=1, col=0
+            ))
+
+    diagnostics.sort(key=lambda diagnostic: (diagnostic['line'] or 0, diagnostic['col'] or 0))
+    return tuple(diagnostics)
+
+
+def preflight(code, rules=None):
+    """
+    Check code statically before anything is spawned for it. Returns a list
+    of diagnostics, {'rule', 'severity', 'message', 'line', 'col'}; an empty
+    list means the code may run. Memoized on the code and the rules.
+
+    The checks are advisory: they catch honest mistakes early, with a line
+    number, but code can still reach a forbidden module in ways no static
+    check sees (getattr on builtins, exec). What actually contains student
+    code is the sandbox's isolation and limits.
+    """
+    rules_key = json.dumps({**DEFAULT_RULES, **(rules or {})}, sort_keys=True)
+    return [dict(diagnostic) for diagnostic in _analyze(code, rules_key)]
+
+
+def format_diagnostics(diagnostics):
+    """One line per diagnostic, as shown in place of an execution error."""
+    return '\n'.join(
+        f"Line {diagnostic['line']}: {diagnostic['message']}" if diagnostic['line'] and diagnostic['rule'] != 'syntax'
+        else diagnostic['message']
+        for diagnostic in diagnostics
+    )
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .grading import grade_submission, grading_cases, test_cases_fingerprint
+from .models import PythonTask, Submission
+from .preflight import task_rules
+from .sandbox import default_parallelism
+
+# Submissions loaded, regraded and written back per round trip.
+DEFAULT_BATCH_SIZE = 500
+
+REGRADE_FIELDS = ['is_successful', 'error_message', 'output', 'test_cases_hash']
+
+
+def stale_submissions(task, fingerprint=None):
+    """Submissions for task graded against test cases other than its current ones."""
+    fingerprint = fingerprint or test_cases_fingerprint(task.test_cases)
+    return Submission.objects.filter(task=task).exclude(test_cases_hash=fingerprint)
+
+
+def _case_key(test_input, expected_output):
+    return json.dumps([test_input, expected_output])
+
+
+def _stored_results(submission):
+    """Previous per-case results that actually ran, keyed by (input, expected output)."""
+    try:
+        results = json.loads(submission.output or '[]')
+    except ValueError:
+        return {}
+    if not isinstance(results, list):
+        return {}
+    return {
+        _case_key(result.get('input'), result.get('expected_output')): result
+        for result in results
+        if isinstance(result, dict) and not result.get('skipped')
+    }
+
+
+def regrade_submission(submission, task, cases, fingerprint):
+    """
+    Bring one submission up to date with the task's current test cases,
+    running only the cases it has no stored result for (added or edited
+    ones); results for removed cases are dropped. Updates the instance in
+    place and returns the number of cases that were run.
+    """
+    stored = _stored_results(submission)
+    missing = [case for case in cases if _case_key(case['input'], case['expectedOutput']) not in stored]
+    fresh = {}
+    if missing:
+        result = grade_submission(
+            submission.code, missing, task_id=task.pk, preflight_rules=task_rules(task)
+        )
+        fresh = {
+            _case_key(case['input'], case['expectedOutput']): case_result
+            for case, case_result in zip(missing, result['results'])
+        }
+
+    results = []
+    for index, case in enumerate(cases):
+        key = _case_key(case['input'], case['expectedOutput'])
+        results.append({**(fresh.get(key) or stored[key]), 'test_case_index': index})
+
+    errors = [result['error'] for result in results if result.get('error')]
+    submission.is_successful = bool(results) and all(result['passed'] for result in results)
+    submission.error_message = errors[0] if errors else None
+    submission.output = json.dumps(results)
+    submission.test_cases_hash = fingerprint
+    return len(missing)
+
+
+def regrade(tasks=None, workers=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Regrade every stale submission of tasks (all tasks by default).
+
+    Submissions are read in id order, batch_size at a time (keyset
+    pagination, so memory stays flat however many there are), graded
+    concurrently on the sandbox worker pool, and written back with one
+    bulk_update per batch. Each written submission carries the task's new
+    test case fingerprint, so a finished batch is never redone: an
+    interrupted run resumes by simply running again.
+
+    The concurrency is threads rather than processes on purpose: a thread
+    spends nearly all its time waiting on a sandbox subprocess or the
+    database, with the GIL released. The warm sandbox pool is also per
+    process, so worker processes would each start a pool of their own and
+    overcommit the host.
+
+    progress(task, done, total, cases_run) is called after every batch.
+    Returns {'submissions': n, 'cases_run': n}.
+    """
+    tasks = PythonTask.objects.all().order_by('id') if tasks is None else tasks
+    workers = workers or default_parallelism()
+    totals = {'submissions': 0, 'cases_run': 0}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for task in tasks:
+            fingerprint = test_cases_fingerprint(task.test_cases)
+            cases = grading_cases(task.test_cases)
+            stale = stale_submissions(task, fingerprint)
+            total = stale.count()
+            done = 0
+            last_id = 0
+            while True:
+                batch = list(stale.filter(id__gt=last_id).order_by('id').only('id', 'code', 'output')[:batch_size])
+                if not batch:
+                    break
+                cases_run = sum(executor.map(
+                    lambda submission: regrade_submission(submission, task, cases, fingerprint), batch
+                ))
+                Submission.objects.bulk_update(batch, REGRADE_FIELDS)
+                done += len(batch)
+                last_id = batch[-1].id
+                totals['submissions'] += len(batch)
+                totals['cases_run'] += cases_run
+                if progress is not None:
+                    progress(task, done, total, cases_run)
+    return totals
+
+
+def regrade_in_background(task_ids):
+    """Run regrade for task_ids on a daemon thread (used by the admin action)."""
+    def run():
+        started = time.monotonic()
+        try:
+            totals = regrade(PythonTask.objects.filter(pk__in=task_ids).order_by('id'))
+            print(f"Regrade of task(s) {task_ids} finished in {time.monotonic() - started:.1f}s: {totals}")
+        except Exception as e:
+            import traceback
+            print(f"Error regrading task(s) {task_ids}: {str(e)}")
+            print(traceback.format_exc())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,649 @@
+import json
+import math
+import os
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .code_prep import prepare_code
+
+HARNESS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'harness.py')
+
+# Wall-clock budget for a single test case, matching process_code_locally.
+CASE_TIMEOUT = 3
+
+
+class WorkerAborted(Exception):
+    """
+    The job was stopped before it finished; args[0] holds the frames read
+    so far and counter names the pool statistic it is counted under.
+    """
+    counter = 'aborted'
+
+
+class WorkerTimeout(WorkerAborted):
+    """The harness did not finish the job before its deadline."""
+    counter = 'timed_out'
+
+
+class WorkerOutputLimit(WorkerAborted):
+    """The harness wrote more than its output budget."""
+    counter = 'output_limited'
+
+# How often a cancellable read checks its cancel event.
+CANCEL_POLL_INTERVAL = 0.05
+
+# Sent to a harness to stop the job it is running (see harness._stop_job).
+STOP_SIGNAL = getattr(signal, 'SIGUSR1', None)
+
+
+def sandbox_limits():
+    """Per-job resource limits applied by the harness, from settings."""
+    return {
+        'cpu_seconds': getattr(settings, 'SANDBOX_CPU_SECONDS', 2),
+        'memory_mb': getattr(settings, 'SANDBOX_MEMORY_MB', 256),
+        'file_size_mb': getattr(settings, 'SANDBOX_FILE_SIZE_MB', 1),
+        'processes': getattr(settings, 'SANDBOX_MAX_PROCESSES', 0),
+        'max_output': getattr(settings, 'SANDBOX_MAX_OUTPUT_BYTES', 65536),
+    }
+
+
+def job_output_budget(job):
+    """
+    Bytes the parent reads from one job before giving up: every case's
+    capped output, JSON-escaped in the worst case, plus frame overhead.
+    """
+    max_output = (job.get('limits') or {}).get('max_output')
+    if not max_output:
+        return None
+    return (len(job.get('inputs', [])) + 1) * (max_output * 6 + 4096)
+
+
+def spawn_harness(serve=False, kernel=False):
+    """Start a harness interpreter in its own process group."""
+    args = [sys.executable, '-I', HARNESS_PATH]
+    if serve:
+        args.append('--serve')
+    if kernel:
+        args.append('--kernel')
+    return subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+
+def kill_harness(process):
+    """Kill a harness and anything it forked."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    process.wait()
+
+
+def stop_job(process):
+    """
+    Ask a harness to stop its current job: it kills the job's child and
+    reports the job done, so a warm worker stays usable.
+    """
+    try:
+        os.kill(process.pid, STOP_SIGNAL)
+    except (ProcessLookupError, TypeError):
+        # Already gone, or no such signal here (the job simply runs to the end).
+        pass
+
+
+def iter_frames(process, deadline, cancel=None, max_bytes=None):
+    """
+    Yield newline-delimited JSON frames from the harness as they arrive,
+    until a "done" frame, EOF or the monotonic deadline. Raises
+    WorkerTimeout, or WorkerOutputLimit after max_bytes. Once the optional
+    cancel event is set the job is stopped (stop_job), and the frames it
+    sends until its "done" frame are still read.
+
+    The harness already truncates each case's output; max_bytes is the
+    backstop for a child that floods the channel some other way.
+    """
+    buffer = b''
+    received = 0
+    fd = process.stdout.fileno()
+    while True:
+        if cancel is not None and cancel.is_set():
+            stop_job(process)
+            cancel = None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WorkerTimeout()
+        wait = remaining if cancel is None else min(remaining, CANCEL_POLL_INTERVAL)
+        ready, _, _ = select.select([fd], [], [], wait)
+        if not ready:
+            continue
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise WorkerOutputLimit()
+        buffer += chunk
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            try:
+                frame = json.loads(line)
+            except ValueError:
+                continue
+            yield frame
+            if frame.get('type') == 'done':
+                return
+
+
+def read_frames(process, deadline, cancel=None, max_bytes=None, stop_when=None):
+    """
+    Collect the frames of iter_frames. Returns (frames, finished); an abort
+    is re-raised with the frames read so far as its argument. The job is
+    stopped after the first case frame for which stop_when(frame) is true.
+    """
+    frames = []
+    try:
+        for frame in iter_frames(process, deadline, cancel, max_bytes):
+            frames.append(frame)
+            if stop_when is not None and frame.get('type') == 'case' and stop_when(frame):
+                stop_job(process)
+                stop_when = None
+    except WorkerAborted as exc:
+        raise type(exc)(frames) from None
+    return frames, bool(frames) and frames[-1].get('type') == 'done'
+
+
+class _Worker:
+    def __init__(self):
+        self.process = spawn_harness(serve=True)
+        self.jobs = 0
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def run(self, job, deadline, cancel=None, stop_when=None):
+        self.jobs += 1
+        self.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return read_frames(self.process, deadline, cancel, job_output_budget(job), stop_when)
+
+    def stream(self, job, deadline):
+        self.jobs += 1
+        self.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return iter_frames(self.process, deadline, max_bytes=job_output_budget(job))
+
+    def kill(self):
+        kill_harness(self.process)
+
+
+class WorkerPool:
+    """
+    A fixed number of pre-spawned, pre-imported harness workers.
+
+    Each worker runs every job in a forked child, so jobs stay isolated while
+    skipping interpreter start-up. Workers are recycled after max_jobs jobs,
+    and killed and replaced when a job crashes them or runs past its
+    deadline. When every worker is busy, callers fall back to a cold spawn.
+    """
+
+    def __init__(self, size, max_jobs):
+        self.size = size
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._idle = []
+        self._busy = 0
+        self._spawning = 0
+        self._counters = {
+            'jobs': 0, 'spawned': 0, 'recycled': 0, 'crashed': 0, 'timed_out': 0, 'cancelled': 0,
+            'output_limited': 0, 'cold_spawns': 0,
+        }
+        for _ in range(size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self):
+        worker = _Worker()
+        with self._lock:
+            self._counters['spawned'] += 1
+        return worker
+
+    def _replenish(self):
+        try:
+            worker = self._spawn()
+        finally:
+            with self._lock:
+                self._spawning -= 1
+        with self._lock:
+            self._idle.append(worker)
+
+    def _replace(self, worker, reason):
+        worker.kill()
+        with self._lock:
+            self._counters[reason] += 1
+            self._spawning += 1
+        threading.Thread(target=self._replenish, daemon=True).start()
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    self._busy += 1
+                    return worker
+                self._counters['crashed'] += 1
+                self._spawning += 1
+                threading.Thread(target=self._replenish, daemon=True).start()
+            self._counters['cold_spawns'] += 1
+            return None
+
+    def _release(self, worker, reason=None):
+        with self._lock:
+            self._busy -= 1
+            self._counters['jobs'] += 1
+            if reason is None:
+                if worker.jobs < self.max_jobs and worker.is_alive():
+                    self._idle.append(worker)
+                    return
+                reason = 'recycled'
+        self._replace(worker, reason)
+
+    def run(self, job, deadline, cancel=None, stop_when=None):
+        """
+        Run job on a warm worker. Returns (frames, finished, exit_code), or
+        None if no worker is free; raises a WorkerAborted subclass. A job
+        stopped early (cancel, stop_when) leaves the worker in the pool.
+        """
+        worker = self._acquire()
+        if worker is None:
+            return None
+        try:
+            frames, finished = worker.run(job, deadline, cancel, stop_when)
+        except WorkerAborted as exc:
+            self._release(worker, exc.counter)
+            raise
+        except OSError:
+            # The worker died while idle or mid-write; let the caller cold-spawn.
+            self._release(worker, 'crashed')
+            return None
+        if not finished:
+            exit_code = worker.process.poll()
+            self._release(worker, 'crashed')
+            return frames, False, exit_code
+        self._release(worker)
+        return frames, True, None
+
+    def stream(self, job, deadline):
+        """
+        Like run, but returns an iterator over the job's frames as they
+        arrive, or None if no worker is free. Closing the iterator before
+        the "done" frame kills the worker's job.
+        """
+        worker = self._acquire()
+        if worker is None:
+            return None
+        try:
+            frames = worker.stream(job, deadline)
+        except OSError:
+            self._release(worker, 'crashed')
+            return None
+        return self._relay(worker, frames)
+
+    def _relay(self, worker, frames):
+        # Anything but a "done" frame or a clean EOF means the consumer went away.
+        reason = 'cancelled'
+        try:
+            for frame in frames:
+                if frame.get('type') == 'done':
+                    reason = None
+                yield frame
+            if reason is not None:
+                reason = 'crashed'
+        except WorkerAborted as exc:
+            reason = exc.counter
+            raise
+        finally:
+            self._release(worker, reason)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'spawning': self._spawning,
+                **self._counters,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide worker pool, creating it on first use."""
+    global _pool
+    size = getattr(settings, 'SANDBOX_POOL_SIZE', 0)
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(size, getattr(settings, 'SANDBOX_POOL_MAX_JOBS', 100))
+        return _pool
+
+
+def _run_cold(job, deadline, cancel=None, stop_when=None):
+    process = spawn_harness()
+    try:
+        process.stdin.write(json.dumps(job).encode('utf-8'))
+        process.stdin.close()
+        frames, finished = read_frames(process, deadline, cancel, job_output_budget(job), stop_when)
+    except WorkerAborted:
+        kill_harness(process)
+        raise
+    process.wait()
+    return frames, finished, process.returncode
+
+
+def _stream_cold(job, deadline):
+    process = spawn_harness()
+    finished = False
+    try:
+        process.stdin.write(json.dumps(job).encode('utf-8'))
+        process.stdin.close()
+        for frame in iter_frames(process, deadline, max_bytes=job_output_budget(job)):
+            yield frame
+        finished = True
+    finally:
+        if finished:
+            process.wait()
+        else:
+            kill_harness(process)
+
+
+@contextmanager
+def code_delivery(job):
+    """
+    Deliver the job's code the way SANDBOX_CODE_DELIVERY says. "stdin" (the
+    default) sends it inline in the job, so nothing is written to disk;
+    "tempfile" writes it to a temporary file the harness reads by path, and
+    removes the file afterwards.
+    """
+    if getattr(settings, 'SANDBOX_CODE_DELIVERY', 'stdin') != 'tempfile' or 'code' not in job:
+        yield job
+        return
+    with tempfile.NamedTemporaryFile('w', suffix='.py', encoding='utf-8', delete=False) as code_file:
+        code_file.write(job['code'])
+    try:
+        yield {key: value for key, value in job.items() if key != 'code'} | {'code_path': code_file.name}
+    finally:
+        os.unlink(code_file.name)
+
+
+def run_job(job, deadline, cancel=None, stop_when=None):
+    """
+    Run a harness job on a warm pool worker, or in a freshly spawned
+    interpreter when the pool is disabled or exhausted.
+    Returns (frames, finished, exit_code); raises a WorkerAborted subclass.
+    The job is stopped once the cancel event is set or after the first case
+    frame for which stop_when(frame) is true.
+    """
+    with code_delivery(job) as job:
+        pool = get_pool()
+        if pool is not None:
+            result = pool.run(job, deadline, cancel, stop_when)
+            if result is not None:
+                return result
+        return _run_cold(job, deadline, cancel, stop_when)
+
+
+def run_test_cases(code, inputs, case_timeout=CASE_TIMEOUT,
+                   expected=None, fail_fast=False, cancel=None):
+    """
+    Run code against every input inside a single sandboxed interpreter.
+    The code is prepared by code_prep.prepare_code first; code that doesn't
+    compile is answered right away without spawning anything.
+
+    Returns a list with one dict per input, in order:
+        {"index", "output", "error", "timed_out", "skipped", "time_ms",
+         "cpu_ms", "peak_rss_kb"}
+    The harness runs under sandbox_limits(): CPU seconds per case, address
+    space, file size, process count, and output truncated past a byte cap.
+    Cases that never reported back (the child crashed or hit the overall
+    deadline) get an explanatory error instead of an output. With fail_fast
+    and the expected outputs, cases after the first failure are skipped, as
+    are cases that hadn't run when the cancel event was set.
+
+    The expected outputs never reach the sandbox: each case is checked here
+    as its frame arrives, and the job is stopped at the first failure.
+    """
+    prepared = prepare_code(code)
+    if prepared.error:
+        return _prepare_failed(prepared, len(inputs), fail_fast and expected is not None)
+
+    job = {
+        'code': code, 'inputs': list(inputs), 'case_timeout': case_timeout,
+        'entry': prepared.entry, 'entry_arity': prepared.entry_arity,
+        'limits': sandbox_limits(),
+    }
+    stop_when = None
+    if fail_fast:
+        def stop_when(frame):
+            mismatch = expected is not None and frame.get('output') != expected[frame['index']]
+            return bool(frame.get('error')) or mismatch
+    return _run_cases(job, cancel, stop_when)
+
+
+def run_stress_cases(code, generator, sizes, case_timeout=CASE_TIMEOUT):
+    """
+    Run code on inputs built inside the sandbox by generator, the source of
+    a generate(n) function, one per size. Same limits and result dicts as
+    run_test_cases; cases after the first error or timeout are skipped,
+    since larger sizes would only fail the same way, more slowly.
+    """
+    prepared = prepare_code(code)
+    if prepared.error:
+        return _prepare_failed(prepared, len(sizes), skip_rest=True)
+    job = {
+        'code': code, 'inputs': list(sizes), 'case_timeout': case_timeout,
+        'entry': prepared.entry, 'entry_arity': prepared.entry_arity,
+        'generator': generator, 'limits': sandbox_limits(),
+    }
+    return _run_cases(job, stop_when=lambda frame: bool(frame.get('error')))
+
+
+def _prepare_failed(prepared, count, skip_rest):
+    return [
+        {
+            'index': index, 'output': '', 'error': prepared.error, 'timed_out': False,
+            'skipped': skip_rest and index > 0, 'time_ms': 0.0,
+            'cpu_ms': 0.0, 'peak_rss_kb': None,
+        }
+        for index in range(count)
+    ]
+
+
+def _run_cases(job, cancel=None, stop_when=None):
+    """
+    Run a prepared harness job and turn its frames into one dict per case.
+    Cases after the first one for which stop_when(frame) is true, and those
+    that hadn't reported when the cancel event was set, come back skipped.
+    """
+    inputs = job['inputs']
+    case_timeout = job['case_timeout']
+    # Per-case timeouts are enforced by the harness itself; this deadline is a
+    # backstop for code that swallows the timeout or hangs the interpreter.
+    budget = case_timeout * (len(inputs) + 1) + 1
+
+    timed_out = False
+    try:
+        frames, finished, exit_code = run_job(job, time.monotonic() + budget, cancel, stop_when)
+    except WorkerTimeout as exc:
+        frames, finished, exit_code = exc.args[0], False, None
+        timed_out = True
+        reason = f"Code execution timed out after {budget} seconds"
+    except WorkerOutputLimit as exc:
+        frames, finished, exit_code = exc.args[0], False, None
+        reason = "Output limit exceeded"
+    else:
+        done = frames[-1] if finished else {}
+        exit_code = done.get('exit_code', exit_code)
+        reason = f"Process exited with code {exit_code}"
+
+    results = {
+        frame['index']: frame for frame in frames
+        if frame.get('type') == 'case'
+    }
+    stopped_at = None
+    if stop_when is not None:
+        stopped_at = next((index for index in sorted(results) if stop_when(results[index])), None)
+    # A stopped job ends with its child killed; that is no failure.
+    stopped = stopped_at is not None or (cancel is not None and cancel.is_set())
+    if not finished or (exit_code and not stopped):
+        print(f"Sandbox run did not finish cleanly: {reason}")
+
+    cases = []
+    for index in range(len(inputs)):
+        frame = results.get(index)
+        if stopped_at is not None and index > stopped_at:
+            # It may have run before the stop arrived; report it skipped all the same.
+            frame = {'skipped': True}
+        elif frame is None and stopped and finished:
+            frame = {'skipped': True}
+        if frame is None:
+            cases.append({
+                'index': index, 'output': '', 'error': reason, 'timed_out': timed_out,
+                'skipped': False, 'time_ms': None, 'cpu_ms': None, 'peak_rss_kb': None,
+            })
+        else:
+            cases.append({
+                'index': index,
+                'output': frame.get('output', ''),
+                'error': frame.get('error'),
+                'timed_out': frame.get('timed_out', False),
+                'skipped': frame.get('skipped', False),
+                'time_ms': frame.get('time_ms'),
+                'cpu_ms': frame.get('cpu_ms'),
+                'peak_rss_kb': frame.get('peak_rss_kb'),
+            })
+    return cases
+
+
+def stream_code(code, test_input='', case_timeout=CASE_TIMEOUT):
+    """
+    Run code once against test_input and yield its frames while it runs:
+    {"type": "chunk", "stream", "data"} for stdout/stderr as they are
+    written, then the case frame (error, timed_out, time_ms, cpu_ms,
+    peak_rss_kb) and finally {"type": "done", "exit_code"}.
+    A run that is aborted still ends with a case frame and a done frame.
+    """
+    prepared = prepare_code(code)
+    if prepared.error:
+        yield {**_prepare_failed(prepared, 1, False)[0], 'type': 'case'}
+        yield {'type': 'done', 'exit_code': 1}
+        return
+
+    job = {
+        'code': code, 'inputs': [test_input], 'case_timeout': case_timeout,
+        'entry': prepared.entry, 'entry_arity': prepared.entry_arity,
+        'stream': True, 'limits': sandbox_limits(),
+    }
+    budget = case_timeout * 2 + 1
+    deadline = time.monotonic() + budget
+    reported = False
+    with code_delivery(job) as job:
+        pool = get_pool()
+        frames = pool.stream(job, deadline) if pool is not None else None
+        if frames is None:
+            frames = _stream_cold(job, deadline)
+
+        try:
+            for frame in frames:
+                if frame.get('type') == 'case':
+                    reported = True
+                if frame.get('type') == 'done':
+                    break
+                yield frame
+            error = None if reported else "Process exited before reporting a result"
+            timed_out = False
+        except WorkerTimeout:
+            error, timed_out = f"Code execution timed out after {budget} seconds", True
+        except WorkerOutputLimit:
+            error, timed_out = "Output limit exceeded", False
+        finally:
+            frames.close()
+    if not reported:
+        yield {
+            'type': 'case', 'index': 0, 'output': '', 'error': error, 'timed_out': timed_out,
+            'time_ms': None, 'cpu_ms': None, 'peak_rss_kb': None,
+        }
+        yield {'type': 'done', 'exit_code': 1}
+    else:
+        yield {'type': 'done', 'exit_code': frame.get('exit_code', 0) if frame.get('type') == 'done' else 1}
+
+
+def default_parallelism():
+    """Parallel grading uses at most one worker per core, and at most the pool size."""
+    cores = os.cpu_count() or 1
+    return max(1, min(cores, getattr(settings, 'SANDBOX_POOL_SIZE', 0) or cores))
+
+
+def run_test_cases_parallel(code, inputs, case_timeout=CASE_TIMEOUT, expected=None,
+                            fail_fast=False, max_workers=None):
+    """
+    Like run_test_cases, but fans the inputs out over up to max_workers
+    sandboxed interpreters at once, each loading the module once for its
+    share of the cases. With fail_fast, the first failing case cancels every
+    chunk still running; cases that hadn't finished come back as skipped.
+    """
+    inputs = list(inputs)
+    if not inputs:
+        return []
+    fail_fast = fail_fast and expected is not None
+    max_workers = max(1, min(max_workers or default_parallelism(), len(inputs)))
+    size = math.ceil(len(inputs) / max_workers)
+    chunks = [range(start, min(start + size, len(inputs))) for start in range(0, len(inputs), size)]
+    cancel = threading.Event() if fail_fast else None
+
+    def run_chunk(indices):
+        if cancel is not None and cancel.is_set():
+            return indices, [{'output': '', 'error': None, 'timed_out': False, 'skipped': True,
+                              'time_ms': None, 'cpu_ms': None, 'peak_rss_kb': None}
+                             for _ in indices]
+        cases = run_test_cases(
+            code,
+            [inputs[i] for i in indices],
+            case_timeout=case_timeout,
+            expected=[expected[i] for i in indices] if expected is not None else None,
+            fail_fast=fail_fast,
+            cancel=cancel,
+        )
+        if fail_fast and any(
+            not case['skipped'] and (case['error'] or case['output'] != expected[i])
+            for i, case in zip(indices, cases)
+        ):
+            cancel.set()
+        return indices, cases
+
+    merged = [None] * len(inputs)
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        for indices, cases in executor.map(run_chunk, chunks):
+            for i, case in zip(indices, cases):
+                merged[i] = {**case, 'index': i}
+    return merged
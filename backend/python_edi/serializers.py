@@ -1,10 +1,28 @@
 from rest_framework import serializers
-from .models import PythonTask, Submission, ChatMessage
+from .models import PythonTask, Submission, ChatMessage, GradingJob
 
 class PythonTaskSerializer(serializers.ModelSerializer):
+    """
+    Pass fields=[...] to serialize only those fields (a sparse fieldset,
+    e.g. from the task list's ?fields= parameter).
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = PythonTask
-        fields = '__all__'
+        # Public task endpoints are AllowAny: the reference solution, stress
+        # generator, pre-flight rules and pool/index bookkeeping are only
+        # shown and edited in the admin.
+        fields = [
+            'id', 'title', 'description', 'difficulty', 'expected_output', 'test_cases', 'hints',
+            'duplicate_of', 'revision', 'created_at',
+        ]
+        read_only_fields = ['duplicate_of', 'revision', 'created_at']
 
 class SubmissionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,4 +34,12 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatMessage
         fields = '__all__'
-        read_only_fields = ['is_from_user'] 
\ No newline at end of file
+        read_only_fields = ['is_from_user']
+
+class GradingJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = GradingJob
+        fields = ['job_id', 'status', 'attempts', 'result', 'error_message', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,62 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import PythonTask
+from .task_cache import forget_task_payloads
+from .task_index import get_task_index, task_signature
+from .task_selection import get_random_task_index
+
+SIGNATURE_FIELDS = {'title', 'description', 'test_cases'}
+
+
+@receiver(pre_save, sender=PythonTask)
+def update_task_signature(sender, instance, update_fields=None, **kwargs):
+    """Keep the near-duplicate signature in step with the task's content."""
+    if update_fields is not None and not SIGNATURE_FIELDS.intersection(update_fields):
+        return
+    instance.signature = task_signature(instance.title, instance.description, instance.test_cases)
+
+
+@receiver(pre_save, sender=PythonTask)
+def bump_task_revision(sender, instance, **kwargs):
+    """
+    Give every save of an existing task a new revision (new ETags, new cached
+    payloads). The database does the increment, so two saves of the same
+    task can't both write the same revision; index_saved_task reads the new
+    value back.
+    """
+    if not instance._state.adding:
+        instance.revision = F('revision') + 1
+
+
+@receiver(post_save, sender=PythonTask)
+def index_saved_task(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None:
+        # A partial save doesn't write what the pre_save receivers refreshed.
+        missed = {'revision': instance.revision}
+        if SIGNATURE_FIELDS.intersection(update_fields):
+            missed['signature'] = instance.signature
+        missed = {name: value for name, value in missed.items() if name not in update_fields}
+        if missed:
+            PythonTask.objects.filter(pk=instance.pk).update(**missed)
+    if not created:
+        instance.refresh_from_db(fields=['revision'])
+        forget_task_payloads(instance.pk, instance.revision - 1)
+    get_task_index().add(instance)
+    get_random_task_index().update(instance)
+
+
+@receiver(pre_delete, sender=PythonTask)
+def bump_duplicate_revisions(sender, instance, **kwargs):
+    # Deleting a canonical task unlinks its duplicates without saving them.
+    PythonTask.objects.filter(duplicate_of=instance).update(revision=F('revision') + 1)
+
+
+@receiver(post_delete, sender=PythonTask)
+def unindex_deleted_task(sender, instance, **kwargs):
+    get_task_index().remove(instance.pk)
+    forget_task_payloads(instance.pk, instance.revision)
+    # Deleting a canonical task also unlinks its duplicates (without
+    # signals), so reload the random-task lists rather than patch them.
+    get_random_task_index().invalidate()
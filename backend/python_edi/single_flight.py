@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+_MISSING = object()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one: while a call for a key is
+    running, other callers with the same key wait for it and get its result
+    instead of making their own.
+
+    Threads of one process share the call through an in-memory table. Across
+    processes, the first caller takes a lease in the default cache (cache.add)
+    and publishes its result there under the lease's token; callers in other
+    processes poll for it. With a per-process cache backend (locmem), only
+    the in-process part applies.
+
+    A leader that raises shares the exception with its threads, but nothing
+    is published to other processes: their callers see the lease go away
+    and one of them makes the call itself.
+    """
+
+    def __init__(self, prefix, lease, poll_interval=0.1):
+        self.prefix = prefix
+        # Longest a call may take before other processes stop waiting for it.
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {'calls': 0, 'joined': 0, 'joined_remote': 0}
+
+    def do(self, key, fn):
+        """Return fn(), or the result of the identical call already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._counters['joined'] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._across_processes(key, fn)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _across_processes(self, key, fn):
+        lease_key = f"{self.prefix}:{key}"
+        token = uuid.uuid4().hex
+        while True:
+            if cache.add(lease_key, token, timeout=self.lease):
+                with self._lock:
+                    self._counters['calls'] += 1
+                try:
+                    result = fn()
+                    # Published before the lease goes, so a poller sees one or the other.
+                    cache.set(f"{lease_key}:{token}", result, timeout=self.lease)
+                    return result
+                finally:
+                    if cache.get(lease_key) == token:
+                        cache.delete(lease_key)
+
+            leader = cache.get(lease_key)
+            if leader is None:
+                continue
+            result = self._wait_for(lease_key, leader)
+            if result is not _MISSING:
+                with self._lock:
+                    self._counters['joined_remote'] += 1
+                return result
+            # The leader failed or its lease ran out: try to take over.
+
+    def _wait_for(self, lease_key, leader):
+        deadline = time.monotonic() + self.lease
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            result = cache.get(f"{lease_key}:{leader}", _MISSING)
+            if result is not _MISSING:
+                return result
+            if cache.get(lease_key) != leader:
+                return cache.get(f"{lease_key}:{leader}", _MISSING)
+        return _MISSING
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'in_flight': len(self._calls)}
+
+
+_assistance_flight = None
+_assistance_flight_lock = threading.Lock()
+
+
+def assistance_flight():
+    """The SingleFlight shared by AI assistance calls in this process."""
+    global _assistance_flight
+    with _assistance_flight_lock:
+        if _assistance_flight is None:
+            _assistance_flight = SingleFlight(
+                'assistance-flight', getattr(settings, 'AI_SINGLE_FLIGHT_LEASE', 120)
+            )
+        return _assistance_flight
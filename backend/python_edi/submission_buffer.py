@@ -0,0 +1,127 @@
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Submission
+
+
+class SubmissionBuffer:
+    """
+    Write-behind buffer for graded submissions.
+
+    Submissions are collected in memory and written with a single
+    bulk_create once max_records are pending or the oldest one has waited
+    max_delay_ms, so a burst of submissions costs one INSERT per batch rather
+    than one per request. Pending rows are flushed at interpreter exit, and
+    a failed flush keeps its rows for the next attempt.
+
+    The trade-off is durability: until they are flushed, rows exist only in
+    this process's memory. A process that is killed outright (SIGKILL, the
+    OOM killer, a crash) or stopped by a signal it has no handler for loses
+    up to max_records submissions, or max_delay_ms worth of them. A graceful
+    exit doesn't: Gunicorn workers exit normally on SIGTERM, so the atexit
+    flush runs, and grade_worker flushes once its SIGTERM handler has let
+    the job in hand finish. Queued grading keeps the verdict in its
+    GradingJob either way; only the Submission history row is at risk.
+    """
+
+    def __init__(self, max_records, max_delay_ms):
+        self.max_records = max_records
+        self.max_delay = max_delay_ms / 1000
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self.flushed = 0
+
+    def add(self, submission):
+        with self._lock:
+            self._pending.append(submission)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.max_records
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, daemon=True)
+                self._flusher.start()
+        if full:
+            try:
+                self.flush()
+                return
+            except Exception:
+                # Leave the rows to the background flusher's retry.
+                pass
+        self._wakeup.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write every pending submission now. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._oldest = None
+            if not batch:
+                return 0
+            try:
+                Submission.objects.bulk_create(batch, batch_size=self.max_records)
+            except Exception as e:
+                print(f"Error flushing {len(batch)} submission(s): {str(e)}")
+                with self._lock:
+                    self._pending = batch + self._pending
+                    self._oldest = self._oldest or time.monotonic()
+                raise
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                oldest = self._oldest
+            if oldest is None:
+                continue
+            time.sleep(max(0, oldest + self.max_delay - time.monotonic()))
+            try:
+                self.flush()
+            except Exception:
+                # Rows are kept; try again after another delay.
+                time.sleep(self.max_delay)
+                self._wakeup.set()
+            finally:
+                # This thread's connection would otherwise stay open forever.
+                connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_submission_buffer():
+    """Return the process-wide submission buffer, creating it on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = SubmissionBuffer(
+                getattr(settings, 'SUBMISSION_BUFFER_SIZE', 50),
+                getattr(settings, 'SUBMISSION_BUFFER_FLUSH_MS', 500)
+            )
+            atexit.register(flush_submissions)
+        return _buffer
+
+
+def flush_submissions():
+    """Flush pending submissions, e.g. before a worker process exits."""
+    if _buffer is not None:
+        try:
+            return _buffer.flush()
+        except Exception:
+            return 0
+    return 0
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.response import Response
+
+HITS_KEY = 'task-payload-stats:hits'
+MISSES_KEY = 'task-payload-stats:misses'
+NOT_MODIFIED_KEY = 'task-payload-stats:not-modified'
+
+# The cached responses, one payload per kind and task revision.
+KINDS = ('detail', 'hints')
+
+
+def _count(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+# Part of every payload key; bump it when the payloads' shape changes so
+# entries rendered by older code are never served.
+PAYLOAD_FORMAT = 2
+
+
+def _payload_key(kind, task_id, revision):
+    return f"task-payload:v{PAYLOAD_FORMAT}:{kind}:{task_id}:{revision}"
+
+
+def task_etag(kind, task_id, revision):
+    return f'"{kind}-{task_id}-{revision}"'
+
+
+def forget_task_payloads(task_id, revision):
+    """Drop the cached payloads of one revision of a task."""
+    cache.delete_many([_payload_key(kind, task_id, revision) for kind in KINDS])
+
+
+def cached_payload(kind, task_id, revision, build):
+    """The payload of kind for this task revision, built with build() on a miss."""
+    key = _payload_key(kind, task_id, revision)
+    payload = cache.get(key)
+    if payload is not None:
+        _count(HITS_KEY)
+        return payload
+    _count(MISSES_KEY)
+    payload = build()
+    cache.set(key, payload, timeout=getattr(settings, 'TASK_PAYLOAD_CACHE_TTL', 3600))
+    return payload
+
+
+def conditional_task_response(request, kind, queryset, task_id, build, render=None):
+    """
+    Response for a task payload that rarely changes, or None if the task
+    isn't in queryset.
+
+    Only the task's revision is read from the database. A request whose
+    If-None-Match has the current ETag gets a 304; otherwise the payload
+    comes from the cache (built with build() on a miss) and is passed
+    through render(payload), if given, for request-specific variations.
+    """
+    try:
+        revision = queryset.filter(pk=task_id).values_list('revision', flat=True).first()
+    except (TypeError, ValueError):
+        revision = None  # Not a valid primary key.
+    if revision is None:
+        return None
+    etag = task_etag(kind, task_id, revision)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        _count(NOT_MODIFIED_KEY)
+    else:
+        payload = cached_payload(kind, task_id, revision, build)
+        response = render(payload) if render is not None else Response(payload)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        patch_cache_control(response, max_age=getattr(settings, 'TASK_HTTP_MAX_AGE', 60))
+    return response
+
+
+def task_payload_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'not_modified': cache.get(NOT_MODIFIED_KEY, 0),
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
@@ -0,0 +1,150 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection
+
+from .grading import grade_submission, grading_cases
+from .models import PythonTask
+from .openai_utils import generate_python_tasks
+from .preflight import format_diagnostics
+from .sandbox import default_parallelism
+from .task_index import DuplicateTask, find_duplicate
+
+# Tasks asked for per API call.
+DEFAULT_BATCH_SIZE = 5
+
+# API calls in flight at once (the LLM client bounds this further).
+MAX_CONCURRENT_BATCHES = 4
+
+# Rounds of generation to make up for discarded tasks before giving up.
+MAX_ROUNDS = 3
+
+# Makes the duplicate check and the insert one step within this process.
+_save_lock = threading.Lock()
+
+
+def _rejects_duplicates(pooled):
+    return pooled or getattr(settings, 'TASK_DUPLICATES', 'reject') != 'link'
+
+
+def save_generated_task(task_data, difficulty, pooled=False):
+    """
+    Create the PythonTask for a generated task. A near-duplicate of an
+    existing task raises DuplicateTask, unless TASK_DUPLICATES is 'link':
+    then it is saved linked to the task it duplicates (never into the pool,
+    which only holds distinct tasks).
+    """
+    with _save_lock:
+        duplicate = find_duplicate(task_data)
+        if duplicate is not None and _rejects_duplicates(pooled):
+            raise DuplicateTask(*duplicate)
+        return PythonTask.objects.create(
+            title=task_data.get('title'),
+            description=task_data.get('description'),
+            difficulty=difficulty,
+            test_cases=task_data.get('test_cases', []),
+            hints=task_data.get('hints', []),
+            reference_solution=task_data.get('reference_solution', ''),
+            duplicate_of=duplicate[0] if duplicate else None,
+            pooled=pooled
+        )
+
+
+def validate_task(task_data):
+    """
+    Run the task's reference solution on every test case in the sandbox.
+    Returns None if it produces every expected output, else the reason
+    the task is inconsistent.
+    """
+    result = grade_submission(
+        task_data['reference_solution'], grading_cases(task_data['test_cases']), fail_fast=True
+    )
+    if result['success']:
+        return None
+    if result.get('diagnostics'):
+        return f"reference solution rejected: {format_diagnostics(result['diagnostics'])}"
+    failed = next(case for case in result['results'] if not case['passed'] and not case['skipped'])
+    if failed['error']:
+        return f"reference solution failed on {failed['input']!r}: {failed['error']}"
+    return (f"reference solution returns {failed['actual_output']!r} for {failed['input']!r}, "
+            f"expected {failed['expected_output']!r}")
+
+
+def generate_tasks(difficulty, count, batch_size=DEFAULT_BATCH_SIZE, workers=None, pooled=False,
+                   save=True, progress=None):
+    """
+    Generate count validated tasks of difficulty.
+
+    Tasks are requested batch_size per API call, several calls at once, and
+    each task is validated by running its reference solution on the
+    sandbox worker pool as soon as its batch arrives, while other batches
+    are still being generated. Inconsistent tasks and near-duplicates of
+    existing ones are discarded, and more are requested (for up to
+    MAX_ROUNDS rounds) to make up for them.
+
+    Valid tasks are saved (in the task pool when pooled) unless save is
+    False. progress(message) is called for every batch and task.
+    Returns {'requested', 'received', 'discarded', 'tasks'}.
+    """
+    progress = progress or (lambda message: None)
+    workers = workers or default_parallelism()
+    totals = {'requested': 0, 'received': 0, 'discarded': 0, 'tasks': []}
+
+    def generate(size):
+        try:
+            return generate_python_tasks(difficulty, size)[:size]
+        finally:
+            connection.close()
+
+    def validate(task_data):
+        try:
+            return task_data, validate_task(task_data)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCHES) as generators, \
+            ThreadPoolExecutor(max_workers=workers) as validators:
+        for _ in range(MAX_ROUNDS):
+            missing = count - len(totals['tasks'])
+            if missing <= 0:
+                break
+            sizes = [min(batch_size, missing - start) for start in range(0, missing, batch_size)]
+            totals['requested'] += missing
+            validations = []
+            for batch in as_completed([generators.submit(generate, size) for size in sizes]):
+                try:
+                    received = batch.result()
+                except ValueError as e:
+                    progress(f"Batch failed: {e}")
+                    continue
+                totals['received'] += len(received)
+                progress(f"Batch of {len(received)} {difficulty} task(s) received")
+                for task_data in received:
+                    # Don't spend sandbox time on tasks the bank already has.
+                    duplicate = find_duplicate(task_data)
+                    if duplicate is not None and _rejects_duplicates(pooled):
+                        totals['discarded'] += 1
+                        progress(f"Discarded {task_data['title']!r}: {DuplicateTask(*duplicate)}")
+                        continue
+                    validations.append(validators.submit(validate, task_data))
+
+            saved_before = len(totals['tasks'])
+            for validation in as_completed(validations):
+                task_data, problem = validation.result()
+                if problem is not None:
+                    totals['discarded'] += 1
+                    progress(f"Discarded {task_data['title']!r}: {problem}")
+                    continue
+                try:
+                    task = save_generated_task(task_data, difficulty, pooled=pooled) if save else task_data
+                except DuplicateTask as e:
+                    # Duplicates another task of this run.
+                    totals['discarded'] += 1
+                    progress(f"Discarded {task_data['title']!r}: {e}")
+                    continue
+                totals['tasks'].append(task)
+                progress(f"Validated {task_data['title']!r}")
+            if len(totals['tasks']) == saved_before:
+                break
+    return totals
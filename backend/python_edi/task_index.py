@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+
+from . import minhash
+from .models import PythonTask
+from .task_selection import get_random_task_index
+
+# Seconds between reads of tasks created by other processes, so most checks
+# never touch the database.
+SYNC_INTERVAL = 1.0
+
+
+class DuplicateTask(Exception):
+    """A generated task nearly duplicates an existing one (canonical)."""
+
+    def __init__(self, canonical, similarity):
+        super().__init__(f"near-duplicate of task {canonical.pk} ({canonical.title!r}, similarity {similarity:.2f})")
+        self.canonical = canonical
+        self.similarity = similarity
+
+
+def task_signature(title, description, test_cases):
+    """MinHash of a task's title words, description word triples and test case I/O pairs."""
+    features = (
+        minhash.shingles(minhash.words(title), size=2, prefix='t:')
+        | minhash.shingles(minhash.words(description), size=3, prefix='d:')
+        | {
+            f"io:{' '.join(minhash.words(str(case.get('input'))))}=>{case.get('expected_output')}"
+            for case in test_cases or [] if isinstance(case, dict)
+        }
+    )
+    return minhash.signature(features)
+
+
+class TaskIndex:
+    """
+    In-memory LSH index over the signatures of canonical tasks (tasks that
+    are not themselves linked duplicates), for near-duplicate checks without
+    a database round trip.
+
+    The index loads the stored signatures on first use, picks up tasks
+    created by other processes by reading rows past the highest id it has
+    seen (at most every SYNC_INTERVAL seconds), and is rebuilt from the
+    table every max_age seconds so edits and deletions made elsewhere are
+    eventually reflected. Saves and deletes in this process update it right
+    away (see signals.py).
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._signatures = {}
+        self._bands = defaultdict(set)
+        self._last_id = 0
+        self._built_at = None
+        self._synced_at = None
+
+    def _add_locked(self, task_id, sig):
+        self._remove_locked(task_id)
+        if not sig:
+            return
+        self._signatures[task_id] = sig
+        for key in minhash.band_keys(sig):
+            self._bands[key].add(task_id)
+
+    def _remove_locked(self, task_id):
+        sig = self._signatures.pop(task_id, None)
+        if sig is None:
+            return
+        for key in minhash.band_keys(sig):
+            self._bands[key].discard(task_id)
+            if not self._bands[key]:
+                del self._bands[key]
+
+    def _load_locked(self, queryset):
+        for task_id, sig, duplicate_of in queryset.values_list('id', 'signature', 'duplicate_of_id').iterator():
+            # Tasks without a current signature wait for rebuild_task_index.
+            if duplicate_of is None and len(sig) == minhash.NUM_PERM:
+                self._add_locked(task_id, sig)
+            self._last_id = max(self._last_id, task_id)
+
+    def rebuild(self):
+        with self._lock:
+            self._signatures.clear()
+            self._bands.clear()
+            self._last_id = 0
+            self._load_locked(PythonTask.objects.order_by('id'))
+            self._built_at = self._synced_at = time.monotonic()
+
+    def _sync_locked(self):
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at > self.max_age:
+            self.rebuild()
+        elif now - self._synced_at > SYNC_INTERVAL:
+            self._load_locked(PythonTask.objects.filter(id__gt=self._last_id).order_by('id'))
+            self._synced_at = now
+
+    def add(self, task):
+        with self._lock:
+            if task.duplicate_of_id is None:
+                self._add_locked(task.pk, task.signature)
+            else:
+                self._remove_locked(task.pk)
+            self._last_id = max(self._last_id, task.pk)
+
+    def remove(self, task_id):
+        with self._lock:
+            self._remove_locked(task_id)
+
+    def nearest(self, sig, threshold, sync=True, exclude=None):
+        """(task id, similarity) of the most similar indexed task at or above threshold, or None."""
+        with self._lock:
+            if sync:
+                self._sync_locked()
+            candidates = set()
+            for key in minhash.band_keys(sig):
+                candidates |= self._bands.get(key, set())
+            candidates.discard(exclude)
+            best = None
+            for task_id in candidates:
+                score = minhash.similarity(sig, self._signatures[task_id])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (task_id, score)
+            return best
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tasks': len(self._signatures),
+                'bands': len(self._bands),
+                'age_s': round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_task_index():
+    """Return the process-wide task index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TaskIndex(getattr(settings, 'TASK_INDEX_MAX_AGE', 600))
+        return _index
+
+
+def find_duplicate(task_data):
+    """
+    The existing task that task_data (a generated task dict) nearly
+    duplicates, as (task, similarity), or None.
+    """
+    sig = task_signature(task_data.get('title'), task_data.get('description'), task_data.get('test_cases'))
+    index = get_task_index()
+    match = index.nearest(sig, getattr(settings, 'TASK_DUPLICATE_SIMILARITY', 0.7))
+    while match is not None:
+        canonical = PythonTask.objects.filter(pk=match[0]).first()
+        if canonical is not None:
+            return canonical, match[1]
+        # Deleted by another process since the index last saw it.
+        index.remove(match[0])
+        match = index.nearest(sig, getattr(settings, 'TASK_DUPLICATE_SIMILARITY', 0.7), sync=False)
+    return None
+
+
+def reindex_tasks(link_duplicates=False, batch_size=500, progress=None):
+    """
+    Recompute every task's signature and rebuild this process's index. With
+    link_duplicates, also link each task that nearly duplicates an earlier
+    canonical task to it (oldest first, so the first of a group stays
+    canonical). Returns {'tasks': n, 'linked': n}.
+    """
+    threshold = getattr(settings, 'TASK_DUPLICATE_SIMILARITY', 0.7)
+    scratch = TaskIndex(max_age=float('inf'))
+    scratch._built_at = scratch._synced_at = time.monotonic()
+    totals = {'tasks': 0, 'linked': 0}
+    last_id = 0
+    while True:
+        batch = list(
+            PythonTask.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'title', 'description', 'test_cases', 'signature', 'duplicate_of', 'revision')[:batch_size]
+        )
+        if not batch:
+            break
+        for task in batch:
+            old = (task.signature, task.duplicate_of_id)
+            task.signature = task_signature(task.title, task.description, task.test_cases)
+            if link_duplicates and task.duplicate_of_id is None:
+                match = scratch.nearest(task.signature, threshold, sync=False)
+                if match is not None:
+                    task.duplicate_of_id = match[0]
+                    totals['linked'] += 1
+            if (task.signature, task.duplicate_of_id) != old:
+                task.revision = F('revision') + 1
+            scratch.add(task)
+        PythonTask.objects.bulk_update(batch, ['signature', 'duplicate_of', 'revision'])
+        totals['tasks'] += len(batch)
+        last_id = batch[-1].id
+        if progress is not None:
+            progress(totals)
+    get_task_index().rebuild()
+    if link_duplicates:
+        get_random_task_index().invalidate()
+    return totals
@@ -0,0 +1,141 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from .models import PythonTask
+from .task_generation import generate_tasks
+from .task_selection import get_random_task_index
+
+DIFFICULTIES = [value for value, _ in PythonTask._meta.get_field('difficulty').choices]
+
+CLAIMED_KEY = 'task-pool-stats:claimed'
+EMPTY_KEY = 'task-pool-stats:empty'
+GENERATED_KEY = 'task-pool-stats:generated'
+FAILED_KEY = 'task-pool-stats:failed'
+DISCARDED_KEY = 'task-pool-stats:discarded'
+
+# Longest a refill may hold its difficulty's lease, in seconds.
+REFILL_LEASE = 900
+
+
+def pool_size():
+    return getattr(settings, 'TASK_POOL_SIZE', 5)
+
+
+def low_water():
+    return getattr(settings, 'TASK_POOL_LOW_WATER', 2)
+
+
+def _refill_key(difficulty):
+    return f"task-pool-refill:{difficulty}"
+
+
+def _count(key, delta=1):
+    if not delta:
+        return
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def available(difficulty):
+    return PythonTask.objects.filter(pooled=True, difficulty=difficulty).count()
+
+
+def claim_task(difficulty):
+    """
+    Hand out the oldest pooled task of difficulty, or None if there is none.
+
+    A single UPDATE ... RETURNING marks the task served and returns it, so
+    concurrent claims never get the same task: SKIP LOCKED lets them pass
+    over each other's rows where the database has it, and SQLite
+    serializes writes anyway.
+    """
+    if pool_size() <= 0:
+        return None
+    table = connection.ops.quote_name(PythonTask._meta.db_table)
+    skip_locked = ' FOR UPDATE SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else ''
+    claimed = next(iter(PythonTask.objects.raw(
+        f"UPDATE {table} SET pooled = %s, revision = revision + 1 WHERE id = ("
+        f"SELECT id FROM {table} WHERE pooled = %s AND difficulty = %s ORDER BY id LIMIT 1{skip_locked}"
+        f") RETURNING *",
+        [False, True, difficulty]
+    )), None)
+    _count(EMPTY_KEY if claimed is None else CLAIMED_KEY)
+    if claimed is not None:
+        # The raw UPDATE sends no signals; the claimed task is now servable.
+        get_random_task_index().update(claimed)
+    return claimed
+
+
+def refill(difficulty, size=None):
+    """
+    Generate validated tasks for difficulty until its pool holds size of
+    them (TASK_POOL_SIZE by default). Returns the number of tasks added.
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"Unknown difficulty: {difficulty!r}")
+    size = pool_size() if size is None else size
+    missing = size - available(difficulty)
+    if missing <= 0:
+        return 0
+    totals = generate_tasks(difficulty, missing, pooled=True)
+    _count(DISCARDED_KEY, totals['discarded'])
+    _count(GENERATED_KEY, len(totals['tasks']))
+    if not totals['tasks']:
+        _count(FAILED_KEY)
+    return len(totals['tasks'])
+
+
+def refill_in_background(difficulty):
+    """
+    Refill difficulty's pool on a daemon thread if it has dropped below
+    TASK_POOL_LOW_WATER. A lease in the default cache keeps it to one
+    refill per difficulty at a time (across processes, with a shared cache).
+    Returns the thread, or None if no refill was started (also for an
+    unknown difficulty, which would otherwise always look empty).
+    """
+    if difficulty not in DIFFICULTIES or available(difficulty) >= low_water():
+        return None
+    if not cache.add(_refill_key(difficulty), True, timeout=REFILL_LEASE):
+        return None
+
+    def run():
+        try:
+            generated = refill(difficulty)
+            print(f"Task pool: generated {generated} {difficulty} task(s)")
+        except Exception as e:
+            import traceback
+            print(f"Error refilling the {difficulty} task pool: {str(e)}")
+            print(traceback.format_exc())
+        finally:
+            cache.delete(_refill_key(difficulty))
+            connection.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def task_pool_stats():
+    counts = dict(
+        PythonTask.objects.filter(pooled=True)
+        .values_list('difficulty')
+        .annotate(count=Count('id'))
+    )
+    return {
+        'size': pool_size(),
+        'low_water': low_water(),
+        'available': {difficulty: counts.get(difficulty, 0) for difficulty in DIFFICULTIES},
+        'refilling': [difficulty for difficulty in DIFFICULTIES if cache.get(_refill_key(difficulty))],
+        'claimed': cache.get(CLAIMED_KEY, 0),
+        'empty': cache.get(EMPTY_KEY, 0),
+        'generated': cache.get(GENERATED_KEY, 0),
+        'generation_failures': cache.get(FAILED_KEY, 0),
+        'discarded': cache.get(DISCARDED_KEY, 0),
+    }
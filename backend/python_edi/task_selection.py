@@ -0,0 +1,244 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PythonTask, Submission
+
+DIFFICULTIES = [value for value, _ in PythonTask._meta.get_field('difficulty').choices]
+
+# Bumped (in the default cache) whenever the set of selectable tasks
+# changes, so every process knows when its id lists are out of date. A
+# change to one task also leaves its (task id, difficulty or None) under
+# CHANGE_KEY % version, for other processes to replay instead of reloading.
+VERSION_KEY = 'random-task-ids:version'
+CHANGE_KEY = 'random-task-ids:change:%d'
+
+# Processes further behind than this many changes reload their lists.
+MAX_REPLAY = 256
+
+# Random picks tried before falling back to listing the unsolved tasks.
+MAX_SAMPLES = 8
+
+
+def selectable_tasks():
+    """Tasks random-task may hand out: served (not pooled) and not linked duplicates."""
+    return PythonTask.objects.filter(pooled=False, duplicate_of__isnull=True)
+
+
+def _selectable(task):
+    return not task.pooled and task.duplicate_of_id is None
+
+
+def _version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def _bump_version():
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        return None
+
+
+class _IdList:
+    """Ids with O(1) add, remove and random pick (removal swaps in the last id)."""
+
+    def __init__(self, ids=()):
+        self.ids = list(ids)
+        self.positions = {task_id: index for index, task_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, task_id):
+        if task_id not in self.positions:
+            self.positions[task_id] = len(self.ids)
+            self.ids.append(task_id)
+
+    def discard(self, task_id):
+        index = self.positions.pop(task_id, None)
+        if index is None:
+            return
+        last = self.ids.pop()
+        if last != task_id:
+            self.ids[index] = last
+            self.positions[last] = index
+
+    def choice(self):
+        return self.ids[random.randrange(len(self.ids))]
+
+
+class RandomTaskIndex:
+    """
+    Per-difficulty lists of selectable task ids, so a random pick is one
+    index into a list plus a primary-key fetch, whatever the bank's size.
+
+    Each process keeps its own lists, loaded with a single id-only query.
+    A saved or claimed task (see signals.py and task_pool.py) is applied in
+    place and published as a per-id change; other processes replay the
+    changes they missed on their next pick, in O(changes). Anything else
+    (deletes, bulk updates) bumps the shared version without a change, as
+    does a process too far behind, and the lists are reloaded. The version
+    and changes live in the default cache, so they only reach other
+    processes if that cache is shared (CACHE_REDIS_URL); with the
+    local-memory cache, their lists stay stale until the reload every
+    max_age seconds, which also covers writes that bypass all of the above.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._lists = {}
+        self._version = None
+        self._built_at = None
+
+    def rebuild(self):
+        with self._lock:
+            version = _version()
+            lists = {difficulty: _IdList() for difficulty in DIFFICULTIES}
+            for task_id, difficulty in selectable_tasks().order_by().values_list('id', 'difficulty').iterator():
+                lists.setdefault(difficulty, _IdList()).add(task_id)
+            self._lists = lists
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _sync_locked(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.rebuild()
+            return
+        version = _version()
+        if version == self._version:
+            return
+        if self._version is None or not 0 < version - self._version <= MAX_REPLAY:
+            self.rebuild()
+            return
+        keys = [CHANGE_KEY % number for number in range(self._version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            # An invalidation, or changes the cache no longer holds.
+            self.rebuild()
+            return
+        for key in keys:
+            self._apply(*changes[key])
+        self._version = version
+
+    def _apply(self, task_id, difficulty):
+        for ids in self._lists.values():
+            ids.discard(task_id)
+        if difficulty is not None:
+            self._lists.setdefault(difficulty, _IdList()).add(task_id)
+
+    def invalidate(self):
+        """Make every process reload its lists before the next pick."""
+        with self._lock:
+            self._version = None
+        _bump_version()
+
+    def update(self, task):
+        """Apply a saved task to this process's lists and publish the change."""
+        change = (task.pk, task.difficulty if _selectable(task) else None)
+        with self._lock:
+            version = _bump_version()
+            if version is not None:
+                # Changes older than max_age are never replayed: lists that
+                # old are reloaded anyway.
+                cache.set(CHANGE_KEY % version, change, timeout=self.max_age + 60)
+            if self._built_at is not None:
+                # Applied now and replayed again, in order with the changes
+                # of other processes, on the next sync; applying is idempotent.
+                self._apply(*change)
+
+    def counts(self, sync=True):
+        with self._lock:
+            if sync:
+                self._sync_locked()
+            return {difficulty: len(ids) for difficulty, ids in self._lists.items()}
+
+    def pick(self, difficulty=None, exclude=()):
+        """
+        A random selectable task id of difficulty (of any difficulty if
+        None) not in exclude, or None if there is none.
+        """
+        with self._lock:
+            self._sync_locked()
+            if difficulty is None:
+                lists = [ids for ids in self._lists.values() if len(ids)]
+                if not lists:
+                    return None
+                # Weighted by size, so every task is equally likely.
+                ids = random.choices(lists, weights=[len(ids) for ids in lists])[0]
+            else:
+                ids = self._lists.get(difficulty)
+            if not ids:
+                return None
+            if len(exclude) < len(ids) // 2:
+                for _ in range(MAX_SAMPLES):
+                    task_id = ids.choice()
+                    if task_id not in exclude:
+                        return task_id
+            if difficulty is None:
+                # Rare (most of the bank excluded): pick among every list.
+                remaining = [task_id for ids in self._lists.values() for task_id in ids.ids if task_id not in exclude]
+            else:
+                remaining = [task_id for task_id in ids.ids if task_id not in exclude]
+            return random.choice(remaining) if remaining else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tasks': {difficulty: len(ids) for difficulty, ids in self._lists.items()},
+                'age_s': round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_random_task_index():
+    """Return the process-wide random task index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RandomTaskIndex(getattr(settings, 'TASK_INDEX_MAX_AGE', 600))
+        return _index
+
+
+def solved_task_ids(user):
+    """Ids of the tasks user has a successful submission for."""
+    if user is None:
+        return set()
+    return set(
+        Submission.objects.filter(user=user, is_successful=True)
+        .values_list('task_id', flat=True).distinct()
+    )
+
+
+def pick_random_task(difficulty, user=None):
+    """
+    A random selectable task of difficulty that user hasn't solved yet.
+
+    The difficulty comes first: with every task of it solved, a solved one
+    is handed out again, and only a difficulty with no tasks at all falls
+    back to (preferably unsolved) tasks of any difficulty, the way
+    random-task always did. Returns None only if there are no tasks at all.
+    """
+    index = get_random_task_index()
+    solved = solved_task_ids(user)
+    for attempt in range(2):
+        for pick_difficulty, exclude in ((difficulty, solved), (difficulty, ()), (None, solved), (None, ())):
+            task_id = index.pick(pick_difficulty, exclude)
+            if task_id is not None:
+                break
+        else:
+            return None
+        task = selectable_tasks().filter(pk=task_id).first()
+        if task is not None:
+            return task
+        # Changed since this process last synced; reload and try again.
+        index.invalidate()
+    return None
@@ -0,0 +1,30 @@
+import threading
+
+from django.test import override_settings
+
+from ..llm_client import LLMClient
+from ..management.commands import fake_completions
+
+
+class FakeCompletionsMixin:
+    """Runs the fake_completions server on a free port for one test."""
+
+    def serve(self, log=None, **options):
+        server = fake_completions.make_server(log=log or (lambda message: None), **options)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings_override = override_settings(
+            OPENAI_API_BASE=f"http://127.0.0.1:{server.server_address[1]}/v1",
+            OPENAI_API_KEY='sk-test',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def llm_client(self, read_timeout=5, max_retries=2):
+        return LLMClient(
+            connect_timeout=1, read_timeout=read_timeout, max_connections=4, max_concurrency=4,
+            max_retries=max_retries, backoff_base=0.01, backoff_max=0.05,
+        )
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import assistance_cache
+from ..assistance_cache import assistance_cache_stats, lookup_answer, store_answer
+from ..models import AssistanceAnswer, AssistanceAnswerBand
+
+TASK = 'Print the last item of a comma separated list.'
+CODE = "def main(input_data):\n    items = input_data.split(',')\n    return items[len(items)]\n"
+RENAMED = "def main(data):\n    parts = data.split(',')\n    return parts[len(parts)]\n"
+ERROR = 'Traceback (most recent call last):\n  File "<student>", line 3\nIndexError: list index out of range'
+QUESTION = 'Why do I get an index error?'
+
+
+class LookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_exact_request_is_answered_from_the_cache(self):
+        self.assertIsNone(lookup_answer(CODE, ERROR, TASK, QUESTION))
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        # Whitespace and case in the question don't matter.
+        self.assertEqual(lookup_answer(CODE, ERROR, TASK, '  why do I get an INDEX error? '), 'Lists are indexed from zero.')
+        self.assertEqual(AssistanceAnswer.objects.get().hits, 1)
+        stats = assistance_cache_stats()
+        self.assertEqual((stats['exact_hits'], stats['near_hits'], stats['misses']), (1, 0, 1))
+
+    def test_same_mistake_with_other_names_is_a_near_hit(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        self.assertEqual(lookup_answer(RENAMED, ERROR, TASK, QUESTION), 'Lists are indexed from zero.')
+        self.assertEqual(assistance_cache_stats()['near_hits'], 1)
+
+    def test_different_numbers_are_a_different_mistake(self):
+        loop = "def main(input_data):\n    items = input_data.split(',')\n    total = 0\n" \
+               "    for i in range(len(items) - {}):\n        total += int(items[i + 1])\n    return total\n"
+        store_answer(loop.format(1), ERROR, TASK, QUESTION, 'Your loop stops one item early.')
+        renamed = loop.format(1).replace('items', 'values').replace('total', 'acc')
+        self.assertEqual(lookup_answer(renamed, ERROR, TASK, QUESTION), 'Your loop stops one item early.')
+        self.assertIsNone(lookup_answer(loop.format(2), ERROR, TASK, QUESTION))
+
+    @override_settings(AI_CACHE_NEAR_DUPLICATES=False)
+    def test_near_hits_can_be_turned_off(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        self.assertIsNone(lookup_answer(RENAMED, ERROR, TASK, QUESTION))
+
+    def test_different_task_error_or_question_is_a_miss(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        self.assertIsNone(lookup_answer(RENAMED, ERROR, 'Print the first item.', QUESTION))
+        self.assertIsNone(lookup_answer(RENAMED, 'KeyError: 0', TASK, QUESTION))
+        self.assertIsNone(lookup_answer(RENAMED, ERROR, TASK, 'How do I sort a dictionary by value?'))
+
+    def test_expired_answers_are_not_returned(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        AssistanceAnswer.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertIsNone(lookup_answer(CODE, ERROR, TASK, QUESTION))
+        self.assertIsNone(lookup_answer(RENAMED, ERROR, TASK, QUESTION))
+
+    def test_storing_again_replaces_the_answer(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'First answer.')
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Second answer.')
+        self.assertEqual(AssistanceAnswer.objects.count(), 1)
+        self.assertEqual(lookup_answer(CODE, ERROR, TASK, QUESTION), 'Second answer.')
+        self.assertEqual(
+            AssistanceAnswerBand.objects.values('answer_id').distinct().count(), 1
+        )
+
+    @override_settings(AI_CACHE_TTL=0)
+    def test_disabled_cache_stores_nothing(self):
+        store_answer(CODE, ERROR, TASK, QUESTION, 'Lists are indexed from zero.')
+        self.assertFalse(AssistanceAnswer.objects.exists())
+        self.assertIsNone(lookup_answer(CODE, ERROR, TASK, QUESTION))
+
+
+@override_settings(AI_CACHE_MAX_ENTRIES=3)
+class EvictionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(assistance_cache, 'EVICT_EVERY', 5)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store(self, number):
+        store_answer(CODE, ERROR, TASK, f'Question number {number}', f'Answer {number}')
+
+    def test_eviction_only_runs_every_few_stores(self):
+        with mock.patch.object(assistance_cache, '_evict', wraps=assistance_cache._evict) as evict:
+            for number in range(1, 10):
+                self.store(number)
+        self.assertEqual(evict.call_count, 1)
+        # Four more stores since the eviction; the cap isn't enforced yet.
+        self.assertEqual(AssistanceAnswer.objects.count(), 3 + 4)
+
+    def test_least_recently_used_answers_are_evicted_to_the_cap(self):
+        for number in range(1, 5):
+            self.store(number)
+        earlier = timezone.now() - timedelta(minutes=10)
+        for number in range(1, 5):
+            AssistanceAnswer.objects.filter(response=f'Answer {number}').update(
+                last_used_at=earlier + timedelta(minutes=number)
+            )
+        # Answer 1 is the oldest, but was just used.
+        self.assertEqual(lookup_answer(CODE, ERROR, TASK, 'Question number 1'), 'Answer 1')
+        self.store(5)
+
+        self.assertEqual(
+            sorted(AssistanceAnswer.objects.values_list('response', flat=True)),
+            ['Answer 1', 'Answer 4', 'Answer 5']
+        )
+        # Their bands go with them.
+        self.assertEqual(
+            set(AssistanceAnswerBand.objects.values_list('answer__response', flat=True)),
+            {'Answer 1', 'Answer 4', 'Answer 5'}
+        )
+
+    def test_expired_answers_are_evicted(self):
+        for number in range(1, 3):
+            self.store(number)
+        AssistanceAnswer.objects.filter(response='Answer 1').update(created_at=timezone.now() - timedelta(days=30))
+        for number in range(3, 6):
+            self.store(number)
+        self.assertEqual(
+            sorted(AssistanceAnswer.objects.values_list('response', flat=True)),
+            ['Answer 3', 'Answer 4', 'Answer 5']
+        )
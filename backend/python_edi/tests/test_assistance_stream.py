@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from ..models import AssistanceAnswer, ChatMessage, PythonTask
+from .fakes import FakeCompletionsMixin
+
+CODE = "def main(input_data):\n    items = input_data.split(',')\n    return items[len(items)]\n"
+
+
+def parse_event(chunk):
+    """(event, data) of one Server-Sent Event as written by views._sse_event."""
+    event, data = chunk.decode('utf-8').strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+class StreamAssistanceTests(FakeCompletionsMixin, TransactionTestCase):
+    # Closing a response sends request_finished, which closes the database
+    # connection; outside a test transaction it simply reconnects.
+
+    def setUp(self):
+        cache.clear()
+        self.task = PythonTask.objects.create(title='Last item', description='Print the last item of the list.')
+        self.user = get_user_model().objects.create_user(
+            **{get_user_model().USERNAME_FIELD: 'student@example.com'}, password='secret'
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('get-assistance', args=[self.task.pk])
+
+    def ask(self):
+        return self.client.post(
+            self.url,
+            {'code': CODE, 'error_message': 'IndexError: list index out of range',
+             'message': 'Why?', 'stream': True},
+            content_type='application/json',
+        )
+
+    def test_answer_is_streamed_and_saved(self):
+        self.serve(delay=0, answer='Lists are indexed from zero.')
+        response = self.ask()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [parse_event(chunk) for chunk in response.streaming_content]
+
+        self.assertEqual(
+            [data for event, data in events if event == 'token'],
+            ['Lists', ' are', ' indexed', ' from', ' zero.'],
+        )
+        event, done = events[-1]
+        self.assertEqual(event, 'done')
+        self.assertEqual(done['message'], 'Lists are indexed from zero.')
+        saved = ChatMessage.objects.get(pk=done['message_id'])
+        self.assertEqual((saved.user, saved.task, saved.is_from_user), (self.user, self.task, False))
+        self.assertEqual(saved.message, 'Lists are indexed from zero.')
+        self.assertTrue(ChatMessage.objects.filter(user=self.user, is_from_user=True, message='Why?').exists())
+        # The complete answer also goes to the assistance cache.
+        self.assertEqual(AssistanceAnswer.objects.count(), 1)
+
+    def test_client_disconnect_cancels_the_upstream_request(self):
+        log = []
+        self.serve(delay=0.05, answer=' '.join(['word'] * 100), log=log.append)
+        response = self.ask()
+        content = iter(response.streaming_content)
+        self.assertEqual(parse_event(next(content)), ('token', 'word'))
+        self.assertEqual(parse_event(next(content)), ('token', ' word'))
+        # What the server does when the browser goes away.
+        response.close()
+
+        deadline = time.monotonic() + 3
+        while not any(message.startswith('Client disconnected') for message in log):
+            self.assertLess(time.monotonic(), deadline, 'the upstream request was not closed')
+            time.sleep(0.02)
+        self.assertFalse(ChatMessage.objects.filter(is_from_user=False).exists())
+        self.assertFalse(AssistanceAnswer.objects.exists())
@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+
+from .. import sandbox
+from ..grading import grade_submission
+from ..sandbox import run_stress_cases, run_test_cases, run_test_cases_parallel
+from ..verdict_cache import VERDICT_CACHE
+from .test_sandbox import reset_pool
+
+# Every case but the first takes half a second.
+SLOW_AFTER_FIRST = "import time\ndef main(input_data):\n    if input_data != '1':\n        time.sleep(0.5)\n    return int(input_data) * 2\n"
+
+
+class FailFastTests(SimpleTestCase):
+    CODE = "def main(input_data):\n    return int(input_data) * 2\n"
+
+    def setUp(self):
+        cache.clear()
+        caches[VERDICT_CACHE].clear()
+
+    def test_cases_after_the_first_failure_are_skipped(self):
+        test_cases = [
+            {'input': '1', 'expectedOutput': '2'},
+            {'input': '2', 'expectedOutput': '5'},
+            {'input': '3', 'expectedOutput': '6'},
+            {'input': '4', 'expectedOutput': '8'},
+        ]
+        result = grade_submission(self.CODE, test_cases, fail_fast=True)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['skipped'], [2, 3])
+        self.assertEqual([case['passed'] for case in result['results']], [True, False, False, False])
+        self.assertEqual([case['skipped'] for case in result['results']], [False, False, True, True])
+
+    def test_without_fail_fast_every_case_runs(self):
+        test_cases = [
+            {'input': '1', 'expectedOutput': '3'},
+            {'input': '2', 'expectedOutput': '4'},
+        ]
+        result = grade_submission(self.CODE, test_cases)
+        self.assertEqual(result['skipped'], [])
+        self.assertEqual([case['passed'] for case in result['results']], [False, True])
+
+    def test_expected_outputs_stay_out_of_the_sandbox(self):
+        with mock.patch('python_edi.sandbox.run_job', wraps=sandbox.run_job) as run_job:
+            run_test_cases(self.CODE, ['1', '2'], expected=['2', '5'], fail_fast=True)
+        job = run_job.call_args.args[0]
+        self.assertNotIn('expected', job)
+        self.assertNotIn('fail_fast', job)
+
+    def test_an_error_stops_the_job(self):
+        cases = run_test_cases("def main(input_data):\n    return 10 // int(input_data)\n",
+                               ['1', '0', '2'], fail_fast=True)
+        self.assertIn('ZeroDivisionError', cases[1]['error'])
+        self.assertEqual([case['skipped'] for case in cases], [False, False, True])
+
+    def test_the_job_is_stopped_rather_than_run_to_the_end(self):
+        started = time.monotonic()
+        cases = run_test_cases(SLOW_AFTER_FIRST, ['1', '2', '3', '4'], expected=['2', '5', '6', '8'], fail_fast=True)
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual([case['skipped'] for case in cases], [False, False, True, True])
+        self.assertIsNone(cases[2]['error'])
+
+    def test_parallel_chunks_are_cancelled(self):
+        cases = run_test_cases_parallel(
+            SLOW_AFTER_FIRST, ['2', '1', '3', '4'], expected=['5', '2', '6', '8'], fail_fast=True, max_workers=2,
+        )
+        self.assertEqual(cases[0]['output'], '4')
+        self.assertFalse(cases[0]['skipped'])
+        self.assertTrue(cases[1]['skipped'])
+
+    def test_stress_cases_stop_at_the_first_error(self):
+        code = "def main(input_data):\n    if len(input_data) > 3:\n        raise ValueError('too big')\n    return len(input_data)\n"
+        cases = run_stress_cases(code, "def generate(n):\n    return 'x' * n", [1, 2, 10, 20])
+        self.assertEqual([case['output'] for case in cases[:2]], ['1', '2'])
+        self.assertIn('too big', cases[2]['error'])
+        self.assertTrue(cases[3]['skipped'])
+
+
+@override_settings(SANDBOX_POOL_SIZE=1)
+class PooledFailFastTests(SimpleTestCase):
+    def setUp(self):
+        reset_pool()
+        self.addCleanup(reset_pool)
+
+    def test_a_stopped_job_keeps_its_worker(self):
+        cases = run_test_cases(SLOW_AFTER_FIRST, ['1', '2', '3'], expected=['2', '5', '6'], fail_fast=True)
+        self.assertEqual([case['skipped'] for case in cases], [False, False, True])
+        cases = run_test_cases(SLOW_AFTER_FIRST, ['1'], expected=['2'], fail_fast=True)
+        self.assertEqual(cases[0]['output'], '2')
+        stats = sandbox._pool.stats()
+        self.assertEqual((stats['spawned'], stats['jobs'], stats['crashed'], stats['cancelled']), (1, 2, 0, 0))
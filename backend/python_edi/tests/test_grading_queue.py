@@ -0,0 +1,125 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from ..grading import MAX_ATTEMPTS, claim_next_job, enqueue_grading, requeue_stale_jobs, run_grading_job
+from ..models import GradingJob
+
+CODE = "def main(input_data):\n    return input_data\n"
+TEST_CASES = [{'input': '1', 'expectedOutput': '1'}]
+
+
+def in_thread(func, timeout=10):
+    """
+    Run func() in a new thread (with its own database connection) and return
+    its result; fails if it is still blocked after timeout seconds.
+    """
+    result = []
+
+    def run():
+        try:
+            result.append(func())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError(f"Still blocked after {timeout} seconds")
+    return result[0]
+
+
+class ClaimTests(TransactionTestCase):
+    def test_jobs_are_claimed_oldest_first(self):
+        first = enqueue_grading(CODE, TEST_CASES)
+        second = enqueue_grading(CODE, TEST_CASES)
+
+        claimed = claim_next_job(worker='worker-1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.worker), (GradingJob.STATUS_RUNNING, 1, 'worker-1'))
+        self.assertEqual(claim_next_job(worker='worker-2').pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_a_locked_job_is_skipped(self):
+        first = enqueue_grading(CODE, TEST_CASES)
+        second = enqueue_grading(CODE, TEST_CASES)
+        with transaction.atomic():
+            # Another worker in the middle of claiming the oldest job.
+            GradingJob.objects.select_for_update().get(pk=first.pk)
+            claimed = in_thread(lambda: claim_next_job(worker='worker-2'))
+        self.assertEqual(claimed.pk, second.pk)
+        self.assertEqual(GradingJob.objects.get(pk=first.pk).status, GradingJob.STATUS_QUEUED)
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_concurrent_workers_never_claim_the_same_job(self):
+        jobs = [enqueue_grading(CODE, TEST_CASES) for _ in range(40)]
+        barrier = threading.Barrier(4)
+        claims = []
+
+        def work(name):
+            try:
+                barrier.wait()
+                while True:
+                    job = claim_next_job(worker=name)
+                    if job is None:
+                        return
+                    claims.append(job.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(f'worker-{number}',)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claims), sorted(job.pk for job in jobs))
+        self.assertEqual(set(GradingJob.objects.values_list('attempts', flat=True)), {1})
+
+
+class RecoveryTests(TransactionTestCase):
+    def test_stale_jobs_are_requeued_after_the_lease(self):
+        stale = enqueue_grading(CODE, TEST_CASES)
+        fresh = enqueue_grading(CODE, TEST_CASES)
+        exhausted = enqueue_grading(CODE, TEST_CASES)
+        for job in (stale, fresh, exhausted):
+            claim_next_job()
+        long_ago = timezone.now() - timedelta(seconds=600)
+        GradingJob.objects.filter(pk=stale.pk).update(started_at=long_ago)
+        GradingJob.objects.filter(pk=exhausted.pk).update(started_at=long_ago, attempts=MAX_ATTEMPTS)
+
+        self.assertEqual(requeue_stale_jobs(older_than_seconds=300), (1, 1))
+        self.assertEqual(GradingJob.objects.get(pk=stale.pk).status, GradingJob.STATUS_QUEUED)
+        self.assertEqual(GradingJob.objects.get(pk=fresh.pk).status, GradingJob.STATUS_RUNNING)
+        self.assertEqual(GradingJob.objects.get(pk=exhausted.pk).status, GradingJob.STATUS_FAILED)
+        # The requeued job is claimed again, on its second attempt.
+        claimed = claim_next_job()
+        self.assertEqual((claimed.pk, claimed.attempts), (stale.pk, 2))
+
+    def test_a_failed_attempt_leaves_the_job_retryable(self):
+        job = enqueue_grading(CODE, TEST_CASES)
+        with mock.patch('python_edi.grading.grade_submission', side_effect=RuntimeError('sandbox unavailable')):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                claimed = claim_next_job()
+                self.assertEqual((claimed.pk, claimed.attempts), (job.pk, attempt))
+                run_grading_job(claimed)
+                job.refresh_from_db()
+                self.assertEqual(job.error_message, 'sandbox unavailable')
+                expected = GradingJob.STATUS_QUEUED if attempt < MAX_ATTEMPTS else GradingJob.STATUS_FAILED
+                self.assertEqual(job.status, expected)
+        self.assertIsNone(claim_next_job())
+
+    def test_a_retried_job_can_succeed(self):
+        job = enqueue_grading(CODE, TEST_CASES)
+        with mock.patch('python_edi.grading.grade_submission', side_effect=RuntimeError('sandbox unavailable')):
+            run_grading_job(claim_next_job())
+        run_grading_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error_message), (GradingJob.STATUS_DONE, 2, None))
+        self.assertTrue(job.result['success'])
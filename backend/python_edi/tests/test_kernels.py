@@ -0,0 +1,116 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import admission, kernels
+from ..admission import AdmissionController
+from ..kernels import Kernel
+
+SLOW = "import time\ntime.sleep(0.6)\nprint('slept')"
+
+
+@override_settings(SANDBOX_MAX_KERNELS=4, SANDBOX_KERNEL_POLL_TIMEOUT=5)
+class KernelEndpointTests(TestCase):
+    def setUp(self):
+        # The sandbox rate limit's buckets live in the cache.
+        cache.clear()
+        patcher = mock.patch.object(kernels, '_manager', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.shut_down_kernels)
+
+    def shut_down_kernels(self):
+        if kernels._manager is not None:
+            for kernel in list(kernels._manager._kernels.values()):
+                kernel.kill()
+
+    def run_snippet(self, code, session_id=None, client=None):
+        data = {'code': code}
+        if session_id:
+            data['session_id'] = session_id
+        return (client or self.client).post(reverse('kernel-execute'), data, content_type='application/json')
+
+    def test_state_survives_between_snippets(self):
+        first = self.run_snippet('x = 41')
+        self.assertEqual((first.status_code, first.data['new_session'], first.data['execution_count']), (200, True, 1))
+        second = self.run_snippet('print(x + 1)', first.data['session_id'])
+        self.assertEqual(second.data['session_id'], first.data['session_id'])
+        self.assertEqual((second.data['new_session'], second.data['execution_count']), (False, 2))
+        self.assertEqual(second.data['output'], '42')
+
+    def test_anonymous_callers_cannot_reach_each_others_kernels(self):
+        session_id = self.run_snippet('secret = 42').data['session_id']
+        stranger = Client()
+
+        response = self.run_snippet('print(secret)', session_id, client=stranger)
+        self.assertTrue(response.data['new_session'])
+        self.assertNotEqual(response.data['session_id'], session_id)
+        self.assertIn('NameError', response.data['error'])
+        url = reverse('kernel-session', args=[session_id])
+        self.assertEqual(stranger.get(url, {'execution': 1}).status_code, 404)
+        self.assertEqual(stranger.delete(url).status_code, 404)
+        # The owner still has it.
+        self.assertEqual(self.run_snippet('print(secret)', session_id).data['output'], '42')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    @override_settings(SANDBOX_KERNEL_POLL_TIMEOUT=0.1)
+    def test_slow_snippet_is_long_polled(self):
+        started = self.run_snippet(SLOW)
+        self.assertEqual((started.status_code, started.data['status']), (202, 'running'))
+        session_id = started.data['session_id']
+        self.assertEqual(
+            started.data['poll_url'], reverse('kernel-session', args=[session_id]) + '?execution=1'
+        )
+
+        deadline = time.monotonic() + 5
+        while True:
+            polled = self.client.get(started.data['poll_url'])
+            if polled.status_code == 200:
+                break
+            self.assertEqual(polled.status_code, 202)
+            self.assertLess(time.monotonic(), deadline, 'the snippet never finished')
+        self.assertEqual((polled.data['status'], polled.data['output']), ('done', 'slept'))
+        url = reverse('kernel-session', args=[session_id])
+        self.assertEqual(self.client.get(url, {'execution': 2}).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class KernelAdmissionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(admission, '_controller', AdmissionController(2, 0, 0.1))
+        self.controller = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def kernel(self, name):
+        kernel = Kernel(name, None, memory_mb=256)
+        self.addCleanup(kernel.kill)
+        return kernel
+
+    def test_snippet_waiting_for_its_session_holds_no_slot(self):
+        busy, other = self.kernel('busy'), self.kernel('other')
+        first = busy.start(SLOW)
+        queued = []
+        waiter = threading.Thread(target=lambda: queued.append(busy.start('print(2)', wait=5)))
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual(self.controller.stats()['active'], 1)
+
+        # The second slot is still free for another session.
+        self.assertEqual(other.wait_for(other.start('print(3)'), 5)['output'], '3')
+        self.assertEqual(busy.wait_for(first, 5)['output'], 'slept')
+        waiter.join(5)
+        self.assertEqual(busy.wait_for(queued[0], 5)['output'], '2')
+        self.assertEqual(self.controller.stats()['active'], 0)
+
+    def test_old_results_are_dropped(self):
+        kernel = self.kernel('history')
+        kernel.results_kept = 2
+        executions = [kernel.start(f'print({number})') for number in range(3)]
+        self.assertEqual(kernel.wait_for(executions[-1], 5)['output'], '2')
+        self.assertEqual(kernel.wait_for(executions[1], 0)['output'], '1')
+        with self.assertRaises(kernels.KernelNotFound):
+            kernel.wait_for(executions[0], 0)
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..sandbox import run_test_cases
+
+
+class ResourceLimitTests(SimpleTestCase):
+    def test_cases_report_their_resource_use(self):
+        code = "def main(input_data):\n    return sum(range(int(input_data)))\n"
+        case = run_test_cases(code, ['100000'])[0]
+        self.assertEqual(case['output'], '4999950000')
+        self.assertGreaterEqual(case['time_ms'], 0)
+        self.assertGreaterEqual(case['cpu_ms'], 0)
+        self.assertGreater(case['peak_rss_kb'], 0)
+
+    @override_settings(SANDBOX_MAX_OUTPUT_BYTES=10)
+    def test_output_is_capped_in_bytes(self):
+        code = "def main(input_data):\n    print('é' * 100)\n"
+        output = run_test_cases(code, [''])[0]['output']
+        self.assertTrue(output.startswith('ééééé'))
+        self.assertEqual(len(output.split('\n')[0].encode('utf-8')), 10)
+        self.assertTrue(output.endswith('[output truncated]'))
+
+    @override_settings(SANDBOX_MEMORY_MB=128)
+    def test_memory_limit(self):
+        code = "def main(input_data):\n    return len(bytearray(512 * 1024 * 1024))\n"
+        case = run_test_cases(code, [''])[0]
+        self.assertEqual(case['error'], 'MemoryError: memory limit of 128 MB exceeded')
+
+    @override_settings(SANDBOX_CPU_SECONDS=1)
+    def test_cpu_limit(self):
+        code = "def main(input_data):\n    while True:\n        pass\n"
+        case = run_test_cases(code, [''], case_timeout=10)[0]
+        self.assertTrue(case['timed_out'])
+        self.assertEqual(case['error'], 'CPU time limit of 1 seconds exceeded')
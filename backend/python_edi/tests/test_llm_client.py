@@ -0,0 +1,72 @@
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+from ..management.commands import fake_completions
+from .fakes import FakeCompletionsMixin
+
+PAYLOAD = {'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': 'Why does my loop skip the last item?'}]}
+
+
+class LLMClientTests(FakeCompletionsMixin, SimpleTestCase):
+    def test_chat_returns_the_answer(self):
+        server = self.serve(delay=0, answer='Use range(len(items)).')
+        with self.assertLogs('python_edi.llm_client', level='DEBUG') as logs:
+            body = self.llm_client().chat(PAYLOAD)
+        self.assertEqual(body['choices'][0]['message']['content'], 'Use range(len(items)).')
+        self.assertEqual(server.requests, 1)
+        # A successful call is only logged at DEBUG.
+        record, = logs.records
+        self.assertEqual(record.levelname, 'DEBUG')
+        self.assertRegex(record.getMessage(), r'^LLM call succeeded in \d+ ms \(0 retries\)$')
+
+    def test_stream_chat_yields_the_answer_in_pieces(self):
+        self.serve(delay=0, answer='one two three')
+        with self.assertLogs('python_edi.llm_client', level='DEBUG') as logs:
+            self.assertEqual(list(self.llm_client().stream_chat(PAYLOAD)), ['one', ' two', ' three'])
+        self.assertRegex(logs.records[-1].getMessage(), r'^LLM stream succeeded in ')
+
+    def test_read_timeout_is_raised_and_not_retried(self):
+        server = self.serve(delay=1, answer='slow slow slow')
+        client = self.llm_client(read_timeout=0.2)
+        with self.assertLogs('python_edi.llm_client', level='WARNING') as logs:
+            with self.assertRaises(httpx.ReadTimeout):
+                client.chat(PAYLOAD)
+        # The API may already be generating, so a timed-out call isn't repeated.
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(client.stats()['failed'], 1)
+        record, = logs.records
+        self.assertEqual(record.levelname, 'WARNING')
+        self.assertRegex(record.getMessage(), r'^LLM call failed in \d+ ms \(0 retries\)$')
+
+    def test_stream_read_timeout(self):
+        self.serve(delay=1, answer='slow slow slow')
+        with self.assertLogs('python_edi.llm_client', level='WARNING') as logs:
+            with self.assertRaises(httpx.ReadTimeout):
+                list(self.llm_client(read_timeout=0.2).stream_chat(PAYLOAD))
+        self.assertRegex(logs.records[-1].getMessage(), r'^LLM stream failed in ')
+
+    def test_rate_limited_call_is_retried(self):
+        server = self.serve(delay=0, rate_limit=0.5)
+        client = self.llm_client()
+        # The first request is answered 429, the second one normally.
+        with mock.patch.object(fake_completions.random, 'random', side_effect=[0.0, 0.9]), \
+                self.assertLogs('python_edi.llm_client', level='INFO') as logs:
+            body = client.chat(PAYLOAD)
+        self.assertEqual(body['choices'][0]['message']['content'], fake_completions.DEFAULT_ANSWER)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(client.stats()['retries'], 1)
+        record, = logs.records
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertRegex(record.getMessage(), r'^LLM API returned 429; retrying in \d+\.\d\ds$')
+
+    def test_rate_limit_error_after_max_retries(self):
+        server = self.serve(delay=0, rate_limit=1.0)
+        with self.assertLogs('python_edi.llm_client', level='INFO') as logs:
+            with self.assertRaises(httpx.HTTPStatusError) as raised:
+                self.llm_client(max_retries=2).chat(PAYLOAD)
+        self.assertEqual(raised.exception.response.status_code, 429)
+        self.assertEqual(server.requests, 3)
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'INFO', 'WARNING'])
+        self.assertRegex(logs.records[-1].getMessage(), r'^LLM call failed in \d+ ms \(2 retries\)$')
@@ -0,0 +1,103 @@
+import math
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import GradingJob, PythonTask
+from ..performance import DEFAULT_REPEAT, DEFAULT_SIZES, MAX_REPEAT, MAX_SIZES, fit_complexity, stress_plan
+
+SIZES = [1000, 4000, 16000, 64000, 256000]
+GENERATOR = "def generate(n):\n    return ' '.join(['1'] * n)\n"
+
+
+class FitComplexityTests(TestCase):
+    def fit(self, curve, overhead=2.0, noise=()):
+        times = [overhead + curve(n) for n in SIZES]
+        times = [t * (1 + (noise[i] if i < len(noise) else 0)) for i, t in enumerate(times)]
+        return fit_complexity(SIZES, times)['class']
+
+    def test_growth_curves_are_told_apart(self):
+        self.assertEqual(self.fit(lambda n: 0.0), 'O(1)')
+        self.assertEqual(self.fit(lambda n: n / 1000), 'O(n)')
+        self.assertEqual(self.fit(lambda n: n * math.log(n) / 1000), 'O(n log n)')
+        self.assertEqual(self.fit(lambda n: n * n / 1e6), 'O(n^2)')
+
+    def test_small_noise_does_not_change_the_class(self):
+        self.assertEqual(self.fit(lambda n: n / 1000, noise=[0.04, -0.03, 0.05, -0.02, 0.03]), 'O(n)')
+        self.assertEqual(self.fit(lambda n: n * n / 1e6, noise=[-0.05, 0.04, -0.03, 0.02, -0.04]), 'O(n^2)')
+
+    def test_shrinking_times_are_not_a_growth_curve(self):
+        # Times that fall as n grows (a warming cache, say) fit no curve
+        # better than a constant.
+        self.assertEqual(fit_complexity(SIZES, [50.0, 40.0, 30.0, 20.0, 10.0])['class'], 'O(1)')
+
+    def test_too_few_points_give_no_fit(self):
+        self.assertIsNone(fit_complexity(SIZES[:2], [1.0, 4.0]))
+        self.assertIsNone(fit_complexity([], []))
+
+    def test_residuals_are_reported_for_every_class(self):
+        fit = fit_complexity(SIZES, [2.0 + n / 1000 for n in SIZES])
+        self.assertEqual(set(fit['residuals']), {'O(1)', 'O(log n)', 'O(n)', 'O(n log n)', 'O(n^2)', 'O(n^3)'})
+        self.assertEqual(min(fit['residuals'], key=fit['residuals'].get), 'O(n)')
+
+
+class StressPlanTests(TestCase):
+    def test_tasks_without_a_generator_have_no_plan(self):
+        for stress_inputs in (None, [], {}, {'generator': ''}, {'generator': '   '}, {'generator': 42}, {'sizes': [10]}):
+            self.assertIsNone(stress_plan(stress_inputs), stress_inputs)
+
+    def test_defaults(self):
+        self.assertEqual(stress_plan({'generator': GENERATOR}), (GENERATOR, DEFAULT_SIZES, DEFAULT_REPEAT))
+
+    def test_sizes_are_cleaned_and_sorted(self):
+        plan = stress_plan({'generator': GENERATOR, 'sizes': [400, 'big', -5, 0, True, 100, 400, 2.5]})
+        self.assertEqual(plan[1], [100, 400])
+        # Nothing usable left falls back to the defaults.
+        self.assertEqual(stress_plan({'generator': GENERATOR, 'sizes': ['big', 0]})[1], DEFAULT_SIZES)
+        self.assertEqual(stress_plan({'generator': GENERATOR, 'sizes': 'big'})[1], DEFAULT_SIZES)
+
+    def test_sizes_and_repeat_are_capped(self):
+        generator, sizes, repeat = stress_plan({'generator': GENERATOR, 'sizes': list(range(1, 20)), 'repeat': 100})
+        self.assertEqual((sizes, repeat), (list(range(1, MAX_SIZES + 1)), MAX_REPEAT))
+        self.assertEqual(stress_plan({'generator': GENERATOR, 'repeat': -3})[2], 1)
+        self.assertEqual(stress_plan({'generator': GENERATOR, 'repeat': 'often'})[2], DEFAULT_REPEAT)
+        self.assertEqual(stress_plan({'generator': GENERATOR, 'repeat': True})[2], DEFAULT_REPEAT)
+
+
+class PerformanceSubmissionTests(TestCase):
+    CODE = "def main(input_data):\n    return len(input_data.split())\n"
+    TEST_CASES = [{'input': '1 1', 'expectedOutput': '2'}]
+
+    def setUp(self):
+        # The sandbox rate limit's buckets live in the cache.
+        cache.clear()
+
+    def submit(self, task):
+        return self.client.post(
+            reverse('submit-solution'),
+            {'code': self.CODE, 'task': task, 'performance': True},
+            content_type='application/json',
+        )
+
+    def test_a_task_with_stress_inputs_is_queued(self):
+        task = PythonTask.objects.create(
+            title='Count', description='Count the items.', test_cases=self.TEST_CASES,
+            stress_inputs={'generator': GENERATOR},
+        )
+        response = self.submit({'id': task.pk})
+        self.assertEqual(response.status_code, 202)
+        job = GradingJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual((job.task, job.options['performance']), (task, True))
+
+    def test_a_task_without_stress_inputs_is_refused(self):
+        task = PythonTask.objects.create(title='Count', description='Count the items.', test_cases=self.TEST_CASES)
+        response = self.submit({'id': task.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not available', response.data['error'])
+        self.assertFalse(GradingJob.objects.exists())
+
+    def test_an_ad_hoc_task_is_refused(self):
+        response = self.submit({'testCases': self.TEST_CASES})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GradingJob.objects.exists())
@@ -0,0 +1,81 @@
+from django.test import SimpleTestCase
+
+from ..preflight import format_diagnostics, preflight
+
+
+def rules_hit(code, **rules):
+    return [diagnostic['rule'] for diagnostic in preflight(code, rules)]
+
+
+class ForbiddenImportTests(SimpleTestCase):
+    def test_import_statements(self):
+        self.assertEqual(rules_hit('import os'), ['forbidden-import'])
+        self.assertEqual(rules_hit('import os.path as p'), ['forbidden-import'])
+        self.assertEqual(rules_hit('from subprocess import run'), ['forbidden-import'])
+        self.assertEqual(rules_hit('import math\nfrom collections import deque'), [])
+
+    def test_literal_dynamic_imports(self):
+        self.assertEqual(rules_hit("__import__('socket')"), ['forbidden-import'])
+        self.assertEqual(rules_hit("import importlib\nimportlib.import_module('os.path')"), ['forbidden-import'])
+        self.assertEqual(rules_hit("import importlib\nimportlib.import_module('math')"), [])
+
+    def test_computed_module_names_are_rejected(self):
+        for code in (
+            "__import__('o' + 's')",
+            "name = 'os'\n__import__(name)",
+            "import importlib\nimportlib.import_module(''.join(['o', 's']))",
+            "from importlib import import_module\nimport_module(name=input())",
+            "__import__()",
+        ):
+            self.assertEqual(rules_hit(code), ['forbidden-import'], code)
+
+    def test_computed_names_are_allowed_without_forbidden_modules(self):
+        self.assertEqual(rules_hit("__import__('o' + 's')", forbidden_imports=[]), [])
+
+    def test_diagnostic_points_at_the_import(self):
+        diagnostic, = preflight("x = 1\nmodule = __import__('o' + 's')")
+        self.assertEqual((diagnostic['line'], diagnostic['col']), (2, 9))
+        self.assertEqual(format_diagnostics([diagnostic]).split(':')[0], 'Line 2')
+
+
+class InfiniteLoopTests(SimpleTestCase):
+    def test_loop_without_an_exit(self):
+        self.assertEqual(rules_hit('while True:\n    pass'), ['infinite-loop'])
+        self.assertEqual(rules_hit('while 1:\n    x = 1'), ['infinite-loop'])
+
+    def test_loops_that_can_end(self):
+        for code in (
+            'while True:\n    break',
+            'def f():\n    while True:\n        return 1',
+            'while True:\n    raise SystemExit',
+            'import sys\nwhile True:\n    sys.exit()',
+            'n = 3\nwhile n:\n    n -= 1',
+        ):
+            self.assertEqual(rules_hit(code), [], code)
+
+    def test_reading_input_until_eof_can_end(self):
+        self.assertEqual(rules_hit('while True:\n    line = input()\n    print(line)'), [])
+        self.assertEqual(rules_hit('total = 0\nwhile True:\n    total += int(input())'), [])
+
+    def test_break_in_a_nested_loop_only_leaves_that_loop(self):
+        self.assertEqual(rules_hit('while True:\n    for x in []:\n        break'), ['infinite-loop'])
+        # A function defined in the loop doesn't exit it.
+        self.assertEqual(rules_hit('while True:\n    def f():\n        return 1'), ['infinite-loop'])
+
+    def test_rule_can_be_turned_off(self):
+        self.assertEqual(rules_hit('while True:\n    pass', infinite_loops=False), [])
+
+
+class PreflightTests(SimpleTestCase):
+    def test_syntax_error(self):
+        diagnostic, = preflight('def main(:\n    pass')
+        self.assertEqual((diagnostic['rule'], diagnostic['line']), ('syntax', 1))
+
+    def test_require_entry(self):
+        self.assertEqual(rules_hit('print(1)', require_entry=True), ['missing-entry'])
+        self.assertEqual(rules_hit('def main(data):\n    return data', require_entry=True), [])
+
+    def test_results_are_copies(self):
+        first = preflight('import os')
+        first[0]['message'] = 'changed'
+        self.assertNotEqual(preflight('import os')[0]['message'], 'changed')
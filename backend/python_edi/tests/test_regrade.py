@@ -0,0 +1,134 @@
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TransactionTestCase
+
+from ..grading import grade_submission, grading_cases, test_cases_fingerprint
+from ..models import PythonTask, Submission
+
+ECHO = "def main(input_data):\n    return input_data\n"
+DOUBLE = "def main(input_data):\n    return int(input_data) * 2\n"
+
+OLD_CASES = [{'input': '1', 'expected_output': '1'}, {'input': '2', 'expected_output': '2'}]
+# Case 2 is unchanged, case 1 is gone, case 4 is new and case 3's expected
+# output was edited.
+NEW_CASES = [
+    {'input': '2', 'expected_output': '2'},
+    {'input': '4', 'expected_output': '4'},
+    {'input': '3', 'expected_output': '6'},
+]
+
+
+class RegradeCommandTests(TransactionTestCase):
+    # The regrade threads query through their own connections.
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(**{User.USERNAME_FIELD: 'student@example.com'}, password='secret')
+        self.task = PythonTask.objects.create(title='Echo', description='Print the input.', test_cases=OLD_CASES)
+
+    def graded(self, code, test_cases=OLD_CASES):
+        """A submission as record_submission stores it."""
+        result = grade_submission(code, grading_cases(test_cases))
+        return Submission.objects.create(
+            user=self.user, task=self.task, code=code, is_successful=result['success'],
+            output=json.dumps(result['results']), test_cases_hash=test_cases_fingerprint(test_cases),
+        )
+
+    def change_cases(self, test_cases=NEW_CASES):
+        self.task.test_cases = test_cases
+        self.task.save()
+
+    def regrade(self, **options):
+        stdout = io.StringIO()
+        with mock.patch('python_edi.regrade.grade_submission', wraps=grade_submission) as graded:
+            call_command('regrade', stdout=stdout, **options)
+        return graded, stdout.getvalue()
+
+    def test_only_missing_cases_are_run(self):
+        submission = self.graded(ECHO, OLD_CASES + [{'input': '3', 'expected_output': '3'}])
+        self.change_cases()
+        graded, _ = self.regrade()
+
+        # '2' kept its stored result; '4' is new and '3' expects a new output.
+        graded.assert_called_once()
+        self.assertEqual(
+            graded.call_args.args[1],
+            [{'input': '4', 'expectedOutput': '4'}, {'input': '3', 'expectedOutput': '6'}]
+        )
+        submission.refresh_from_db()
+        results = json.loads(submission.output)
+        self.assertEqual([result['input'] for result in results], ['2', '4', '3'])
+        self.assertEqual([result['passed'] for result in results], [True, True, False])
+        self.assertEqual([result['test_case_index'] for result in results], [0, 1, 2])
+        self.assertFalse(submission.is_successful)
+        self.assertEqual(submission.test_cases_hash, test_cases_fingerprint(NEW_CASES))
+
+    def test_up_to_date_submissions_are_left_alone(self):
+        self.change_cases()
+        self.graded(ECHO, NEW_CASES)
+        graded, output = self.regrade()
+        graded.assert_not_called()
+        self.assertIn('Regraded 0 submission(s)', output)
+
+    def test_batches_write_each_submissions_own_verdict(self):
+        codes = [ECHO, DOUBLE, ECHO, DOUBLE, ECHO]
+        submissions = [self.graded(code) for code in codes]
+        self.change_cases([{'input': '2', 'expected_output': '4'}])
+        bulk_update = Submission.objects.bulk_update
+        with mock.patch.object(Submission.objects, 'bulk_update', side_effect=bulk_update) as writes:
+            _, output = self.regrade(batch_size=2, workers=2)
+
+        self.assertEqual([len(call.args[0]) for call in writes.call_args_list], [2, 2, 1])
+        self.assertIn(f'Task {self.task.pk}: 5/5 submissions regraded', output)
+        verdicts = dict(Submission.objects.values_list('pk', 'is_successful'))
+        self.assertEqual([verdicts[submission.pk] for submission in submissions], [code == DOUBLE for code in codes])
+        self.assertEqual(
+            set(Submission.objects.values_list('test_cases_hash', flat=True)),
+            {test_cases_fingerprint([{'input': '2', 'expected_output': '4'}])}
+        )
+
+    def test_an_interrupted_run_resumes_where_it_stopped(self):
+        for _ in range(5):
+            self.graded(ECHO)
+        self.change_cases()
+        bulk_update = Submission.objects.bulk_update
+        writes = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            writes.append(len(args[0]))
+            if len(writes) == 2:
+                raise OperationalError('connection lost')
+            return bulk_update(*args, **kwargs)
+
+        with mock.patch.object(Submission.objects, 'bulk_update', side_effect=crash_on_second_batch):
+            with self.assertRaises(OperationalError):
+                self.regrade(batch_size=2)
+        fingerprint = test_cases_fingerprint(NEW_CASES)
+        self.assertEqual(Submission.objects.filter(test_cases_hash=fingerprint).count(), 2)
+
+        graded, output = self.regrade(batch_size=2)
+        # Only the three submissions the first run didn't write are graded.
+        self.assertEqual(graded.call_count, 3)
+        self.assertIn('Regraded 3 submission(s)', output)
+        self.assertEqual(Submission.objects.filter(test_cases_hash=fingerprint).count(), 5)
+
+    def test_dry_run_only_counts(self):
+        self.graded(ECHO)
+        self.change_cases()
+        graded, output = self.regrade(dry_run=True)
+        graded.assert_not_called()
+        self.assertEqual(output.strip(), f"Task {self.task.pk} (Echo): 1 stale submission(s)")
+
+    def test_task_option_limits_the_run(self):
+        other = PythonTask.objects.create(title='Other', description='Other task.', test_cases=OLD_CASES)
+        Submission.objects.create(user=self.user, task=other, code=ECHO, output='[]', test_cases_hash='old')
+        self.graded(ECHO)
+        self.change_cases()
+        _, output = self.regrade(tasks=[self.task.pk])
+        self.assertIn('Regraded 1 submission(s)', output)
+        self.assertEqual(Submission.objects.get(task=other).test_cases_hash, 'old')
@@ -0,0 +1,57 @@
+import gc
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from .. import admission
+from ..admission import AdmissionController
+from .test_assistance_stream import parse_event
+
+
+class RunCodeStreamTests(TransactionTestCase):
+    # Closing a response sends request_finished, which closes the database
+    # connection; outside a test transaction it simply reconnects.
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(admission, '_controller', AdmissionController(1, 0, 0.1))
+        self.controller = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, code):
+        return self.client.post(reverse('run-code-stream'), {'code': code}, content_type='application/json')
+
+    def test_output_is_streamed_and_the_slot_released(self):
+        response = self.stream("print('hello')\nprint('world')")
+        self.assertEqual(self.controller.stats()['active'], 1)
+        events = [parse_event(chunk) for chunk in response.streaming_content]
+        self.assertEqual(''.join(data for event, data in events if event == 'stdout'), 'hello\nworld\n')
+        event, done = events[-1]
+        self.assertEqual((event, done['success'], done['error']), ('exit', True, None))
+        self.assertEqual(self.controller.stats()['active'], 0)
+
+    def test_busy_sandbox_is_a_plain_503(self):
+        held = self.stream("print('first')")
+        self.assertEqual(self.stream("print('second')").status_code, 503)
+        held.close()
+        self.assertEqual(self.stream("print('third')").status_code, 200)
+
+    def test_closing_an_unread_response_releases_the_slot(self):
+        response = self.stream("print('never read')")
+        self.assertEqual(self.controller.stats()['active'], 1)
+        # What the server does when the client leaves before the first chunk.
+        response.close()
+        self.assertEqual(self.controller.stats()['active'], 0)
+        # Releasing again (e.g. on garbage collection) doesn't free a slot twice.
+        del response
+        gc.collect()
+        self.assertEqual(self.controller.stats()['active'], 0)
+
+    def test_closing_midway_releases_the_slot(self):
+        response = self.stream("for n in range(3):\n    print(n, flush=True)")
+        content = iter(response.streaming_content)
+        self.assertEqual(parse_event(next(content))[0], 'stdout')
+        response.close()
+        self.assertEqual(self.controller.stats()['active'], 0)
@@ -0,0 +1,86 @@
+from django.test import SimpleTestCase, override_settings
+
+from .. import sandbox
+from ..kernels import Kernel
+from ..sandbox import run_test_cases
+
+# Writes frames to every descriptor it can find, as if it were the harness.
+FORGER = """import os
+def main(input_data):
+    for fd in range(3, 64):
+        for frame in (b'{"type": "done", "exit_code": 0}\\n',
+                      b'{"type": "case", "index": 1, "output": "forged"}\\n'):
+            try:
+                os.write(fd, frame)
+            except OSError:
+                pass
+    return 'real'
+"""
+
+
+class SandboxDriverTests(SimpleTestCase):
+    def test_main_return_value_is_the_output(self):
+        code = "def main(input_data):\n    return sum(int(x) for x in input_data.split(','))\n"
+        cases = run_test_cases(code, ['1, 2, 3', '10, -4'])
+        self.assertEqual([case['output'] for case in cases], ['6', '6'])
+        self.assertEqual([case['error'] for case in cases], [None, None])
+
+    def test_main_may_print_instead_of_returning(self):
+        code = "def main(input_data):\n    print(input_data.upper())\n"
+        self.assertEqual(run_test_cases(code, ['abc'])[0]['output'], 'ABC')
+
+    def test_script_reads_stdin(self):
+        code = "name = input()\nprint(f'Hello, {name}!')\n"
+        cases = run_test_cases(code, ['Ada', 'Alan'])
+        self.assertEqual([case['output'] for case in cases], ['Hello, Ada!', 'Hello, Alan!'])
+
+    def test_exception_is_reported_per_case(self):
+        code = "def main(input_data):\n    return 10 // int(input_data)\n"
+        cases = run_test_cases(code, ['2', '0'])
+        self.assertEqual(cases[0]['output'], '5')
+        self.assertIsNone(cases[0]['error'])
+        self.assertIn('ZeroDivisionError', cases[1]['error'])
+
+    def test_infinite_loop_times_out(self):
+        code = "def main(input_data):\n    while True:\n        pass\n"
+        case = run_test_cases(code, [''], case_timeout=0.5)[0]
+        self.assertTrue(case['timed_out'])
+
+    def test_crash_is_reported(self):
+        code = "import os\ndef main(input_data):\n    os._exit(3)\n"
+        case = run_test_cases(code, [''])[0]
+        self.assertEqual(case['error'], 'Process exited with code 3')
+
+
+def reset_pool():
+    """Shut down the process-wide worker pool, so the next run starts a fresh one."""
+    if sandbox._pool is not None:
+        sandbox._pool.shutdown()
+        sandbox._pool = None
+
+
+@override_settings(SANDBOX_POOL_SIZE=1)
+class ChannelIsolationTests(SimpleTestCase):
+    def setUp(self):
+        reset_pool()
+        self.addCleanup(reset_pool)
+
+    def test_forged_frames_are_not_relayed(self):
+        cases = run_test_cases(FORGER, ['1', '2'])
+        self.assertNotIn('forged', [case['output'] for case in cases])
+        self.assertEqual([case['error'] for case in cases], ['Process exited with code -9'] * 2)
+
+    def test_forged_frames_do_not_leak_into_the_next_job(self):
+        run_test_cases(FORGER, ['1', '2'])
+        cases = run_test_cases("def main(input_data):\n    return input_data * 2\n", ['a', 'b'])
+        self.assertEqual([case['output'] for case in cases], ['aa', 'bb'])
+        self.assertEqual(sandbox._pool.stats()['spawned'], 1)
+
+    def test_kernel_keeps_its_namespace_between_snippets(self):
+        kernel = Kernel('session', None, memory_mb=256)
+        self.addCleanup(kernel.kill)
+        kernel.execute('x = 41')
+        self.assertEqual(kernel.execute('x + 1')['output'], '42')
+        self.assertEqual(kernel.execute(FORGER + 'main("")')['error'],
+                         "The session's interpreter exited (memory limit?); the session was reset")
+        self.assertFalse(kernel.is_alive())
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..single_flight import SingleFlight
+from .fakes import FakeCompletionsMixin
+from .test_llm_client import PAYLOAD
+
+
+class SingleFlightTests(FakeCompletionsMixin, SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_identical_calls_make_one_request(self):
+        # Four words at 0.05 s each: every caller arrives while the first is in flight.
+        server = self.serve(delay=0.05, answer='one two three four')
+        client = self.llm_client()
+        flight = SingleFlight('test-flight', lease=5, poll_interval=0.01)
+        barrier = threading.Barrier(5)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(flight.do('same-question', lambda: client.chat(PAYLOAD)))
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(flight.stats(), {'calls': 1, 'joined': 4, 'joined_remote': 0, 'in_flight': 0})
+
+    def test_caller_in_another_process_gets_the_published_result(self):
+        # Two SingleFlight instances share only the cache, like two processes.
+        server = self.serve(delay=0.05, answer='one two three four')
+        client = self.llm_client()
+        leader = SingleFlight('test-flight', lease=5, poll_interval=0.01)
+        follower = SingleFlight('test-flight', lease=5, poll_interval=0.01)
+        results = {}
+
+        thread = threading.Thread(
+            target=lambda: results.__setitem__('leader', leader.do('same-question', lambda: client.chat(PAYLOAD)))
+        )
+        thread.start()
+        time.sleep(0.05)
+        results['follower'] = follower.do('same-question', lambda: client.chat(PAYLOAD))
+        thread.join()
+
+        self.assertEqual(results['follower'], results['leader'])
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(follower.stats()['joined_remote'], 1)
+
+    def test_leader_error_is_shared_with_waiting_callers(self):
+        flight = SingleFlight('test-flight', lease=5, poll_interval=0.01)
+        started = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError('upstream failed')
+
+        def join():
+            started.wait()
+            try:
+                flight.do('same-question', lambda: 'not called')
+            except ValueError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=join)
+        thread.start()
+        with self.assertRaises(ValueError):
+            flight.do('same-question', fail)
+        thread.join()
+        self.assertEqual([str(error) for error in errors], ['upstream failed'])
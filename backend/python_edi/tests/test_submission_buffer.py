@@ -0,0 +1,95 @@
+import io
+import os
+import signal
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TransactionTestCase
+
+from .. import submission_buffer
+from ..models import PythonTask, Submission
+from ..submission_buffer import SubmissionBuffer, flush_submissions, get_submission_buffer
+
+
+class SubmissionBufferTests(TransactionTestCase):
+    # The buffer's flusher thread writes through its own connection, so the
+    # rows have to be visible outside the test's transaction.
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(**{User.USERNAME_FIELD: 'student@example.com'}, password='secret')
+        self.task = PythonTask.objects.create(title='Echo', description='Print the input.')
+
+    def submission(self):
+        return Submission(user=self.user, task=self.task, code='print(input())', is_successful=True)
+
+    def wait_for_rows(self, count, timeout=3):
+        deadline = time.monotonic() + timeout
+        while Submission.objects.count() < count:
+            self.assertLess(time.monotonic(), deadline, f"fewer than {count} submission(s) written")
+            time.sleep(0.02)
+
+    def test_full_batch_is_written_at_once(self):
+        buffer = SubmissionBuffer(max_records=3, max_delay_ms=60000)
+        buffer.add(self.submission())
+        buffer.add(self.submission())
+        self.assertEqual(Submission.objects.count(), 0)
+        buffer.add(self.submission())
+        self.assertEqual(Submission.objects.count(), 3)
+        self.assertEqual((len(buffer), buffer.flushed), (0, 3))
+
+    def test_partial_batch_is_written_after_the_delay(self):
+        buffer = SubmissionBuffer(max_records=100, max_delay_ms=50)
+        buffer.add(self.submission())
+        self.assertEqual(Submission.objects.count(), 0)
+        self.wait_for_rows(1)
+        self.assertEqual(len(buffer), 0)
+
+    def test_failed_write_is_retried(self):
+        bulk_create = Submission.objects.bulk_create
+        calls = []
+
+        def flaky_bulk_create(*args, **kwargs):
+            calls.append(len(args[0]))
+            if len(calls) == 1:
+                raise OperationalError('database is restarting')
+            return bulk_create(*args, **kwargs)
+
+        buffer = SubmissionBuffer(max_records=2, max_delay_ms=50)
+        with mock.patch.object(Submission.objects, 'bulk_create', side_effect=flaky_bulk_create):
+            buffer.add(self.submission())
+            # Fills the batch; the write fails and the rows stay buffered.
+            buffer.add(self.submission())
+            self.wait_for_rows(2)
+        self.assertEqual(calls[:2], [2, 2])
+        self.assertEqual((len(buffer), buffer.flushed), (0, 2))
+
+    def test_pending_rows_are_flushed_at_exit(self):
+        with mock.patch.object(submission_buffer, '_buffer', None), \
+                mock.patch.object(submission_buffer.atexit, 'register') as register:
+            buffer = get_submission_buffer()
+            register.assert_called_once_with(flush_submissions)
+            buffer.max_delay = 60
+            buffer.add(self.submission())
+            self.assertEqual(Submission.objects.count(), 0)
+            # What the interpreter does on a normal exit.
+            register.call_args.args[0]()
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_grade_worker_flushes_when_terminated(self):
+        handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+        for signum, handler in handlers.items():
+            self.addCleanup(signal.signal, signum, handler)
+
+        def claim(name):
+            get_submission_buffer().add(self.submission())
+            os.kill(os.getpid(), signal.SIGTERM)
+            return None
+
+        with mock.patch.object(submission_buffer, '_buffer', SubmissionBuffer(max_records=100, max_delay_ms=60000)), \
+                mock.patch('python_edi.management.commands.grade_worker.claim_next_job', side_effect=claim):
+            call_command('grade_worker', poll_interval=0.01, stdout=io.StringIO())
+        self.assertEqual(Submission.objects.count(), 1)
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import PythonTask
+from ..task_cache import task_payload_cache_stats
+
+TEST_CASES = [{'input': '1, 2', 'expected_output': '3'}]
+
+
+@override_settings(TASK_HTTP_MAX_AGE=60)
+class ConditionalTaskDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.task = PythonTask.objects.create(title='Sum', description='Add two numbers.', test_cases=TEST_CASES)
+        self.url = reverse('python-task-detail', args=[self.task.pk])
+
+    def get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_response_carries_an_etag_and_cache_control(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"detail-{self.task.pk}-1"')
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual(response.data['title'], 'Sum')
+        self.assertIn('def main(input_data)', response.data['template'])
+
+    def test_matching_etag_gets_a_304(self):
+        etag = self.get()['ETag']
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual(response.content, b'')
+        self.assertEqual(task_payload_cache_stats()['not_modified'], 1)
+
+    def test_payload_is_cached_per_revision(self):
+        self.get()
+        self.get()
+        stats = task_payload_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_edit_bumps_the_revision_and_the_etag(self):
+        etag = self.get()['ETag']
+        self.task.title = 'Sum of two numbers'
+        self.task.save()
+        self.assertEqual(self.task.revision, 2)
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"detail-{self.task.pk}-2"')
+        self.assertEqual(response.data['title'], 'Sum of two numbers')
+        self.assertEqual(response.data['revision'], 2)
+
+    def test_partial_save_bumps_the_revision(self):
+        self.task.description = 'Add the two numbers.'
+        self.task.save(update_fields=['description'])
+        self.assertEqual(self.task.revision, 2)
+        self.assertEqual(PythonTask.objects.get(pk=self.task.pk).revision, 2)
+        self.assertEqual(self.get().data['description'], 'Add the two numbers.')
+
+    def test_saves_of_stale_copies_get_their_own_revisions(self):
+        # Two editors loaded the task at the same revision.
+        first = PythonTask.objects.get(pk=self.task.pk)
+        second = PythonTask.objects.get(pk=self.task.pk)
+        first.title = 'Edited first'
+        first.save()
+        self.assertEqual(self.get().data['title'], 'Edited first')
+
+        second.title = 'Edited second'
+        second.save()
+        # Re-using revision 2 would serve the first edit's cached payload.
+        self.assertEqual((first.revision, second.revision), (2, 3))
+        response = self.get()
+        self.assertEqual(response['ETag'], f'"detail-{self.task.pk}-3"')
+        self.assertEqual(response.data['title'], 'Edited second')
+
+    def test_unknown_task_is_a_404(self):
+        self.assertEqual(self.client.get(reverse('python-task-detail', args=[self.task.pk + 100])).status_code, 404)
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import task_selection
+from ..models import PythonTask, Submission
+from ..task_selection import CHANGE_KEY, VERSION_KEY, RandomTaskIndex, pick_random_task
+
+
+def make_task(title, difficulty='easy', **fields):
+    return PythonTask.objects.create(title=title, description=f'{title}.', difficulty=difficulty, **fields)
+
+
+class PickRandomTaskTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(task_selection, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        User = get_user_model()
+        self.user = User.objects.create_user(**{User.USERNAME_FIELD: 'student@example.com'}, password='secret')
+
+    def solve(self, task):
+        Submission.objects.create(user=self.user, task=task, code='print(1)', is_successful=True)
+
+    def picks(self, difficulty, user=None, count=20):
+        return {pick_random_task(difficulty, user).title for _ in range(count)}
+
+    def test_unsolved_tasks_of_the_difficulty_come_first(self):
+        solved = make_task('Solved')
+        make_task('Unsolved')
+        make_task('Medium', difficulty='medium')
+        self.solve(solved)
+        self.assertEqual(self.picks('easy', self.user), {'Unsolved'})
+        self.assertEqual(self.picks('easy'), {'Solved', 'Unsolved'})
+
+    def test_difficulty_wins_over_unsolved(self):
+        self.solve(make_task('Solved'))
+        make_task('Unsolved medium', difficulty='medium')
+        # Every easy task is solved: hand out an easy one again rather than
+        # switch difficulty.
+        self.assertEqual(self.picks('easy', self.user), {'Solved'})
+
+    def test_difficulty_without_tasks_falls_back_to_any(self):
+        self.solve(make_task('Solved medium', difficulty='medium'))
+        make_task('Unsolved medium', difficulty='medium')
+        self.assertEqual(self.picks('hard', self.user), {'Unsolved medium'})
+        PythonTask.objects.filter(title='Unsolved medium').delete()
+        self.assertEqual(self.picks('hard', self.user), {'Solved medium'})
+
+    def test_pooled_tasks_and_duplicates_are_never_picked(self):
+        canonical = make_task('Canonical')
+        make_task('Pooled', pooled=True)
+        make_task('Duplicate', duplicate_of=canonical)
+        self.assertEqual(self.picks('easy'), {'Canonical'})
+
+    def test_no_tasks(self):
+        self.assertIsNone(pick_random_task('easy'))
+
+
+class ReplayTests(TestCase):
+    """Two RandomTaskIndex instances sharing only the cache, like two processes."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(task_selection, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.first = make_task('First')
+        self.other = RandomTaskIndex(max_age=600)
+        self.other.rebuild()
+
+    def reloads(self):
+        return mock.patch.object(self.other, 'rebuild', wraps=self.other.rebuild)
+
+    def test_saves_elsewhere_are_replayed_without_a_reload(self):
+        with self.reloads() as rebuild:
+            second = make_task('Second', difficulty='medium')
+            self.first.difficulty = 'hard'
+            self.first.save()
+            second.pooled = True
+            second.save()
+            self.assertEqual(self.other.counts(), {'easy': 0, 'medium': 0, 'hard': 1})
+        rebuild.assert_not_called()
+        self.assertEqual(self.other.pick('hard'), self.first.pk)
+
+    def test_claims_elsewhere_are_replayed(self):
+        pooled = make_task('Pooled', pooled=True)
+        self.other.counts()
+        PythonTask.objects.filter(pk=pooled.pk).update(pooled=False)
+        pooled.pooled = False
+        with self.reloads() as rebuild:
+            # What claim_task does after its raw UPDATE.
+            task_selection.get_random_task_index().update(pooled)
+            self.assertEqual(self.other.counts()['easy'], 2)
+        rebuild.assert_not_called()
+
+    def test_invalidation_reloads(self):
+        with self.reloads() as rebuild:
+            self.first.delete()
+            self.assertEqual(self.other.counts()['easy'], 0)
+        rebuild.assert_called_once()
+
+    def test_lost_changes_reload(self):
+        make_task('Second')
+        cache.delete(CHANGE_KEY % cache.get(VERSION_KEY))
+        with self.reloads() as rebuild:
+            self.assertEqual(self.other.counts()['easy'], 2)
+        rebuild.assert_called_once()
+
+    def test_far_behind_reloads(self):
+        with mock.patch.object(task_selection, 'MAX_REPLAY', 2):
+            for number in range(3):
+                make_task(f'Task {number}')
+            with self.reloads() as rebuild:
+                self.assertEqual(self.other.counts()['easy'], 4)
+        rebuild.assert_called_once()
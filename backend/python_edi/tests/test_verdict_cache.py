@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase
+
+from ..grading import grade_submission
+from ..sandbox import run_test_cases
+from ..verdict_cache import VERDICT_CACHE, verdict_cache_stats
+
+CODE = "def main(input_data):\n    return int(input_data) * 2\n"
+TEST_CASES = [{'input': '1', 'expectedOutput': '2'}, {'input': '2', 'expectedOutput': '4'}]
+
+
+class VerdictCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        caches[VERDICT_CACHE].clear()
+        patcher = mock.patch('python_edi.grading.run_test_cases', wraps=run_test_cases)
+        self.runs = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_resubmission_is_served_from_the_cache(self):
+        first = grade_submission(CODE, TEST_CASES, task_id=7)
+        # Same code with Windows line endings and trailing whitespace.
+        second = grade_submission(CODE.replace('\n', '  \r\n') + '\r\n', TEST_CASES, task_id=7)
+        self.assertTrue(first['success'])
+        self.assertNotIn('cached', first)
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['results'], first['results'])
+        self.assertEqual(self.runs.call_count, 1)
+        self.assertEqual(verdict_cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_changed_test_cases_are_graded_again(self):
+        grade_submission(CODE, TEST_CASES, task_id=7)
+        edited = TEST_CASES + [{'input': '3', 'expectedOutput': '7'}]
+        result = grade_submission(CODE, edited, task_id=7)
+        self.assertNotIn('cached', result)
+        self.assertFalse(result['success'])
+        self.assertEqual(self.runs.call_count, 2)
+
+    def test_changed_code_is_graded_again(self):
+        grade_submission(CODE, TEST_CASES)
+        grade_submission(CODE.replace('* 2', '+ int(input_data)'), TEST_CASES)
+        self.assertEqual(self.runs.call_count, 2)
+
+    def test_fail_fast_verdicts_are_kept_apart(self):
+        grade_submission(CODE, TEST_CASES)
+        self.assertNotIn('cached', grade_submission(CODE, TEST_CASES, fail_fast=True))
+
+    def test_timed_out_verdicts_are_not_cached(self):
+        code = "import time\ndef main(input_data):\n    time.sleep(5)\n"
+        self.runs.side_effect = lambda code, inputs, **options: run_test_cases(code, inputs, case_timeout=0.3, **options)
+        grade_submission(code, TEST_CASES[:1])
+        result = grade_submission(code, TEST_CASES[:1])
+        self.assertTrue(result['results'][0]['error'].startswith('Code execution timed out'))
+        self.assertNotIn('cached', result)
+        self.assertEqual(self.runs.call_count, 2)
@@ -11,9 +11,14 @@ urlpatterns = [
     path('random-task/', views.random_task, name='random-task'),
     path('generate-task/', views.generate_task, name='generate-task'),
     path('tasks/submit/', views.submit_solution, name='submit-solution'),
+    path('grading-jobs/<int:job_id>/', views.grading_job_status, name='grading-job-status'),
     path('tasks/<int:task_id>/assistance/', views.get_assistance, name='get-assistance'),
     path('tasks/<int:task_id>/hints/', views.get_task_hints, name='get-hints'),
     path('tasks/<int:task_id>/chat-history/', views.get_chat_history, name='chat-history'),
     path('run-code/', views.run_code, name='run-code'),
     path('run-code', views.run_code, name='run-code-no-slash'),
+    path('run-code/stream/', views.run_code_stream, name='run-code-stream'),
+    path('kernels/execute/', views.kernel_execute, name='kernel-execute'),
+    path('kernels/<str:session_id>/', views.kernel_session, name='kernel-session'),
+    path('sandbox/stats/', views.sandbox_stats, name='sandbox-stats'),
 ] 
\ No newline at end of file
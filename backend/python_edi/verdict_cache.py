@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+from django.core.cache import cache, caches
+
+# Alias in settings.CACHES; its TIMEOUT and MAX_ENTRIES bound the cache.
+# Hit/miss counters live in the default cache instead, so evicting
+# verdicts never evicts them.
+#
+# Nothing here needs invalidating: a key covers the test cases themselves,
+# so editing a task's cases changes the key of every verdict graded against
+# them, in every process at once, and the old entries simply age out.
+VERDICT_CACHE = 'verdicts'
+
+HITS_KEY = 'verdict-stats:hits'
+MISSES_KEY = 'verdict-stats:misses'
+
+
+def _cache():
+    return caches[VERDICT_CACHE]
+
+
+def normalize_code(code):
+    """
+    Normalize code so cosmetic differences (line endings, trailing spaces,
+    trailing blank lines) map to the same verdict. Line numbers are kept,
+    so tracebacks in a cached verdict still match the submitted code.
+    """
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).rstrip('\n')
+
+
+def verdict_key(kind, code, test_cases=None, stdin=None, task_id=None):
+    """
+    Content address for a verdict: the normalized code and everything it
+    was run against (test cases, stdin, task).
+    """
+    payload = json.dumps({
+        'kind': kind,
+        'code': normalize_code(code),
+        'test_cases': test_cases,
+        'stdin': stdin,
+        'task': task_id,
+    }, sort_keys=True)
+    return f"verdict:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _count(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_cached_verdict(key):
+    verdict = _cache().get(key)
+    _count(MISSES_KEY if verdict is None else HITS_KEY)
+    return verdict
+
+
+def cache_verdict(key, verdict):
+    _cache().set(key, verdict)
+
+
+def verdict_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
@@ -1,17 +1,38 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import PythonTask, Submission, ChatMessage
-from .serializers import PythonTaskSerializer, SubmissionSerializer, ChatMessageSerializer
-from .openai_utils import execute_python_code, get_ai_assistance, get_task_template, generate_python_task
+from django.urls import reverse
+from django.http import Http404, StreamingHttpResponse
+import json
+from .models import PythonTask, Submission, ChatMessage, GradingJob
+from .pagination import TaskCursorPagination
+from .serializers import PythonTaskSerializer, SubmissionSerializer, ChatMessageSerializer, GradingJobSerializer
+from .openai_utils import (
+    execute_python_code, get_ai_assistance, get_task_template, generate_python_task, stream_ai_assistance
+)
+from .sandbox import get_pool, stream_code
+from .grading import grade_submission, grading_cases, enqueue_grading, record_submission
+from .verdict_cache import verdict_cache_stats
+from .admission import (
+    SandboxBusy, SandboxRateThrottle, admission_stats, hold_admission_slot, sandbox_admission
+)
+from .kernels import KernelNotFound, get_kernel_manager
+from .assistance_cache import assistance_cache_stats
+from .llm_client import llm_stats
+from .task_generation import save_generated_task
+from .task_index import DuplicateTask, get_task_index
+from .task_pool import DIFFICULTIES, claim_task, refill_in_background, task_pool_stats
+from .task_selection import get_random_task_index, pick_random_task
+from .task_cache import conditional_task_response, task_payload_cache_stats
+from .single_flight import assistance_flight
+from .preflight import format_diagnostics, preflight, task_rules
+from .performance import stress_plan
+from django.conf import settings
 from rest_framework import permissions
 import random
-import re
-import subprocess
-import tempfile
-import os
 
 def editor_view(request):
     """
@@ -35,23 +56,65 @@ def editor_view(request):
     return render(request, 'python_edi/editor.html', context)
 
 class PythonTaskViewSet(viewsets.ModelViewSet):
-    queryset = PythonTask.objects.all()
+    """
+    The list is cursor-paginated, newest first (?cursor=, ?page_size=), and
+    takes ?difficulty= and ?fields=id,title,... to return only those fields;
+    only their columns are read from the database.
+    """
+    queryset = PythonTask.objects.filter(pooled=False)
     serializer_class = PythonTaskSerializer
     permission_classes = [permissions.AllowAny]  # Allow any requests for testing
+    pagination_class = TaskCursorPagination
+
+    def list_fields(self):
+        """The ?fields= of a list request, or None for every field."""
+        if self.action != 'list' or not self.request.query_params.get('fields'):
+            return None
+        fields = [name.strip() for name in self.request.query_params['fields'].split(',') if name.strip()]
+        unknown = set(fields) - set(PythonTaskSerializer().fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Linked near-duplicates stay reachable by id, but aren't listed.
+            queryset = queryset.filter(duplicate_of__isnull=True)
+            difficulty = self.request.query_params.get('difficulty')
+            if difficulty:
+                queryset = queryset.filter(difficulty=difficulty)
+            fields = self.list_fields()
+            if fields is not None:
+                # The cursor is built from created_at and id, so always load them.
+                queryset = queryset.only('id', 'created_at', *fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.list_fields())
+        return super().get_serializer(*args, **kwargs)
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        
-        # Add a template to help students get started
-        data['template'] = get_task_template(
-            instance.title, 
-            task_description=instance.description,
-            test_cases=instance.test_cases
+        """
+        The task with a template to help students get started. Responses
+        are cached per task revision and carry an ETag for conditional GETs.
+        """
+        def build():
+            instance = self.get_object()
+            data = dict(self.get_serializer(instance).data)
+            data['template'] = get_task_template(
+                instance.title, 
+                task_description=instance.description,
+                test_cases=instance.test_cases
+            )
+            return data
+
+        response = conditional_task_response(
+            request, 'detail', self.get_queryset(), kwargs[self.lookup_url_kwarg or self.lookup_field], build
         )
-        
-        return Response(data)
+        if response is None:
+            raise Http404
+        return response
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
@@ -59,21 +122,29 @@ def generate_task(request):
     """
     Generate a new Python task using OpenAI API and save it to the database.
     The task will have multiple test cases with integer output.
+    Tasks are handed out from the pre-generated pool when it has one, which
+    is then topped up in the background; an empty pool falls back to
+    generating the task during the request.
     """
     try:
         difficulty = request.data.get('difficulty', 'easy')
+        if difficulty not in DIFFICULTIES:
+            return Response(
+                {"error": f"Unknown difficulty. Choose one of: {', '.join(DIFFICULTIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Generate task using OpenAI
-        task_data = generate_python_task(difficulty)
-        
-        # Create a new task instance and save to database
-        task = PythonTask.objects.create(
-            title=task_data.get('title'),
-            description=task_data.get('description'),
-            difficulty=difficulty,
-            test_cases=task_data.get('test_cases', []),
-            hints=task_data.get('hints', [])  # Save hints if provided
-        )
+        task = claim_task(difficulty)
+        refill_in_background(difficulty)
+        if task is None:
+            # Generate task using OpenAI
+            task_data = generate_python_task(difficulty)
+            try:
+                task = save_generated_task(task_data, difficulty)
+            except DuplicateTask as e:
+                # The bank already has this task: hand out that one.
+                print(f"Generated task is a {e}")
+                task = e.canonical
         
         serializer = PythonTaskSerializer(task)
         return Response(serializer.data)
@@ -100,26 +171,21 @@ def generate_task(request):
 def random_task(request):
     """
     Get a random Python task from the database based on difficulty.
+    Signed-in users get a task they haven't solved yet while there is one.
     """
     try:
         difficulty = request.query_params.get('difficulty', 'easy')
-        
-        # Filter tasks by difficulty
-        tasks = PythonTask.objects.filter(difficulty=difficulty)
-        
-        if not tasks.exists():
-            # If no tasks with the specified difficulty, get all tasks
-            tasks = PythonTask.objects.all()
-            
-        if not tasks.exists():
+        user = request.user if request.user.is_authenticated else None
+
+        # Falls back to any difficulty if this one has no tasks.
+        random_task = pick_random_task(difficulty, user)
+
+        if random_task is None:
             return Response(
                 {"error": "No tasks available in the database"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Select a random task
-        random_task = random.choice(tasks)
-        
         serializer = PythonTaskSerializer(random_task)
         return Response(serializer.data)
     except Exception as e:
@@ -133,10 +199,19 @@ def random_task(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SandboxRateThrottle])
 def submit_solution(request):
     """
     Submit a solution for a Python task.
     This endpoint checks the solution correctness on all test cases.
+    Pass "async": true to queue the submission for `manage.py grade_worker`
+    instead; the response is then a job id to poll at grading-jobs/<id>/.
+    "parallel": true spreads the test cases over several sandbox workers and
+    "fail_fast": true stops at the first failing case, reporting the rest
+    as skipped. "performance": true also times a passing solution on the
+    task's generated stress inputs and estimates its complexity; those
+    submissions are always queued, since the timings take a while, and are
+    refused with a 400 for tasks without stress inputs.
     Authentication is disabled for testing
     """
     try:
@@ -159,85 +234,81 @@ def submit_solution(request):
     
 
         
+    task_id = task.get('id')
+    task_obj = PythonTask.objects.filter(pk=task_id).first() if str(task_id or '').isdigit() else None
+    # A stored task is graded against its own test cases, never the client's
+    # copy; the client's cases are only used for ad-hoc tasks.
+    test_cases = grading_cases(task_obj.test_cases) if task_obj and task_obj.test_cases else task.get('testCases')
+
     # Check if task has test cases
-    if not task.get('testCases') or len(task.get('testCases', [])) == 0:
+    if not test_cases or len(test_cases) == 0:
         return Response(
             {"error": "No test cases found for this task"},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    all_passed = True
-    test_results = []
-    
-    for i, test_case in enumerate(task.get('testCases')):
-        test_input = test_case.get('input', None)
-        expected_output = test_case.get('expectedOutput', None)
+    user = request.user if request.user.is_authenticated else None
+    options = {
+        'parallel': bool(request.data.get('parallel', False)),
+        'fail_fast': bool(request.data.get('fail_fast', False)),
+        'performance': bool(request.data.get('performance', False))
+    }
 
-        if test_input is None:
-            print("Test input is None")
+    # Timings need a stored task with a stress input generator.
+    if options['performance'] and (task_obj is None or stress_plan(task_obj.stress_inputs) is None):
+        return Response(
+            {"error": "Performance reports are not available for this task"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Stress runs take many times longer than grading: they go to a
+    # grade_worker rather than holding a sandbox slot and a web worker here.
+    if request.data.get('async') or options['performance']:
+        # Hand the submission to a grade_worker and let the client poll.
+        job = enqueue_grading(code, test_cases, user=user, task=task_obj, options=options)
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('grading-job-status', args=[job.id])
+        }, status=status.HTTP_202_ACCEPTED)
+
+    with sandbox_admission():
+        result = grade_submission(
+            code, test_cases, task_id=task_obj.pk if task_obj else None,
+            parallel=options['parallel'], fail_fast=options['fail_fast'],
+            preflight_rules=task_rules(task_obj)
+        )
+    record_submission(user, task_obj, code, result, test_cases)
 
-        if expected_output is None:
-            print("Expected output is None")
-            
-        with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as script_file:
-            script_path = script_file.name
-            if "def main(" in code:
-                script_file.write(code + "\n\n# Auto-added by the system\nif __name__ == \"__main__\":\n    test_input = input()\n    result = main(test_input)\n    print(f\"{result}\")\n")
-            else:
-                script_file.write(code)
-                
-        try:
-            # Run the script with the test input
-            print(f"Running test with input: '{test_input}'")
-            result = subprocess.run(
-                ["python", script_path],
-                input=test_input,
-                capture_output=True,
-                text=True,
-                encoding='utf-8'  
-            )
-            
-            # Check the output
-            print(result)
-            actual_output = result.stdout.strip()
-            stderr_output = result.stderr.strip()
-            print(f"Script stdout: '{actual_output}'")
-            print(f"Script stderr: '{stderr_output}'")
-            is_correct = actual_output == expected_output
-            
-            if not is_correct:
-                all_passed = False
-                
-            test_results.append({
-                "test_case_index": i,
-                "input": test_input,
-                "expected_output": expected_output,
-                "actual_output": actual_output,
-                "passed": is_correct
-            })
-            
-        finally:
-            # Clean up the temporary file
-            try:
-                os.unlink(script_path)
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file {script_path}: {e}")
-    
     # Return detailed result information
+    return Response(result)
 
-    print(test_results)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def grading_job_status(request, job_id):
+    """
+    Poll the state of a queued grading job.
+    Once the job is done the response also contains the grading result.
+    Authentication is disabled for testing
+    """
+    try:
+        job = GradingJob.objects.get(pk=job_id)
+    except GradingJob.DoesNotExist:
+        return Response(
+            {"error": "Grading job not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
 
-    return Response({
-        'success': all_passed,
-        'results': test_results,
-        'message': 'All test cases passed!' if all_passed else 'One or more test cases failed'
-    })
+    serializer = GradingJobSerializer(job)
+    return Response(serializer.data)
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def get_assistance(request, task_id):
     """
     Get AI assistance for a Python task.
+    Pass stream=true (body or query string) to receive the answer as
+    Server-Sent Events while it is generated.
     Authentication is disabled for testing
     """
     try:
@@ -265,8 +336,11 @@ def get_assistance(request, task_id):
                 is_from_user=True
             )
         
-        # Get assistance from OpenAI
         task_description = task.description if task else "No task description available"
+        if request.data.get('stream') or request.query_params.get('stream'):
+            return _stream_assistance(user, task, code, error_message, task_description, user_message)
+
+        # Get assistance from OpenAI
         ai_response = get_ai_assistance(code, error_message, task_description, user_message)
         
         # Save AI response if user is authenticated
@@ -289,6 +363,39 @@ def get_assistance(request, task_id):
             'message': f"I'm sorry, I couldn't provide assistance due to a server error: {str(e)}"
         })
 
+def _stream_assistance(user, task, code, error_message, task_description, user_message):
+    """
+    Relay the assistant's answer as Server-Sent Events: `token` events with
+    each piece of text as it arrives, then one `done` event. The answer is
+    saved as a ChatMessage only once it is complete; if the client goes away
+    first, the upstream request is closed and nothing is saved.
+    """
+    def events():
+        pieces = []
+        tokens = stream_ai_assistance(code, error_message, task_description, user_message)
+        try:
+            for piece in tokens:
+                pieces.append(piece)
+                yield _sse_event('token', piece)
+            ai_response = ''.join(pieces)
+            message_id = None
+            if user:
+                message_id = ChatMessage.objects.create(
+                    user=user,
+                    task=task,
+                    message=ai_response,
+                    is_from_user=False
+                ).pk
+            yield _sse_event('done', {'message': ai_response, 'message_id': message_id})
+        finally:
+            # Reached early when the client disconnects: cancels the upstream generation.
+            tokens.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def get_chat_history(request, task_id):
@@ -318,9 +425,12 @@ def get_chat_history(request, task_id):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SandboxRateThrottle])
 def run_code(request):
     """
     Run Python code and return the output (for client-side testing).
+    Code that fails the static pre-flight checks is answered with its
+    "diagnostics" without being run.
     """
     # Authentication is disabled for testing
     try:
@@ -333,53 +443,34 @@ def run_code(request):
         
         # Get optional input data
         input_data = request.data.get('input', '')
+
+        # Reject code that can't work without spawning anything for it
+        diagnostics = preflight(code)
+        if diagnostics:
+            return Response({
+                'error': format_diagnostics(diagnostics),
+                'diagnostics': diagnostics
+            })
         
-        # Preprocess the code to handle return statements in main function
-        if "def main(" in code and "return" in code:
-            # Find main function and replace return statements with print statements
-            lines = code.split('\n')
-            in_main_func = False
-            main_indent = ""
-            
-            for i in range(len(lines)):
-                if re.match(r'^\s*def\s+main\s*\(', lines[i]):
-                    in_main_func = True
-                    # Get the indentation level
-                    main_indent = re.match(r'^(\s*)', lines[i]).group(1)
-                elif in_main_func and lines[i].strip() and not lines[i].startswith(main_indent + " "):
-                    # End of main function
-                    in_main_func = False
-                
-                # Replace return with print in the main function
-                if in_main_func and "return" in lines[i]:
-                    # Extract the returned value
-                    return_match = re.search(r'return\s+(.*?)(\s*#.*)?$', lines[i])
-                    if return_match:
-                        returned_value = return_match.group(1).strip()
-                        # Replace with print statement
-                        indent = re.match(r'^(\s*)', lines[i]).group(1)
-                        lines[i] = f"{indent}print(str({returned_value}))  # Auto-converted return"
-            
-            code = '\n'.join(lines)
-        
-        # Ensure code is automatically run even if there's no explicit call
-        # Check if code includes a main function but doesn't call it
-        if "def main(" in code and "main(" not in code.split("def main(")[1]:
-            code += "\n\n# Auto-added by the system\ninput_value = input()\nmain(input_value)\n"
-        elif "def main():" in code and "main()" not in code.split("def main():")[1]:
-            code += "\n\n# Auto-added by the system\nmain()\n"
-        
-        # Execute the code
-        result = execute_python_code(code, input_data)
+        # Execute the code once a sandbox slot is free
+        with sandbox_admission():
+            result = execute_python_code(code, input_data)
         
+        # Resource accounting for the run, when the sandbox reported it
+        usage = {key: result[key] for key in ('time_ms', 'cpu_ms', 'peak_rss_kb') if key in result}
+
         if result['success']:
             return Response({
-                'output': str(result['output'])
+                'output': str(result['output']),
+                **usage
             })
         else:
             return Response({
-                'error': str(result['error'])
+                'error': str(result['error']),
+                **usage
             })
+    except SandboxBusy:
+        raise
     except Exception as e:
         import traceback
         print(f"Error in run_code: {str(e)}")
@@ -397,54 +488,59 @@ def get_task_hints(request, task_id):
     Authentication is disabled for testing.
     The request can specify hint_index to get a specific hint.
     If no hint_index is provided, returns all hints.
+    Hints are cached per task revision and carry an ETag for conditional GETs.
     """
     try:
-        try:
+        def build():
             task = PythonTask.objects.get(pk=task_id)
-        except PythonTask.DoesNotExist:
+            # If the task has no hints, generate some generic ones
+            if not task.hints or len(task.hints) == 0:
+                generic_hints = [
+                    "Start by understanding what the problem is asking for and the expected input/output format.",
+                    "Break down the problem into smaller steps and tackle each one separately.",
+                    "Don't forget to handle edge cases in your solution."
+                ]
+                task.hints = generic_hints
+                task.save(update_fields=['hints'])
+            return task.hints
+
+        def render(hints):
+            hint_index = request.query_params.get('hint_index')
+            
+            # If hint_index is provided, return that specific hint
+            if hint_index is not None:
+                try:
+                    index = int(hint_index)
+                    if 0 <= index < len(hints):
+                        return Response({
+                            'hint': hints[index],
+                            'hint_index': index,
+                            'total_hints': len(hints)
+                        })
+                    else:
+                        return Response(
+                            {"error": f"Hint index out of range. Available hints: 0-{len(hints) - 1}"},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                except ValueError:
+                    return Response(
+                        {"error": "Invalid hint index. Must be an integer."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
+            # Otherwise return all hints
+            return Response({
+                'hints': hints,
+                'total_hints': len(hints)
+            })
+
+        response = conditional_task_response(request, 'hints', PythonTask.objects.all(), task_id, build, render)
+        if response is None:
             return Response(
                 {"error": "Task not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
-        hint_index = request.query_params.get('hint_index')
-        
-        # If the task has no hints, generate some generic ones
-        if not task.hints or len(task.hints) == 0:
-            generic_hints = [
-                "Start by understanding what the problem is asking for and the expected input/output format.",
-                "Break down the problem into smaller steps and tackle each one separately.",
-                "Don't forget to handle edge cases in your solution."
-            ]
-            task.hints = generic_hints
-            task.save()
-        
-        # If hint_index is provided, return that specific hint
-        if hint_index is not None:
-            try:
-                index = int(hint_index)
-                if 0 <= index < len(task.hints):
-                    return Response({
-                        'hint': task.hints[index],
-                        'hint_index': index,
-                        'total_hints': len(task.hints)
-                    })
-                else:
-                    return Response(
-                        {"error": f"Hint index out of range. Available hints: 0-{len(task.hints) - 1}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            except ValueError:
-                return Response(
-                    {"error": "Invalid hint index. Must be an integer."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Otherwise return all hints
-        return Response({
-            'hints': task.hints,
-            'total_hints': len(task.hints)
-        })
+        return response
     except Exception as e:
         import traceback
         print(f"Error in get_task_hints: {str(e)}")
@@ -452,3 +548,228 @@ def get_task_hints(request, task_id):
         return Response({
             'error': f"Server error: {str(e)}"
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class _AdmittedStream:
+    """
+    Streaming content that holds a sandbox slot from creation until it is
+    exhausted or closed. StreamingHttpResponse closes its content when the
+    response is closed, even if it was never iterated (e.g. the client left
+    before the first chunk); failing that, the slot goes back when the
+    stream is garbage collected.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._release = hold_admission_slot(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        try:
+            self._chunks.close()
+        finally:
+            self._release()
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([SandboxRateThrottle])
+def run_code_stream(request):
+    """
+    Run Python code like run_code, but stream its output as Server-Sent
+    Events while it runs: "stdout" and "stderr" events carry output chunks
+    as the code prints them (capped at SANDBOX_MAX_OUTPUT_BYTES per stream),
+    and a final "exit" event carries success, error, timed_out and the
+    resource usage of the run.
+    Authentication is disabled for testing
+    """
+    code = request.data.get('code')
+    if not code:
+        return Response(
+            {"error": "Code is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    input_data = request.data.get('input', '')
+    if isinstance(input_data, list):
+        input_data = ', '.join(map(str, input_data))
+
+    diagnostics = preflight(code)
+    if diagnostics:
+        rejected = _sse_event('exit', {
+            'success': False,
+            'exit_status': 1,
+            'error': format_diagnostics(diagnostics),
+            'diagnostics': diagnostics,
+            'timed_out': False
+        })
+        return StreamingHttpResponse(iter([rejected]), content_type='text/event-stream')
+
+    def events():
+        case = None
+        for frame in stream_code(code, input_data or ''):
+            if frame['type'] == 'chunk':
+                yield _sse_event(frame['stream'], frame['data'])
+            elif frame['type'] == 'case':
+                case = frame
+            elif frame['type'] == 'done' and case is not None:
+                yield _sse_event('exit', {
+                    'success': not case['error'],
+                    'exit_status': 1 if case['error'] else 0,
+                    'error': case['error'],
+                    'timed_out': case['timed_out'],
+                    'time_ms': case['time_ms'],
+                    'cpu_ms': case['cpu_ms'],
+                    'peak_rss_kb': case['peak_rss_kb']
+                })
+
+    # The slot is taken before streaming, so a busy sandbox is still a plain 503.
+    response = StreamingHttpResponse(_AdmittedStream(events()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _kernel_owner(request):
+    # Anonymous callers are told apart by their session, so one visitor
+    # can't reach another's kernel by guessing its session_id.
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if request.session.session_key is None:
+        request.session.save()
+    return f'session:{request.session.session_key}'
+
+def _kernel_response(kernel, execution, session_id, timeout):
+    """The execution's result, or a 202 pointing at where to poll for it."""
+    result = kernel.wait_for(execution, timeout)
+    body = {
+        'session_id': kernel.session_id,
+        'new_session': kernel.session_id != session_id,
+        'execution_count': execution
+    }
+    if result is None:
+        poll_url = f"{reverse('kernel-session', args=[kernel.session_id])}?execution={execution}"
+        return Response({**body, 'status': 'running', 'poll_url': poll_url}, status=status.HTTP_202_ACCEPTED)
+    return Response({**body, 'status': 'done', **result})
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([SandboxRateThrottle])
+def kernel_execute(request):
+    """
+    Run a snippet in the caller's persistent interactive kernel.
+    Variables, imports and definitions survive between calls with the same
+    "session_id"; omit it (or send an expired one) to start a new session.
+    The session_id to use next time is always in the response. If the
+    session is still running an earlier snippet, the request waits for it.
+    Sessions belong to the signed-in user, or to the browser session of an
+    anonymous caller.
+
+    This is a long-poll endpoint: the result comes back if the snippet
+    finishes within SANDBOX_KERNEL_POLL_TIMEOUT seconds, otherwise a 202
+    with a "poll_url" (GET kernels/<session_id>/?execution=<n>) that waits
+    for it in turn.
+    Authentication is disabled for testing
+    """
+    manager = get_kernel_manager()
+    if manager is None:
+        return Response(
+            {"error": "Interactive sessions are disabled"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    code = request.data.get('code')
+    if not code:
+        return Response(
+            {"error": "Code is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    session_id = request.data.get('session_id')
+    diagnostics = preflight(code)
+    if diagnostics:
+        return Response({
+            'session_id': session_id,
+            'error': format_diagnostics(diagnostics),
+            'diagnostics': diagnostics
+        })
+
+    kernel = manager.get_or_start(session_id, _kernel_owner(request))
+    execution = kernel.start(
+        code,
+        request.data.get('input', '') or '',
+        wait=getattr(settings, 'SANDBOX_QUEUE_TIMEOUT', 5)
+    )
+    return _kernel_response(kernel, execution, session_id, getattr(settings, 'SANDBOX_KERNEL_POLL_TIMEOUT', 20))
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.AllowAny])
+def kernel_session(request, session_id):
+    """
+    GET ?execution=<n> waits (long-polls) up to SANDBOX_KERNEL_POLL_TIMEOUT
+    seconds, or ?timeout= if shorter, for the result of a snippet started by
+    kernels/execute/. DELETE shuts down an interactive session and frees
+    its kernel.
+    Authentication is disabled for testing
+    """
+    manager = get_kernel_manager()
+    try:
+        if manager is None:
+            raise KernelNotFound(session_id)
+        if request.method == 'DELETE':
+            manager.shutdown(session_id, _kernel_owner(request))
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        try:
+            execution = int(request.query_params['execution'])
+            timeout = float(request.query_params.get('timeout', 'inf'))
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "An integer execution is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        timeout = max(0.0, min(timeout, getattr(settings, 'SANDBOX_KERNEL_POLL_TIMEOUT', 20)))
+        kernel = manager.get(session_id, _kernel_owner(request))
+        return _kernel_response(kernel, execution, session_id, timeout)
+    except KernelNotFound:
+        return Response(
+            {"error": "Session not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def sandbox_stats(request):
+    """
+    Report the state of this process's warm sandbox worker pool, the
+    interactive kernels, the verdict cache hit/miss counters, admission
+    control metrics, the LLM client's call latency and retry counters, how
+    many AI assistance requests were coalesced, the assistance cache's hit
+    rate, the pre-generated task pool, the task near-duplicate and
+    random-task indexes, and the task detail/hints payload cache.
+    Authentication is disabled for testing.
+    """
+    pool = get_pool()
+    kernels = get_kernel_manager()
+    return Response({
+        'pool': pool.stats() if pool is not None else None,
+        'kernels': kernels.stats() if kernels is not None else None,
+        'verdict_cache': verdict_cache_stats(),
+        'admission': admission_stats(),
+        'llm': llm_stats(),
+        'assistance_coalescing': assistance_flight().stats(),
+        'assistance_cache': assistance_cache_stats(),
+        'task_pool': task_pool_stats(),
+        'task_index': get_task_index().stats(),
+        'random_task_index': get_random_task_index().stats(),
+        'task_payload_cache': task_payload_cache_stats()
+    })
@@ -26,37 +26,42 @@ interface Submission {
 
 export default function TaskHistoryPage() {
   const [tasks, setTasks] = useState<Task[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [submissions, setSubmissions] = useState<Submission[]>([]);
+  const [nextSubmissionsPage, setNextSubmissionsPage] = useState<string | null>(null);
+  const [loadingMoreSubmissions, setLoadingMoreSubmissions] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [usingMockData, setUsingMockData] = useState(false);
 
   useEffect(() => {
-    // Fetch tasks and submissions on component mount
+    // Fetch the first page of tasks and of submissions on component mount.
+    // They are paged separately: a submission's task may be on a later page.
     const fetchData = async () => {
       try {
         setLoading(true);
         
-        // Fetch all tasks
-        const tasksData = await taskApi.getAllTasks();
-        setTasks(Array.isArray(tasksData) ? tasksData : []);
+        const [page, submissionsPage] = await Promise.all([
+          taskApi.getTasksPage(),
+          submissionApi.getSubmissionsPage().catch((submissionError) => {
+            console.error('Error fetching submissions:', submissionError);
+            // Don't fail the whole page if submissions fail
+            return { submissions: [] as Submission[], next: null };
+          }),
+        ]);
+        setTasks(Array.isArray(page.tasks) ? page.tasks : []);
+        setNextPage(page.next);
         
         // Check if using mock data
-        if (tasksData === mockTasks) {
+        if (page.tasks === mockTasks) {
           setUsingMockData(true);
         }
         
-        // Fetch all submissions
-        let submissionsData;
-        try {
-          submissionsData = await submissionApi.getAllSubmissions();
-          // Ensure we have an array of submissions
-          setSubmissions(Array.isArray(submissionsData) ? submissionsData : []);
-        } catch (submissionError) {
-          console.error('Error fetching submissions:', submissionError);
-          // Don't fail the whole page if submissions fail
-          setSubmissions([]);
-        }
+        // Ensure we have an array of submissions
+        setSubmissions(Array.isArray(submissionsPage.submissions) ? submissionsPage.submissions : []);
+        setNextSubmissionsPage(submissionsPage.next);
         
         setError(null);
       } catch (err) {
@@ -70,6 +75,38 @@ export default function TaskHistoryPage() {
     fetchData();
   }, []);
 
+  const handleLoadMore = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const page = await taskApi.getTasksPage(nextPage);
+      setTasks((current) => [...current, ...page.tasks]);
+      setNextPage(page.next);
+      setLoadMoreError(null);
+    } catch (err) {
+      console.error('Failed to fetch more tasks', err);
+      setLoadMoreError('Failed to load more tasks. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleLoadMoreSubmissions = async () => {
+    if (!nextSubmissionsPage) return;
+    try {
+      setLoadingMoreSubmissions(true);
+      const page = await submissionApi.getSubmissionsPage(nextSubmissionsPage);
+      setSubmissions((current) => [...current, ...page.submissions]);
+      setNextSubmissionsPage(page.next);
+      setLoadMoreError(null);
+    } catch (err) {
+      console.error('Failed to fetch more submissions', err);
+      setLoadMoreError('Failed to load more submissions. Please try again.');
+    } finally {
+      setLoadingMoreSubmissions(false);
+    }
+  };
+
   // Group submissions by task ID, with safety checks
   const submissionsByTask = submissions.reduce((acc, submission) => {
     // Safety check for valid task ID
@@ -83,6 +120,12 @@ export default function TaskHistoryPage() {
     return acc;
   }, {} as Record<number, Submission[]>);
 
+  // Submissions whose task isn't on a loaded page yet
+  const loadedTaskIds = new Set(tasks.map((task) => task.id));
+  const unlistedSubmissions = submissions.filter(
+    (submission) => submission && submission.task && !loadedTaskIds.has(submission.task)
+  ).length;
+
   if (loading) {
     return (
       <div className="flex justify-center items-center min-h-screen">
@@ -212,6 +255,37 @@ export default function TaskHistoryPage() {
           })}
         </div>
       )}
+      
+      {(nextPage || nextSubmissionsPage) && (
+        <div className="flex flex-col items-center mt-6">
+          {unlistedSubmissions > 0 && nextPage && (
+            <p className="text-gray-500 mb-2">
+              {unlistedSubmissions} submission(s) belong to tasks further down the list.
+            </p>
+          )}
+          {loadMoreError && <p className="text-red-600 mb-2">{loadMoreError}</p>}
+          <div className="flex gap-4">
+            {nextPage && (
+              <button 
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="bg-blue-500 hover:bg-blue-700 disabled:opacity-50 text-white font-bold py-2 px-4 rounded"
+              >
+                {loadingMore ? 'Loading...' : 'Load More Tasks'}
+              </button>
+            )}
+            {nextSubmissionsPage && (
+              <button 
+                onClick={handleLoadMoreSubmissions}
+                disabled={loadingMoreSubmissions}
+                className="bg-blue-500 hover:bg-blue-700 disabled:opacity-50 text-white font-bold py-2 px-4 rounded"
+              >
+                {loadingMoreSubmissions ? 'Loading...' : 'Load More Submissions'}
+              </button>
+            )}
+          </div>
+        </div>
+      )}
     </div>
   );
 } 
\ No newline at end of file
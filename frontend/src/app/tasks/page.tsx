@@ -15,6 +15,9 @@ interface Task {
 
 export default function TasksPage() {
   const [tasks, setTasks] = useState<Task[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [selectedDifficulty, setSelectedDifficulty] = useState('easy');
@@ -24,8 +27,9 @@ export default function TasksPage() {
     const fetchTasks = async () => {
       try {
         setLoading(true);
-        const tasksData = await taskApi.getAllTasks();
-        setTasks(tasksData);
+        const page = await taskApi.getTasksPage();
+        setTasks(page.tasks);
+        setNextPage(page.next);
         setError(null);
       } catch (err) {
         console.error('Failed to fetch tasks', err);
@@ -38,6 +42,22 @@ export default function TasksPage() {
     fetchTasks();
   }, []);
 
+  const handleLoadMore = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const page = await taskApi.getTasksPage(nextPage);
+      setTasks((current) => [...current, ...page.tasks]);
+      setNextPage(page.next);
+      setLoadMoreError(null);
+    } catch (err) {
+      console.error('Failed to fetch more tasks', err);
+      setLoadMoreError('Failed to load more tasks. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleGetRandomTask = async () => {
     try {
       setLoading(true);
@@ -139,6 +159,19 @@ export default function TasksPage() {
           ))}
         </div>
       )}
+      
+      {nextPage && (
+        <div className="flex flex-col items-center mt-6">
+          {loadMoreError && <p className="text-red-600 mb-2">{loadMoreError}</p>}
+          <button 
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="bg-blue-500 hover:bg-blue-700 disabled:opacity-50 text-white font-bold py-2 px-4 rounded"
+          >
+            {loadingMore ? 'Loading...' : 'Load More Tasks'}
+          </button>
+        </div>
+      )}
     </div>
   );
 } 
\ No newline at end of file
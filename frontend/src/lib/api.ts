@@ -27,15 +27,22 @@ const apiClient = axios.create({
 
 // API для задач
 export const taskApi = {
-  // Получить все задачи
-  getAllTasks: async () => {
+  // Получить страницу задач. The list is cursor-paginated: pass the
+  // `next` URL of the previous page to get the following one. Only the
+  // first page falls back to mock data; a later page that fails throws,
+  // so mock tasks are never appended to real ones.
+  getTasksPage: async (pageUrl?: string | null) => {
     try {
-      const response = await apiClient.get(`${PYTHON_EDI_API}/api/tasks/`);
-      return response.data;
+      const url = pageUrl || `${PYTHON_EDI_API}/api/tasks/?fields=id,title,description,difficulty,created_at`;
+      const response = await apiClient.get(url);
+      return { tasks: response.data.results, next: response.data.next as string | null };
     } catch (error) {
       console.error('Error fetching tasks:', error);
+      if (pageUrl) {
+        throw error;
+      }
       console.log('Using mock tasks data as fallback');
-      return mockTasks; // Return mock data instead of throwing
+      return { tasks: mockTasks, next: null }; // Return mock data instead of throwing
     }
   },
   
@@ -92,6 +99,26 @@ export const submissionApi = {
     }
   },
   
+  // Получить страницу решений. Follows the same `next` URLs as the task
+  // list; an unpaginated response (a plain array) is a single page. Only
+  // the first page falls back to mock data.
+  getSubmissionsPage: async (pageUrl?: string | null) => {
+    try {
+      const response = await apiClient.get(pageUrl || `${PYTHON_EDI_API}/api/submissions/`);
+      if (Array.isArray(response.data)) {
+        return { submissions: response.data, next: null as string | null };
+      }
+      return { submissions: response.data.results, next: response.data.next as string | null };
+    } catch (error) {
+      console.error('Error fetching submissions:', error);
+      if (pageUrl) {
+        throw error;
+      }
+      console.log('Using mock submissions data as fallback');
+      return { submissions: mockSubmissions, next: null as string | null };
+    }
+  },
+
   // Получить решения пользователя
   getUserSubmissions: async (userName: string) => {
     try {